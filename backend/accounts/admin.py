@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, DataExport, DataDeletion
 
 
 @admin.register(User)
@@ -13,3 +13,17 @@ class UserAdmin(BaseUserAdmin):
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Additional Info', {'fields': ('role', 'language')}),
     )
+
+
+@admin.register(DataExport)
+class DataExportAdmin(admin.ModelAdmin):
+    list_display = ['user', 'status', 'file_size', 'created_at', 'finished_at', 'expires_at']
+    list_filter = ['status']
+    readonly_fields = ['counts', 'error', 'started_at', 'finished_at']
+
+
+@admin.register(DataDeletion)
+class DataDeletionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'status', 'files_total', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['counts', 'error', 'finished_at']
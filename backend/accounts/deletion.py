@@ -0,0 +1,131 @@
+"""
+GDPR deletion of all of a user's data.
+
+Rows are removed with set-based DELETE ... WHERE id IN (SELECT ... LIMIT n)
+statements, children before parents, inside one transaction. Nothing is
+loaded into Python and no deletion cascade is collected. That also skips
+model delete() overrides and signals, so their side effects are done here:
+stored files are queued for the background sweeper (see documents.storage),
+derived analytics and storage counters are deleted, cached analyses of the
+user's documents are purged and the dashboard cache is invalidated.
+"""
+
+from django.db import transaction
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+from .models import DataDeletion, DataExport
+from analytics.cache import invalidate
+from analytics.models import AuditLog, DailyUserStats, UsageMetric
+from documents.models import AnalysisJob, Document, StorageUsage
+from documents.storage import queue_file_deletions
+from cases.models import Case
+from ai_agent.cache import get_analysis_cache
+from ai_agent.models import Conversation, KnowledgeBase, KnowledgeChunk, Message
+from ai_agent.services import ANALYSIS_TEXT_CHARS, AIService, analysis_cache_keys
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+
+def deletion_steps(user):
+    """(entity name, queryset) in deletion order, children before parents"""
+    return [
+        ('knowledge_chunks', KnowledgeChunk.objects.filter(entry__document__user=user)),
+        ('knowledge_base', KnowledgeBase.objects.filter(document__user=user)),
+        ('messages', Message.objects.filter(conversation__user=user)),
+        ('conversations', Conversation.objects.filter(user=user)),
+        ('analysis_jobs', AnalysisJob.objects.filter(Q(user=user) | Q(document__user=user))),
+        ('documents', Document.objects.filter(user=user)),
+        ('cases', Case.objects.filter(lawyer=user)),
+        ('usage_metrics', UsageMetric.objects.filter(user=user)),
+        ('daily_stats', DailyUserStats.objects.filter(user=user)),
+        ('storage_usage', StorageUsage.objects.filter(user=user)),
+        ('audit_logs', AuditLog.objects.filter(user=user)),
+        ('data_exports', DataExport.objects.filter(user=user)),
+    ]
+
+
+def unlink_references(user):
+    """SET_NULL the rows of other users that point at rows about to be deleted"""
+    Message.objects.filter(document__user=user).exclude(conversation__user=user).update(document=None)
+    Conversation.objects.filter(case__lawyer=user).exclude(user=user).update(case=None)
+    Document.objects.filter(case__lawyer=user).exclude(user=user).update(case=None)
+
+
+def stored_file_names(user):
+    """Storage names of every file owned by a user"""
+    yield from Document.objects.filter(user=user).exclude(file='').order_by('file').values_list(
+        'file', flat=True
+    ).distinct().iterator(chunk_size=BATCH_SIZE)
+    yield from DataExport.objects.filter(user=user).exclude(file='').values_list(
+        'file', flat=True
+    ).iterator(chunk_size=BATCH_SIZE)
+
+
+def purge_analysis_cache(user):
+    """Drop the cached analyses of a user's documents. Returns the number of keys.
+
+    Cache keys are content hashes, so they are recomputed from the analyzed
+    part of each document's text for every language. Entries made with older
+    prompt versions were already cleared when the prompts changed.
+    """
+    texts = set(
+        Document.objects.filter(user=user).exclude(content_text='').annotate(
+            analyzed_text=Substr('content_text', 1, ANALYSIS_TEXT_CHARS)
+        ).values_list('analyzed_text', flat=True).iterator(chunk_size=BATCH_SIZE)
+    )
+    cache = get_analysis_cache()
+    keys = 0
+    for language, _ in settings.LANGUAGES:
+        for key in analysis_cache_keys(texts, language, AIService.model):
+            cache.delete(key)
+            keys += 1
+    return keys
+
+
+def delete_in_batches(queryset):
+    """Delete the rows of a queryset in set-based batches. Returns the number of rows."""
+    model = queryset.model
+    ids = queryset.order_by().values('pk')
+    total = 0
+    while True:
+        batch = model.objects.filter(pk__in=ids[:BATCH_SIZE])
+        # Plain DELETE statement: no cascade collection, signals or delete() overrides
+        deleted = batch._raw_delete(batch.db)
+        total += deleted
+        if deleted < BATCH_SIZE:
+            return total
+
+
+def delete_user_data(user, progress=None):
+    """Delete all data of a user and return the DataDeletion that records it.
+
+    progress, if given, is called with (entity name, deleted rows) after each step.
+    """
+    deletion = DataDeletion.objects.create(user=user)
+    try:
+        with transaction.atomic():
+            deletion.files_total = queue_file_deletions(stored_file_names(user), deletion=deletion)
+            unlink_references(user)
+            purge_analysis_cache(user)
+            for name, queryset in deletion_steps(user):
+                deletion.counts[name] = delete_in_batches(queryset)
+                logger.info(f"Data deletion {deletion.id}: deleted {deletion.counts[name]} {name}")
+                if progress:
+                    progress(name, deletion.counts[name])
+        deletion.status = 'done'
+    except Exception as e:
+        logger.error(f"Data deletion {deletion.id} failed: {str(e)}")
+        deletion.counts = {}
+        deletion.files_total = 0
+        deletion.status = 'failed'
+        deletion.error = str(e)
+
+    deletion.finished_at = timezone.now()
+    deletion.save(update_fields=['status', 'counts', 'files_total', 'error', 'finished_at'])
+    invalidate(user.id)
+    return deletion
@@ -0,0 +1,192 @@
+"""
+GDPR data export archives.
+
+An export is a DataExport row processed by the run_worker command. The worker
+writes a ZIP archive to a temporary file: one NDJSON file per entity, read
+with .iterator() so memory stays flat, plus the original uploaded files. The
+finished archive is moved to storage and downloaded through an authenticated
+endpoint until it expires.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .models import DataExport
+from .serializers import UserSerializer
+from analytics.events import settle_time
+from analytics.models import AuditLog, UsageMetric
+from documents.models import Document
+from cases.models import Case
+from ai_agent.models import Conversation, Message
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+STALE_AFTER = timedelta(minutes=30)
+
+
+def document_archive_path(name):
+    """Path of an uploaded file inside the archive"""
+    return f'files/{os.path.basename(name)}'
+
+
+def export_entities(user):
+    """(file name, values queryset) for each exported entity"""
+    return [
+        ('documents.ndjson', Document.objects.filter(user=user).order_by('id').values(
+            'id', 'title', 'file_type', 'original_filename', 'file', 'file_size', 'case_id',
+            'priority', 'status', 'tags', 'analysis', 'is_ai_generated', 'created_at', 'updated_at'
+        )),
+        ('cases.ndjson', Case.objects.filter(lawyer=user).order_by('id').values(
+            'id', 'title', 'description', 'priority', 'status', 'created_at', 'updated_at'
+        )),
+        ('conversations.ndjson', Conversation.objects.filter(user=user).order_by('id').values(
+            'id', 'title', 'language', 'case_id', 'summary', 'created_at', 'updated_at'
+        )),
+        ('messages.ndjson', Message.objects.filter(conversation__user=user).order_by('id').values(
+            'id', 'conversation_id', 'role', 'content', 'document_id', 'tokens_used', 'created_at'
+        )),
+        ('audit_logs.ndjson', AuditLog.objects.filter(user=user).order_by('id').values(
+            'id', 'action', 'resource_type', 'resource_id', 'ip_address', 'metadata', 'created_at'
+        )),
+        ('usage_metrics.ndjson', UsageMetric.objects.filter(user=user).order_by('id').values(
+            'id', 'metric_type', 'value', 'metadata', 'created_at'
+        )),
+    ]
+
+
+def write_ndjson(archive, name, rows):
+    """Write rows to one NDJSON member of the archive. Returns the number of rows."""
+    count = 0
+    # Member sizes are unknown up front, so ZIP64 headers are forced for members over 2 GiB
+    with archive.open(name, 'w', force_zip64=True) as member, io.TextIOWrapper(member, encoding='utf-8') as out:
+        for row in rows:
+            out.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def document_rows(queryset):
+    """Document rows with the stored file path replaced by its path in the archive"""
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row['file'] = document_archive_path(row['file']) if row['file'] else None
+        yield row
+
+
+def write_files(archive, user):
+    """Copy the user's uploaded files into the archive. Returns the number of files."""
+    count = 0
+    names = Document.objects.filter(user=user).exclude(file='').order_by('file').values_list('file', flat=True).distinct()
+    for name in names.iterator(chunk_size=CHUNK_SIZE):
+        try:
+            target_name = document_archive_path(name)
+            with default_storage.open(name) as source, archive.open(target_name, 'w', force_zip64=True) as target:
+                shutil.copyfileobj(source, target)
+            count += 1
+        except (FileNotFoundError, OSError) as e:
+            logger.warning(f"Data export of user {user.id}: skipping missing file {name}: {str(e)}")
+    return count
+
+
+def write_archive(user, path):
+    """Write the export archive for a user to path. Returns the per-entity counts."""
+    counts = {}
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        write_ndjson(archive, 'profile.ndjson', [UserSerializer(user).data])
+        for name, queryset in export_entities(user):
+            rows = document_rows(queryset) if name == 'documents.ndjson' else queryset.iterator(chunk_size=CHUNK_SIZE)
+            counts[name.removesuffix('.ndjson')] = write_ndjson(archive, name, rows)
+        counts['files'] = write_files(archive, user)
+        archive.writestr('manifest.json', json.dumps({
+            'user_id': user.id,
+            'exported_at': timezone.now().isoformat(),
+            'counts': counts,
+        }, indent=2))
+    return counts
+
+
+def enqueue_export(user):
+    """Queue a data export for a user, reusing one that is still pending"""
+    export = DataExport.objects.filter(user=user, status__in=['queued', 'running']).first()
+    if export:
+        return export
+    return DataExport.objects.create(user=user)
+
+
+def claimable_exports():
+    """Queued exports, and running ones whose worker died"""
+    now = timezone.now()
+    return DataExport.objects.filter(
+        # Wait until the web processes have written the audit logs and usage metrics they buffer
+        Q(status='queued', created_at__lte=now - settle_time())
+        | Q(status='running', started_at__lt=now - STALE_AFTER)
+    )
+
+
+def claim_next_export():
+    """Atomically move the oldest claimable export to running and return it"""
+    while True:
+        export = claimable_exports().order_by('created_at').first()
+        if export is None:
+            return None
+
+        now = timezone.now()
+        claimed = claimable_exports().filter(pk=export.pk).update(status='running', started_at=now)
+        if claimed:
+            export.status = 'running'
+            export.started_at = now
+            return export
+        # Another worker took it first; try the next one
+
+
+def run_export(export):
+    """Build the archive for a claimed export and store it"""
+    user = export.user
+    with tempfile.NamedTemporaryFile(suffix='.zip') as tmp:
+        try:
+            export.counts = write_archive(user, tmp.name)
+            tmp.seek(0)
+            export.file.save(f'golexai-data-export-{export.id}.zip', File(tmp), save=False)
+            export.file_size = export.file.size
+            export.status = 'done'
+            export.expires_at = timezone.now() + timedelta(hours=settings.DATA_EXPORT_RETENTION_HOURS)
+        except Exception as e:
+            logger.error(f"Data export {export.id} failed: {str(e)}")
+            export.status = 'failed'
+            export.error = str(e)
+
+    export.finished_at = timezone.now()
+    export.save(update_fields=['status', 'file', 'file_size', 'counts', 'error', 'finished_at', 'expires_at'])
+    return export
+
+
+def process_next_export():
+    """Claim and build one data export. Returns True if an export was processed."""
+    export = claim_next_export()
+    if export is None:
+        return False
+    run_export(export)
+    return True
+
+
+def delete_expired_exports():
+    """Remove archives past their expiry. Returns True if any were removed."""
+    expired = DataExport.objects.filter(status='done', expires_at__lt=timezone.now()).exclude(file='')
+    removed = 0
+    for export in expired[:100]:
+        export.file.delete(save=False)
+        export.file_size = 0
+        export.save(update_fields=['file', 'file_size'])
+        removed += 1
+    return removed > 0
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from accounts.deletion import delete_user_data
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Delete all data of a user (GDPR). Stored files are removed afterwards by run_worker."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user whose data is deleted')
+    
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['email']}")
+        
+        deletion = delete_user_data(user, progress=lambda name, rows: self.stdout.write(f'  {name}: {rows}'))
+        if deletion.status == 'failed':
+            raise CommandError(f'Deletion failed: {deletion.error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {sum(deletion.counts.values())} rows; {deletion.files_total} file(s) queued for removal'
+        ))
@@ -34,3 +34,67 @@ class User(AbstractUser):
     @property
     def is_lawyer(self):
         return self.role == 'lawyer'
+
+
+def data_export_path(instance, filename):
+    """Generate storage path for data export archives"""
+    return f'exports/{instance.user_id}/{filename}'
+
+
+class DataExport(models.Model):
+    """GDPR export of all of a user's data, built in the background by the run_worker command"""
+    
+    STATUS_CHOICES = [
+        ('queued', _('Queued')),
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='data_exports')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    file = models.FileField(upload_to=data_export_path, blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)  # in bytes
+    counts = models.JSONField(default=dict, blank=True)  # Exported rows per entity
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = _('data export')
+        verbose_name_plural = _('data exports')
+    
+    def __str__(self):
+        return f"Data export of {self.user_id} ({self.status})"
+
+
+class DataDeletion(models.Model):
+    """GDPR deletion of all of a user's data; stored files are removed afterwards by the run_worker command"""
+    
+    STATUS_CHOICES = [
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='data_deletions')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    counts = models.JSONField(default=dict, blank=True)  # Deleted rows per entity
+    files_total = models.PositiveIntegerField(default=0)  # Files queued for removal
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('data deletion')
+        verbose_name_plural = _('data deletions')
+    
+    def __str__(self):
+        return f"Data deletion of {self.user_id} ({self.status})"
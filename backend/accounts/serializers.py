@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .models import DataExport, DataDeletion
 
 User = get_user_model()
 
@@ -46,3 +48,34 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
+
+class DataExportSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = DataExport
+        fields = [
+            'id', 'status', 'file_size', 'counts', 'error', 'download_url',
+            'created_at', 'started_at', 'finished_at', 'expires_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status != 'done' or not obj.file:
+            return None
+        url = reverse('data-export-download', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class DataDeletionSerializer(serializers.ModelSerializer):
+    files_removed = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = DataDeletion
+        fields = ['id', 'status', 'counts', 'files_total', 'files_removed', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
+    
+    def get_files_removed(self, obj):
+        """Queued files the background sweeper has already removed"""
+        return obj.files_total - obj.file_deletions.count()
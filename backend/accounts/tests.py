@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ai_agent.cache import get_analysis_cache
+from ai_agent.models import Conversation, KnowledgeBase, KnowledgeChunk, Message
+from ai_agent.services import AIService, analysis_cache_keys
+from analytics.models import AuditLog, DailyUserStats, UsageMetric
+from cases.models import Case
+from documents.models import AnalysisJob, Document, FileDeletion, StorageUsage
+from .deletion import delete_user_data
+from .models import DataDeletion, DataExport, User
 
-# Create your tests here.
+SYNCHRONOUS_EVENTS = {**settings.ANALYTICS_EVENTS, 'SYNCHRONOUS': True}
+
+PROJECT_APPS = {'accounts', 'ai_agent', 'analytics', 'cases', 'documents'}
+
+
+@override_settings(ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class DataDeletionTests(TestCase):
+    """The set-based GDPR deletion skips cascades, so it must reach every row itself"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='deleted', email='deleted@example.com', password='secret')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+
+    def create_data(self, user):
+        case = Case.objects.create(title='Case', lawyer=user)
+        document = Document.objects.create(
+            user=user,
+            case=case,
+            title='Contract',
+            file=f'documents/{user.id}/contract.pdf',
+            content_text=f'Umowa sprzedaży zawarta przez {user.username}. ' * 50,
+        )
+        Document.objects.create(user=user, title='Copy', file=document.file.name, content_text=document.content_text)
+        KnowledgeBase.objects.create(name='Contract', document=document)
+        conversation = Conversation.objects.create(user=user, case=case, title='Conversation')
+        Message.objects.create(conversation=conversation, role='user', content='Hello', document=document)
+        AnalysisJob.objects.create(document=document, user=user)
+        UsageMetric.objects.create(user=user, metric_type='ai_query')
+        AuditLog.objects.create(user=user, action='login')
+        DailyUserStats.objects.create(user=user, date=timezone.localdate())
+        StorageUsage.objects.create(user=user, bytes_used=100, files=1, scanned_at=timezone.now())
+        DataExport.objects.create(user=user, status='done', file=f'exports/{user.id}/export.zip')
+        return document
+
+    def user_relations(self):
+        """Models of this project with a foreign key to the user, except the deletion record itself"""
+        return [
+            relation for relation in User._meta.related_objects
+            if relation.related_model._meta.app_label in PROJECT_APPS and relation.related_model is not DataDeletion
+        ]
+
+    def rows_of(self, user):
+        counts = {
+            relation.related_model.__name__: relation.related_model.objects.filter(**{relation.field.name: user}).count()
+            for relation in self.user_relations()
+        }
+        counts['Message'] = Message.objects.filter(conversation__user=user).count()
+        counts['KnowledgeBase'] = KnowledgeBase.objects.filter(document__user=user).count()
+        counts['KnowledgeChunk'] = KnowledgeChunk.objects.filter(entry__document__user=user).count()
+        return counts
+
+    def test_no_rows_of_the_user_remain(self):
+        self.create_data(self.user)
+        other_document = self.create_data(self.other)
+        other_rows = self.rows_of(self.other)
+        # Every model that references the user is covered by the fixture
+        self.assertTrue(all(self.rows_of(self.user).values()), self.rows_of(self.user))
+
+        deletion = delete_user_data(self.user)
+
+        self.assertEqual(deletion.status, 'done', deletion.error)
+        self.assertEqual(set(self.rows_of(self.user).values()), {0}, self.rows_of(self.user))
+        self.assertEqual(self.rows_of(self.other), other_rows)
+        self.assertTrue(Message.objects.filter(document=other_document).exists())
+
+    def test_files_are_queued_for_the_sweeper(self):
+        self.create_data(self.user)
+        self.create_data(self.other)
+
+        deletion = delete_user_data(self.user)
+
+        names = set(FileDeletion.objects.filter(deletion=deletion).values_list('name', flat=True))
+        self.assertEqual(names, {f'documents/{self.user.id}/contract.pdf', f'exports/{self.user.id}/export.zip'})
+        self.assertEqual(deletion.files_total, 2)
+        self.assertFalse(FileDeletion.objects.exclude(deletion=deletion).exists())
+
+    def test_cached_analyses_of_the_documents_are_purged(self):
+        document = self.create_data(self.user)
+        other_document = self.create_data(self.other)
+        cache = get_analysis_cache()
+        keys = {}
+        for owner, text in [('user', document.content_text), ('other', other_document.content_text)]:
+            keys[owner] = [analysis_cache_keys([text], language, AIService.model)[0] for language in ['en', 'pl']]
+            for key in keys[owner]:
+                cache.set(key, {'content': 'Analysis', 'tokens_used': 10})
+
+        delete_user_data(self.user)
+
+        self.assertEqual([cache.get(key) for key in keys['user']], [None, None])
+        self.assertTrue(all(cache.get(key) for key in keys['other']))
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserViewSet, RegisterView
+from .views import UserViewSet, RegisterView, DataExportViewSet, DataDeletionViewSet
 from .serializers import CustomTokenObtainPairSerializer
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
+router.register(r'data-exports', DataExportViewSet, basename='data-export')
+router.register(r'data-deletions', DataDeletionViewSet, basename='data-deletion')
 
 urlpatterns = [
     # Explicit paths MUST come before router to prevent router from catching them
@@ -4,14 +4,16 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from django.http import FileResponse
 from django.utils import timezone
 from datetime import timedelta
 import json
-from .serializers import UserSerializer, UserRegistrationSerializer
+from .models import DataExport, DataDeletion
+from .serializers import UserSerializer, UserRegistrationSerializer, DataExportSerializer, DataDeletionSerializer
+from .exports import enqueue_export
+from .deletion import delete_user_data
 from analytics.models import AuditLog
-from documents.models import Document
-from cases.models import Case
-from ai_agent.models import Conversation, Message
+from analytics.events import record
 
 User = get_user_model()
 
@@ -53,86 +55,35 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            AuditLog.objects.create(
+            record(AuditLog(
                 user=user,
                 action='settings_change',
                 metadata={'updated_fields': list(request.data.keys())}
-            )
+            ))
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['post'])
     def export_data(self, request):
-        """Export all user data for GDPR compliance"""
+        """Queue an export of all user data for GDPR compliance; poll /data-exports/{id}/ for the download link"""
         user = request.user
-        
-        # Collect all user data
-        data = {
-            'user_profile': UserSerializer(user).data,
-            'documents': [],
-            'cases': [],
-            'conversations': [],
-            'audit_logs': [],
-        }
-        
-        # Documents
-        for doc in Document.objects.filter(user=user):
-            data['documents'].append({
-                'id': doc.id,
-                'title': doc.title,
-                'file_type': doc.file_type,
-                'created_at': doc.created_at.isoformat(),
-                'file_size': doc.file_size,
-            })
-        
-        # Cases
-        for case in Case.objects.filter(lawyer=user):
-            data['cases'].append({
-                'id': case.id,
-                'title': case.title,
-                'description': case.description,
-                'priority': case.priority,
-                'status': case.status,
-                'created_at': case.created_at.isoformat(),
-            })
-        
-        # Conversations
-        for conv in Conversation.objects.filter(user=user):
-            messages_data = []
-            for msg in conv.messages.all():
-                messages_data.append({
-                    'role': msg.role,
-                    'content': msg.content,
-                    'created_at': msg.created_at.isoformat(),
-                })
-            data['conversations'].append({
-                'id': conv.id,
-                'title': conv.title,
-                'language': conv.language,
-                'messages': messages_data,
-                'created_at': conv.created_at.isoformat(),
-            })
-        
-        # Audit logs
-        for log in AuditLog.objects.filter(user=user):
-            data['audit_logs'].append({
-                'action': log.action,
-                'resource_type': log.resource_type,
-                'created_at': log.created_at.isoformat(),
-            })
+        export = enqueue_export(user)
         
         # Log the export
-        AuditLog.objects.create(
+        record(AuditLog(
             user=user,
             action='data_export',
-            metadata={'exported_at': timezone.now().isoformat()}
-        )
+            resource_type='data_export',
+            resource_id=export.id,
+            metadata={'requested_at': timezone.now().isoformat()}
+        ))
         
-        return Response(data)
+        serializer = DataExportSerializer(export, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['post'])
     def delete_data(self, request):
-        """Delete all user data for GDPR compliance"""
+        """Delete all user data for GDPR compliance; poll /data-deletions/{id}/ for file removal progress"""
         user = request.user
         confirmation = request.data.get('confirmation')
         
@@ -142,21 +93,64 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete user data (in reverse order of dependencies)
-        Message.objects.filter(conversation__user=user).delete()
-        Conversation.objects.filter(user=user).delete()
-        Document.objects.filter(user=user).delete()
-        Case.objects.filter(lawyer=user).delete()
-        AuditLog.objects.filter(user=user).delete()
+        # Set-based deletion of every row in one transaction; files are removed by the worker
+        deletion = delete_user_data(user)
+        serializer = DataDeletionSerializer(deletion)
+        if deletion.status == 'failed':
+            return Response(
+                {'error': 'Data deletion failed', **serializer.data},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
         # Log the deletion
-        AuditLog.objects.create(
+        record(AuditLog(
             user=user,
             action='data_delete',
-            metadata={'deleted_at': timezone.now().isoformat()}
-        )
+            resource_type='data_deletion',
+            resource_id=deletion.id,
+            metadata={'deleted_at': timezone.now().isoformat(), 'counts': deletion.counts}
+        ))
         
         # Optionally delete the user account itself
         # user.delete()  # Uncomment if you want to delete the account too
         
-        return Response({'message': 'All user data has been deleted'})
+        return Response({'message': 'All user data has been deleted', **serializer.data})
+
+class DataExportViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status and download of GDPR data exports"""
+    serializer_class = DataExportSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return DataExport.objects.filter(user=self.request.user)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Stream the finished export archive"""
+        export = self.get_object()
+        if export.status != 'done':
+            return Response(
+                {'error': 'Export is not ready yet', 'status': export.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not export.file or export.expires_at < timezone.now():
+            return Response(
+                {'error': 'Export has expired. Request a new one.'},
+                status=status.HTTP_410_GONE
+            )
+        
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'golexai-data-export-{export.created_at.strftime("%Y%m%d")}.zip',
+            content_type='application/zip'
+        )
+
+
+class DataDeletionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress of GDPR data deletions"""
+    serializer_class = DataDeletionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return DataDeletion.objects.filter(user=self.request.user)
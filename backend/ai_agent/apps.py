@@ -5,3 +5,6 @@ class AiAgentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_agent'
     verbose_name = 'AI Agent'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
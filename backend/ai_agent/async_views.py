@@ -0,0 +1,320 @@
+"""
+Async (ASGI) versions of the LLM-bound endpoints.
+
+These views await OpenAI through AsyncOpenAI and use Django's async ORM, so a
+single ASGI worker can hold many in-flight completions. They also work under
+WSGI, but only bring a benefit when served with SERVER_MODE=asgi; the frontend
+uses them when /api/ai/health/ reports server_mode 'asgi'.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db.models.functions import Substr
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .models import Conversation, Message
+from .memory import mark_for_summary, recent_messages
+from .services import AIService, PERSONA_PROMPTS, document_context_length
+from .views import sse_event
+from cases.context import get_case_context
+from documents.jobs import enqueue_analysis
+from documents.models import Document
+from analytics.models import UsageMetric
+from analytics.events import arecord
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """Minimal async counterpart of APIView: DRF authentication and parsing, JSON responses"""
+
+    def initialize_request(self, request):
+        """Wrap the request with DRF authenticators and parsers (runs in a thread)"""
+        drf_request = Request(
+            request,
+            parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+        # Evaluate the lazy properties here so the async handlers never touch the DB through them
+        drf_request.user
+        drf_request.data
+        return drf_request
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request = await sync_to_async(self.initialize_request)(request)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+        if not request.user or not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return await super().dispatch(request, *args, **kwargs)
+
+
+def serialize_message(message):
+    from .serializers import MessageSerializer
+    return MessageSerializer(message).data
+
+
+async def save_response(conversation, response, document, metadata):
+    """Persist the assistant message and track usage"""
+    ai_message = await Message.objects.acreate(
+        conversation=conversation,
+        role='assistant',
+        content=response['content'],
+        tokens_used=response['tokens_used'],
+        document=document,
+        persona=metadata.get('persona', '')
+    )
+
+    conversation.updated_at = timezone.now()
+    await conversation.asave(update_fields=['updated_at'])
+    await sync_to_async(mark_for_summary)(conversation)
+
+    await arecord(UsageMetric(
+        user_id=conversation.user_id,
+        metric_type='ai_query',
+        value=response['tokens_used'],
+        metadata={**metadata, 'prompt_tokens': response.get('prompt_tokens', {}).get('sections')}
+    ))
+    return ai_message
+
+
+class AsyncChatView(AsyncAPIView):
+    """Async version of ChatView"""
+
+    async def post(self, request):
+        user = request.user
+        message_content = request.data.get('message', '')
+        conversation_id = request.data.get('conversation_id')
+        document_id = request.data.get('document_id')
+        persona = request.data.get('persona', 'commercial')  # commercial or personal
+        if persona not in PERSONA_PROMPTS:
+            persona = 'commercial'  # What the prompt falls back to (see AIService.get_persona_prompt)
+        use_knowledge_base = request.data.get('use_knowledge_base', False)
+        case_id = request.data.get('case_id')  # Case to assign or update
+        stream = request.query_params.get('stream') in ('1', 'true')
+
+        if not message_content:
+            return JsonResponse({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Get or create conversation
+        if conversation_id:
+            try:
+                conversation = await Conversation.objects.aget(id=conversation_id, user=user)
+                if case_id:
+                    conversation.case_id = case_id
+                    await conversation.asave(update_fields=['case', 'updated_at'])
+            except Conversation.DoesNotExist:
+                return JsonResponse({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            conversation = await Conversation.objects.acreate(
+                user=user,
+                language=user.language,
+                title=message_content[:50],
+                case_id=case_id if case_id else None
+            )
+
+        # Get document context if provided
+        document_context = None
+        document = None
+        if document_id:
+            try:
+                document = await Document.objects.defer('content_text').annotate(
+                    context_text=Substr('content_text', 1, document_context_length())
+                ).aget(id=document_id, user=user)
+                document_context = document.context_text or None
+            except Document.DoesNotExist:
+                pass
+
+        # Get case context if assigned to conversation (precomputed digest, see cases.context)
+        case_context = None
+        if conversation.case_id:
+            case_context = await sync_to_async(get_case_context)(conversation.case_id, user)
+
+        user_message = await Message.objects.acreate(
+            conversation=conversation,
+            role='user',
+            content=message_content,
+            document=document,
+            persona=persona
+        )
+
+        # Recent messages verbatim; older ones are covered by the conversation summary
+        messages = await sync_to_async(recent_messages)(conversation, exclude_id=user_message.id)
+        messages.append({"role": "user", "content": message_content})
+
+        try:
+            ai_service = AIService()
+        except Exception as e:
+            logger.error(f"AI Service Init Error: {str(e)}")
+            return JsonResponse(
+                {'error': f"AI service initialization failed: {str(e)}"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        completion_kwargs = {
+            'messages': messages,
+            'language': user.language,
+            'persona': persona,
+            'use_knowledge_base': use_knowledge_base,
+            'document_context': document_context,
+            'case_context': case_context,
+            'conversation_summary': conversation.summary,
+        }
+        metadata = {'conversation_id': conversation.id, 'persona': persona}
+
+        if stream:
+            response = StreamingHttpResponse(
+                self.stream_events(ai_service, completion_kwargs, conversation, user_message, document, metadata),
+                content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+            return response
+
+        try:
+            response = await ai_service.achat_completion(**completion_kwargs)
+            ai_message = await save_response(conversation, response, document, metadata)
+            return JsonResponse({
+                'conversation_id': conversation.id,
+                'message': await sync_to_async(serialize_message)(ai_message),
+                'user_message': await sync_to_async(serialize_message)(user_message),
+            })
+        except Exception as e:
+            logger.error(f"AI Chat Completion Error: {str(e)}")
+            return JsonResponse(
+                {'error': str(e), 'error_type': type(e).__name__},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def stream_events(self, ai_service, completion_kwargs, conversation, user_message, document, metadata):
+        """Forward completion deltas as server-sent events"""
+        user_message_data = await sync_to_async(serialize_message)(user_message)
+        yield sse_event('start', {
+            'conversation_id': conversation.id,
+            'user_message': user_message_data,
+        })
+
+        try:
+            async for event in ai_service.astream_chat_completion(**completion_kwargs):
+                if event['type'] == 'delta':
+                    yield sse_event('delta', {'content': event['content']})
+                    continue
+
+                ai_message = await save_response(conversation, event, document, metadata)
+                yield sse_event('done', {
+                    'conversation_id': conversation.id,
+                    'message': await sync_to_async(serialize_message)(ai_message),
+                    'user_message': user_message_data,
+                })
+        except Exception as e:
+            logger.error(f"AI Chat Stream Error: {str(e)}")
+            yield sse_event('error', {
+                'error': str(e),
+                'error_type': type(e).__name__,
+            })
+
+
+class AsyncRegenerateView(AsyncAPIView):
+    """Async version of RegenerateView"""
+
+    async def post(self, request):
+        message_id = request.data.get('message_id')
+        additional_instructions = request.data.get('instructions', '')
+
+        if not message_id:
+            return JsonResponse({'error': 'Message ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ai_message = await Message.objects.select_related('conversation', 'document').aget(
+                id=message_id,
+                role='assistant',
+                conversation__user=request.user
+            )
+        except Message.DoesNotExist:
+            return JsonResponse({'error': 'Message not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        user_message = await Message.objects.filter(
+            conversation_id=ai_message.conversation_id,
+            role='user',
+            created_at__lt=ai_message.created_at
+        ).order_by('-created_at').afirst()
+
+        if not user_message:
+            return JsonResponse({'error': 'Original user message not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            ai_service = AIService()
+            response = await ai_service.aregenerate_response(
+                original_message=user_message.content,
+                previous_response=ai_message.content,
+                additional_instructions=additional_instructions,
+                language=request.user.language
+            )
+
+            new_ai_message = await Message.objects.acreate(
+                conversation_id=ai_message.conversation_id,
+                role='assistant',
+                content=response['content'],
+                tokens_used=response['tokens_used'],
+                document=ai_message.document,
+                persona=ai_message.persona
+            )
+
+            await arecord(UsageMetric(
+                user=request.user,
+                metric_type='ai_query',
+                value=response['tokens_used'],
+                metadata={
+                    'conversation_id': ai_message.conversation_id,
+                    'regeneration': True
+                }
+            ))
+
+            return JsonResponse({
+                'message': await sync_to_async(serialize_message)(new_ai_message),
+            })
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncDocumentAnalyzeView(AsyncAPIView):
+    """Async version of DocumentViewSet.analyze: queues the analysis for the worker"""
+
+    async def post(self, request, pk):
+        try:
+            document = await Document.objects.aget(id=pk, user=request.user)
+        except Document.DoesNotExist:
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if document.extraction_status in ['pending', 'running']:
+            return JsonResponse(
+                {'error': 'Text extraction is still in progress'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not document.content_text:
+            return JsonResponse(
+                {'error': 'Document has no extractable text'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = await sync_to_async(enqueue_analysis)(document, language=request.user.language)
+
+        return JsonResponse({
+            'job_id': job.id,
+            'status': job.status,
+            'document_id': document.id
+        }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,157 @@
+"""
+Response cache for AI document analysis.
+
+AIService.analyze_document looks results up by a key built from the document
+text, the language, the active prompt versions and the model, so a repeat
+analysis costs no tokens. Backends share a small get/set/delete/contains/clear
+interface:
+
+- MemoryLRUCache: bounded, per-process LRU with TTL
+- DatabaseCache: AnalysisCacheEntry rows shared by every process
+- TieredCache: memory first, then database, filling the memory tier on a hit
+
+A memory hit is only served while the database still holds the key, so entries
+deleted in another process (a prompt change or a GDPR deletion, see
+accounts.deletion) are not served from this one.
+"""
+
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+import threading
+import time
+
+
+class MemoryLRUCache:
+    """Bounded in-process LRU cache with TTL eviction"""
+    
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def contains(self, key):
+        return self.get(key) is not None
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatabaseCache:
+    """Cache tier stored in AnalysisCacheEntry rows, shared across processes"""
+    
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+    
+    def get(self, key):
+        from .models import AnalysisCacheEntry
+        entry = AnalysisCacheEntry.objects.filter(key=key).first()
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at < timezone.now():
+            entry.delete()
+            return None
+        return {'content': entry.content, 'tokens_used': entry.tokens_used}
+    
+    def set(self, key, value):
+        from .models import AnalysisCacheEntry
+        expires_at = timezone.now() + timedelta(seconds=self.ttl) if self.ttl else None
+        AnalysisCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'content': value['content'],
+                'tokens_used': value['tokens_used'],
+                'expires_at': expires_at,
+            }
+        )
+    
+    def delete(self, key):
+        from .models import AnalysisCacheEntry
+        AnalysisCacheEntry.objects.filter(key=key).delete()
+    
+    def contains(self, key):
+        from .models import AnalysisCacheEntry
+        return AnalysisCacheEntry.objects.filter(key=key).exclude(expires_at__lt=timezone.now()).exists()
+    
+    def clear(self):
+        from .models import AnalysisCacheEntry
+        AnalysisCacheEntry.objects.all().delete()
+
+
+class TieredCache:
+    """Look up each tier in order; a hit in a slower tier fills the faster ones"""
+    
+    def __init__(self, *tiers):
+        self.tiers = tiers
+    
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is None:
+                continue
+            # Deleted from a slower, shared tier by another process
+            if not all(slower.contains(key) for slower in self.tiers[index + 1:]):
+                tier.delete(key)
+                return None
+            for faster in self.tiers[:index]:
+                faster.set(key, value)
+            return value
+        return None
+    
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+    
+    def delete(self, key):
+        for tier in self.tiers:
+            tier.delete(key)
+    
+    def contains(self, key):
+        return self.tiers[-1].contains(key)
+    
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+
+_analysis_cache = None
+
+
+def get_analysis_cache():
+    """Process-wide analysis cache configured by settings.AI_ANALYSIS_CACHE"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        config = settings.AI_ANALYSIS_CACHE
+        memory = MemoryLRUCache(max_entries=config['MAX_ENTRIES'], ttl=config['TTL'])
+        if config['DATABASE']:
+            _analysis_cache = TieredCache(memory, DatabaseCache(ttl=config['TTL']))
+        else:
+            _analysis_cache = memory
+    return _analysis_cache
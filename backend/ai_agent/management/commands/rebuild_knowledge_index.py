@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ai_agent.retrieval import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Re-chunk every knowledge base entry for retrieval (embeddings are added by run_worker)'
+    
+    def handle(self, *args, **options):
+        count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} knowledge base entries'))
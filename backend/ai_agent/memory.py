@@ -0,0 +1,115 @@
+"""
+Incremental conversation memory.
+
+Each chat turn sends the running summary stored on the Conversation plus a
+sliding window of the most recent messages, so the prompt size no longer grows
+with the length of the conversation. Once enough messages have fallen out of
+the window, the conversation is flagged and the background worker folds them
+into the summary.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+from .models import Conversation, Message
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MESSAGE_CHARS = 2000  # Per message, when folding into the summary
+
+
+def get_memory_settings():
+    memory = getattr(settings, 'AI_CONVERSATION_MEMORY', {})
+    return memory.get('WINDOW', 6), memory.get('SUMMARIZE_EVERY', 6)
+
+
+def unsummarized_messages(conversation):
+    """Messages not yet folded into the conversation summary"""
+    messages = Message.objects.filter(conversation=conversation)
+    if conversation.summarized_until:
+        # Keyset on (created_at, id), so messages sharing the watermark's timestamp are not skipped
+        messages = messages.filter(
+            Q(created_at__gt=conversation.summarized_until)
+            | Q(created_at=conversation.summarized_until, id__gt=conversation.summarized_until_id or 0)
+        )
+    return messages
+
+
+def recent_messages(conversation, exclude_id=None):
+    """The sliding window of recent messages, oldest first, as chat message dicts"""
+    window, _ = get_memory_settings()
+    messages = unsummarized_messages(conversation)
+    if exclude_id:
+        messages = messages.exclude(id=exclude_id)
+    latest = messages.order_by('-created_at', '-id').only('role', 'content')[:window]
+    return [{"role": msg.role, "content": msg.content} for msg in reversed(latest)]
+
+
+def mark_for_summary(conversation):
+    """Flag the conversation once SUMMARIZE_EVERY messages have left the window"""
+    window, every = get_memory_settings()
+    if unsummarized_messages(conversation).count() >= window + every:
+        Conversation.objects.filter(pk=conversation.pk, summary_pending=False).update(summary_pending=True)
+        return True
+    return False
+
+
+def summarize_conversation(conversation, ai_service=None):
+    """Fold every unsummarized message outside the window into the summary"""
+    from analytics.events import record
+    from analytics.models import UsageMetric
+    from .services import AIService
+
+    window, _ = get_memory_settings()
+    messages = list(unsummarized_messages(conversation).order_by('created_at', 'id'))
+    to_fold = messages[:-window] if window else messages
+    if not to_fold:
+        return conversation
+
+    ai_service = ai_service or AIService()
+    result = ai_service.summarize_conversation(
+        conversation.summary,
+        [{"role": msg.role, "content": msg.content[:SUMMARY_MESSAGE_CHARS]} for msg in to_fold],
+        language=conversation.language
+    )
+
+    conversation.summary = result['content']
+    conversation.summarized_until = to_fold[-1].created_at
+    conversation.summarized_until_id = to_fold[-1].id
+    # Only touch the memory fields so a concurrent chat turn is not overwritten
+    conversation.save(update_fields=['summary', 'summarized_until', 'summarized_until_id'])
+
+    record(UsageMetric(
+        user_id=conversation.user_id,
+        metric_type='ai_query',
+        value=result['tokens_used'],
+        metadata={'conversation_id': conversation.id, 'summary': True}
+    ))
+    return conversation
+
+
+def claim_next_summary():
+    """Atomically take the next conversation flagged for summarization"""
+    while True:
+        conversation = Conversation.objects.filter(summary_pending=True).order_by('updated_at').first()
+        if conversation is None:
+            return None
+
+        if Conversation.objects.filter(pk=conversation.pk, summary_pending=True).update(summary_pending=False):
+            conversation.summary_pending = False
+            return conversation
+        # Another worker took it first; try the next one
+
+
+def process_next_summary():
+    """Summarize one flagged conversation. Returns True if one was processed."""
+    conversation = claim_next_summary()
+    if conversation is None:
+        return False
+
+    try:
+        summarize_conversation(conversation)
+    except Exception as e:
+        # The recent window still bounds the prompt; retry on the next turn
+        logger.error(f"Conversation {conversation.id} summary failed: {str(e)}")
+    return True
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0002_conversation_case"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalysisCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("content", models.TextField()),
+                ("tokens_used", models.PositiveIntegerField(default=0)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "analysis cache entry",
+                "verbose_name_plural": "analysis cache entries",
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def chunk_text(text, size=1000, overlap=150):
+    # Frozen copy of ai_agent.retrieval.chunk_text as of this migration
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            window = text[start:end]
+            cut = max(window.rfind("\n\n"), window.rfind(". "))
+            if cut > size // 2:
+                end = start + cut + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def chunk_existing_entries(apps, schema_editor):
+    KnowledgeBase = apps.get_model("ai_agent", "KnowledgeBase")
+    KnowledgeChunk = apps.get_model("ai_agent", "KnowledgeChunk")
+    for entry in KnowledgeBase.objects.select_related("document").iterator():
+        KnowledgeChunk.objects.bulk_create(
+            [
+                KnowledgeChunk(entry=entry, position=position, text=chunk)
+                for position, chunk in enumerate(
+                    chunk_text(entry.document.content_text or "")
+                )
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0003_analysiscacheentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KnowledgeChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("text", models.TextField()),
+                ("embedding", models.JSONField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="ai_agent.knowledgebase",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "knowledge chunk",
+                "verbose_name_plural": "knowledge chunks",
+                "ordering": ["entry", "position"],
+            },
+        ),
+        migrations.RunPython(chunk_existing_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0004_knowledgechunk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="summarized_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="summary",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="summary_pending",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:55
+
+from django.db import migrations, models
+
+# Kept in sync with ai_agent.search; the text is capped because a tsvector cannot exceed 1MB
+POSTGRES_VECTOR = "to_tsvector('simple'::regconfig, left(coalesce({row}content, ''), 500000))"
+POSTGRES_FORWARD = [
+    "ALTER TABLE ai_agent_message ADD COLUMN search_vector tsvector",
+    f"""
+    CREATE FUNCTION ai_agent_message_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRES_VECTOR.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ai_agent_message_search_vector_update
+    BEFORE INSERT OR UPDATE OF content ON ai_agent_message
+    FOR EACH ROW EXECUTE PROCEDURE ai_agent_message_search_vector()
+    """,
+    f"UPDATE ai_agent_message SET search_vector = {POSTGRES_VECTOR.format(row='')}",
+    "CREATE INDEX ai_agent_message_search_idx ON ai_agent_message USING gin (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS ai_agent_message_search_idx",
+    "DROP TRIGGER IF EXISTS ai_agent_message_search_vector_update ON ai_agent_message",
+    "DROP FUNCTION IF EXISTS ai_agent_message_search_vector()",
+    "ALTER TABLE ai_agent_message DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE ai_agent_message_fts USING fts5(
+        content,
+        content='ai_agent_message', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER ai_agent_message_fts_insert AFTER INSERT ON ai_agent_message BEGIN
+        INSERT INTO ai_agent_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER ai_agent_message_fts_delete AFTER DELETE ON ai_agent_message BEGIN
+        INSERT INTO ai_agent_message_fts(ai_agent_message_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER ai_agent_message_fts_update AFTER UPDATE OF content ON ai_agent_message BEGIN
+        INSERT INTO ai_agent_message_fts(ai_agent_message_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO ai_agent_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO ai_agent_message_fts(ai_agent_message_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS ai_agent_message_fts_insert",
+    "DROP TRIGGER IF EXISTS ai_agent_message_fts_delete",
+    "DROP TRIGGER IF EXISTS ai_agent_message_fts_update",
+    "DROP TABLE IF EXISTS ai_agent_message_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    "sqlite": (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def create_search_index(apps, schema_editor):
+    forward, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in forward:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    _, backward = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in backward:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0005_conversation_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="persona",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0006_message_search"),
+        ("cases", "0003_list_indexes"),
+        ("documents", "0010_list_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="conversation_user_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                condition=models.Q(("summary_pending", True)),
+                fields=["updated_at"],
+                name="conversation_summary_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "created_at", "id"],
+                name="message_conv_created_idx",
+            ),
+        ),
+        # The composite indexes lead with these foreign keys, so their own indexes are
+        # dropped. Not AlterField: SQLite would rebuild the tables and lose the search triggers.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "DROP INDEX ai_agent_conversation_user_id_452560cb",
+                    'CREATE INDEX ai_agent_conversation_user_id_452560cb ON ai_agent_conversation ("user_id")',
+                ),
+                migrations.RunSQL(
+                    "DROP INDEX ai_agent_message_conversation_id_8ba7f5f6",
+                    'CREATE INDEX ai_agent_message_conversation_id_8ba7f5f6 ON ai_agent_message ("conversation_id")',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="conversation",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="message",
+                    name="conversation",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="messages",
+                        to="ai_agent.conversation",
+                    ),
+                ),
+            ],
+        ),
+    ]
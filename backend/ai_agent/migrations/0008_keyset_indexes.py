@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0007_list_indexes"),
+        ("cases", "0003_list_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "-created_at"], name="conversation_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Uses the diacritic-folding configuration created by documents migration 0012
+VECTOR = "to_tsvector('{config}'::regconfig, left(coalesce({row}content, ''), 500000))"
+FUNCTION = """
+    CREATE OR REPLACE FUNCTION ai_agent_message_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {vector};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+
+def reindex(config):
+    return [
+        FUNCTION.format(vector=VECTOR.format(config=config, row="NEW.")),
+        f"UPDATE ai_agent_message SET search_vector = {VECTOR.format(config=config, row='')}",
+    ]
+
+
+def fold_diacritics(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in reindex("golexai_search"):
+            schema_editor.execute(statement)
+
+
+def keep_diacritics(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in reindex("simple"):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0008_keyset_indexes"),
+        ("documents", "0012_search_unaccent"),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_diacritics, keep_diacritics),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:38
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def backfill_watermark_ids(apps, schema_editor):
+    """Point existing watermarks at the last message with the watermark's timestamp"""
+    Conversation = apps.get_model("ai_agent", "Conversation")
+    Message = apps.get_model("ai_agent", "Message")
+    last_id = (
+        Message.objects.filter(conversation=OuterRef("pk"), created_at=OuterRef("summarized_until"))
+        .order_by()
+        .values("conversation")
+        .annotate(last_id=Max("id"))
+        .values("last_id")
+    )
+    Conversation.objects.filter(summarized_until__isnull=False).update(summarized_until_id=Subquery(last_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_agent", "0009_search_unaccent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="summarized_until_id",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_watermark_ids, migrations.RunPython.noop),
+    ]
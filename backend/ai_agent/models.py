@@ -29,15 +29,30 @@ class Prompt(models.Model):
 class Conversation(models.Model):
     """AI Conversation history"""
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations', db_index=False)  # Leads the Meta indexes
     case = models.ForeignKey('cases.Case', on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations')
     title = models.CharField(max_length=255, blank=True)
     language = models.CharField(max_length=2, choices=[('en', 'English'), ('pl', 'Polish')], default='pl')
+    # Running summary of the messages older than the recent window (see ai_agent.memory)
+    summary = models.TextField(blank=True)
+    summarized_until = models.DateTimeField(null=True, blank=True)  # created_at of the last summarized message
+    summarized_until_id = models.PositiveBigIntegerField(null=True, blank=True)  # and its id, for ties on created_at
+    summary_pending = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='conversation_user_updated_idx'),
+            models.Index(fields=['user', '-created_at'], name='conversation_user_created_idx'),  # Keyset pages
+            # Only the queue of conversations waiting for the summary worker (see ai_agent.memory)
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(summary_pending=True),
+                name='conversation_summary_idx'
+            ),
+        ]
         verbose_name = _('conversation')
         verbose_name_plural = _('conversations')
     
@@ -54,15 +69,19 @@ class Message(models.Model):
         ('system', _('System')),
     ]
     
-    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages', db_index=False)  # Leads the Meta index
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     content = models.TextField()
     document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='messages')
+    persona = models.CharField(max_length=20, blank=True)  # AI persona the exchange was made with
     tokens_used = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='message_conv_created_idx'),
+        ]
         verbose_name = _('message')
         verbose_name_plural = _('messages')
     
@@ -87,3 +106,38 @@ class KnowledgeBase(models.Model):
     
     def __str__(self):
         return self.name
+
+
+class AnalysisCacheEntry(models.Model):
+    """Cached AI document analysis, shared by every process (see ai_agent.cache)"""
+    
+    key = models.CharField(max_length=64, unique=True)
+    content = models.TextField()
+    tokens_used = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('analysis cache entry')
+        verbose_name_plural = _('analysis cache entries')
+    
+    def __str__(self):
+        return self.key
+
+
+class KnowledgeChunk(models.Model):
+    """Retrieval unit of a knowledge base entry (see ai_agent.retrieval)"""
+    
+    entry = models.ForeignKey(KnowledgeBase, on_delete=models.CASCADE, related_name='chunks')
+    position = models.PositiveIntegerField()
+    text = models.TextField()
+    embedding = models.JSONField(null=True, blank=True)  # Optional embedding vector
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['entry', 'position']
+        verbose_name = _('knowledge chunk')
+        verbose_name_plural = _('knowledge chunks')
+    
+    def __str__(self):
+        return f"{self.entry.name} #{self.position}"
@@ -0,0 +1,166 @@
+"""
+Token-budget-aware prompt assembly for chat completions.
+
+The system prompt (persona plus knowledge base, case and document context) and
+the conversation history are fitted into the model context window minus a
+reserve for the completion. Each context section has its own cap; if the whole
+prompt still does not fit, the lowest-priority parts are trimmed first. Every
+assembly returns a report with the final token breakdown.
+
+Tokens are counted with tiktoken (in requirements; it downloads the encoding
+on first use). If it is unavailable they are estimated from the character
+count at CHARS_PER_TOKEN, which is at or below the real ratio for Polish text
+(about 2.5-3 characters per token with cl100k) so that estimates over-count
+rather than overrun the context window.
+"""
+
+from functools import lru_cache
+import math
+
+CHARS_PER_TOKEN = 2.5  # Low enough to over-count Polish legal text
+TOKENS_PER_MESSAGE = 4  # Chat format overhead per message
+TOKENS_PER_REPLY = 3  # Priming of the assistant reply
+
+
+class Tokenizer:
+    """Counts and truncates tokens with tiktoken, or estimates them"""
+
+    def __init__(self, model):
+        try:
+            import tiktoken
+            self.encoding = tiktoken.encoding_for_model(model)
+        except Exception:
+            self.encoding = None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def truncate(self, text, max_tokens):
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        return text[:int(max_tokens * CHARS_PER_TOKEN)]
+
+
+def context_chars(max_tokens):
+    """Characters that hold more than max_tokens of any text, to cut context before counting"""
+    return int(max_tokens * CHARS_PER_TOKEN * 2)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model):
+    return Tokenizer(model)
+
+
+class PromptSection:
+    """A block of context appended to the system prompt under a heading"""
+
+    def __init__(self, name, heading, text, priority):
+        self.name = name
+        self.heading = heading
+        self.text = text or ''
+        self.priority = priority  # Lower priorities are trimmed first
+
+
+class PromptAssembler:
+    """Fits the system prompt sections and history into a token budget"""
+
+    HISTORY_PRIORITY = 10
+
+    def __init__(self, model, context_window, completion_reserve, section_limits=None):
+        self.tokenizer = get_tokenizer(model)
+        self.budget = context_window - completion_reserve
+        self.section_limits = section_limits or {}
+
+    def message_tokens(self, message):
+        return TOKENS_PER_MESSAGE + self.tokenizer.count(message['content'])
+
+    def section_tokens(self, section):
+        if not section.text:
+            return 0
+        return self.tokenizer.count(f"\n\n**{section.heading}:**\n{section.text}")
+
+    def assemble(self, system_prompt, sections, messages):
+        """Build the message list.
+
+        system_prompt is never trimmed, nor is the last message (the current
+        request). Earlier messages are history and are dropped oldest first.
+        Returns (messages, report).
+        """
+        history, current = list(messages[:-1]), list(messages[-1:])
+        trimmed = []
+
+        # Per-section caps
+        for section in sections:
+            limit = self.section_limits.get(section.name)
+            if limit is not None and self.tokenizer.count(section.text) > limit:
+                section.text = self.tokenizer.truncate(section.text, limit)
+                trimmed.append(section.name)
+
+        fixed = (
+            TOKENS_PER_REPLY
+            + TOKENS_PER_MESSAGE + self.tokenizer.count(system_prompt)
+            + sum(self.message_tokens(message) for message in current)
+        )
+        history_limit = self.section_limits.get('history')
+
+        def total():
+            return (
+                fixed
+                + sum(self.section_tokens(section) for section in sections)
+                + sum(self.message_tokens(message) for message in history)
+            )
+
+        def drop_history(limit):
+            while history and sum(self.message_tokens(message) for message in history) > limit:
+                history.pop(0)
+                if 'history' not in trimmed:
+                    trimmed.append('history')
+
+        if history_limit is not None:
+            drop_history(history_limit)
+
+        # Trim lowest-priority parts first until the prompt fits
+        parts = sorted(
+            sections + ['history'],
+            key=lambda part: self.HISTORY_PRIORITY if part == 'history' else part.priority
+        )
+        for part in parts:
+            overflow = total() - self.budget
+            if overflow <= 0:
+                break
+            if part == 'history':
+                history_tokens = sum(self.message_tokens(message) for message in history)
+                drop_history(history_tokens - overflow)
+            elif part.text:
+                keep = self.tokenizer.count(part.text) - overflow
+                part.text = self.tokenizer.truncate(part.text, keep)
+                if part.name not in trimmed:
+                    trimmed.append(part.name)
+
+        content = system_prompt
+        for section in sections:
+            if section.text:
+                content += f"\n\n**{section.heading}:**\n{section.text}"
+
+        report = {
+            'sections': {
+                'system': self.tokenizer.count(system_prompt),
+                **{section.name: self.section_tokens(section) for section in sections},
+                'history': sum(self.message_tokens(message) for message in history),
+                'message': sum(self.message_tokens(message) for message in current),
+            },
+            'history_messages': len(history),
+            'total': total(),
+            'budget': self.budget,
+            'trimmed': trimmed,
+            'estimated': self.tokenizer.encoding is None,
+        }
+        return [{"role": "system", "content": content}] + history + current, report
@@ -0,0 +1,226 @@
+"""
+Retrieval index over the knowledge base.
+
+Each active KnowledgeBase entry is split into overlapping KnowledgeChunk rows.
+Chat pulls only the top-k chunks for the current question: BM25 scores
+computed with NumPy over an in-process inverted index, fused with cosine
+similarity over embedding vectors when KNOWLEDGE_BASE_EMBEDDINGS is enabled.
+
+The in-process index is rebuilt whenever the set of active chunks changes, an
+entry is edited or the worker embeds more chunks, which is detected with a
+single aggregate query per search. Chunk text is never edited in place: a
+re-chunked entry gets new chunk ids. Chunks without a vector yet take part in
+BM25 only.
+"""
+
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from .models import KnowledgeBase, KnowledgeChunk
+import logging
+import math
+import re
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 64
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion constant
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lowercase word tokens, ignoring single characters"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Split text into chunks of about `size` characters, preferring paragraph breaks"""
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Break at the last paragraph or sentence end inside the window
+            window = text[start:end]
+            cut = max(window.rfind('\n\n'), window.rfind('. '))
+            if cut > size // 2:
+                end = start + cut + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def index_entry(entry):
+    """Replace the chunks of a knowledge base entry with freshly split ones"""
+    text = entry.document.content_text or ''
+    with transaction.atomic():
+        KnowledgeChunk.objects.filter(entry=entry).delete()
+        KnowledgeChunk.objects.bulk_create([
+            KnowledgeChunk(entry=entry, position=position, text=chunk)
+            for position, chunk in enumerate(chunk_text(text))
+        ])
+
+
+def get_embedding_client():
+    import openai
+    return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def embed_texts(texts):
+    """Embedding vectors for a list of texts"""
+    response = get_embedding_client().embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    return [item.embedding for item in response.data]
+
+
+def embed_pending_chunks():
+    """Embed one batch of chunks without a vector. Returns True if any were embedded."""
+    if not settings.KNOWLEDGE_BASE_EMBEDDINGS:
+        return False
+    
+    chunks = list(KnowledgeChunk.objects.filter(embedding__isnull=True).only('id', 'text')[:EMBEDDING_BATCH_SIZE])
+    if not chunks:
+        return False
+    
+    try:
+        vectors = embed_texts([chunk.text for chunk in chunks])
+    except Exception as e:
+        logger.error(f"Embedding knowledge chunks failed: {str(e)}")
+        return False
+    
+    for chunk, vector in zip(chunks, vectors):
+        chunk.embedding = vector
+    KnowledgeChunk.objects.bulk_update(chunks, ['embedding'])
+    return True
+
+
+class RetrievalIndex:
+    """BM25 inverted index (plus optional embedding matrix) over a snapshot of chunks"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks  # list of (entry name, text)
+        self.postings = {}  # term -> (chunk indexes, term frequencies)
+        self.idf = {}
+        
+        lengths = np.zeros(len(chunks))
+        postings = defaultdict(lambda: ([], []))
+        for index, (_, text) in enumerate(chunks):
+            tokens = tokenize(text)
+            lengths[index] = len(tokens)
+            for term, frequency in Counter(tokens).items():
+                postings[term][0].append(index)
+                postings[term][1].append(frequency)
+        
+        count = len(chunks)
+        for term, (indexes, frequencies) in postings.items():
+            self.postings[term] = (np.array(indexes), np.array(frequencies, dtype=float))
+            df = len(indexes)
+            self.idf[term] = math.log(1 + (count - df + 0.5) / (df + 0.5))
+        
+        average_length = lengths.mean() if count else 0
+        self.length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length) if average_length else lengths
+        self.embeddings = None  # Normalized vectors of the embedded chunks
+        self.embedded = None  # Chunk index of each row of self.embeddings
+    
+    def set_embeddings(self, vectors):
+        """Attach the vectors of the chunks that have one (None for the others)"""
+        embedded = [index for index, vector in enumerate(vectors) if vector is not None]
+        if embedded:
+            matrix = np.array([vectors[index] for index in embedded], dtype=float)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.embeddings = matrix / np.where(norms == 0, 1, norms)
+            self.embedded = np.array(embedded)
+    
+    def bm25_scores(self, query):
+        scores = np.zeros(len(self.chunks))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            indexes, frequencies = self.postings[term]
+            scores[indexes] += self.idf[term] * frequencies * (BM25_K1 + 1) / (frequencies + self.length_norm[indexes])
+        return scores
+    
+    def search(self, query, top_k=5, query_embedding=None):
+        """Indexes of the top_k chunks for a query, best first"""
+        if not self.chunks:
+            return []
+        
+        scores = self.bm25_scores(query)
+        ranked = [index for index in np.argsort(-scores, kind='stable') if scores[index] > 0]
+        
+        if self.embeddings is not None and query_embedding is not None:
+            vector = np.array(query_embedding, dtype=float)
+            similarity = self.embeddings @ (vector / (np.linalg.norm(vector) or 1))
+            semantic = self.embedded[np.argsort(-similarity, kind='stable')[:max(top_k * 4, 20)]]
+            
+            # Reciprocal rank fusion of the lexical and semantic rankings
+            fused = defaultdict(float)
+            for rank, index in enumerate(ranked[:max(top_k * 4, 20)]):
+                fused[index] += 1 / (RRF_K + rank)
+            for rank, index in enumerate(semantic):
+                fused[index] += 1 / (RRF_K + rank)
+            ranked = sorted(fused, key=fused.get, reverse=True)
+        
+        return [int(index) for index in ranked[:top_k]]
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Index over active chunks, rebuilt when they or their entries change or gain embeddings"""
+    global _index, _index_version
+    
+    active_chunks = KnowledgeChunk.objects.filter(entry__is_active=True)
+    # Entry names and embeddings are changed in place, so they are versioned separately
+    version = tuple(active_chunks.aggregate(
+        count=Count('id'), last=Max('id'), edited=Max('entry__updated_at'), embedded=Count('embedding')
+    ).values())
+    if _index is not None and _index_version == version:
+        return _index
+    
+    with _index_lock:
+        if _index is None or _index_version != version:
+            rows = list(active_chunks.order_by('id').values_list('entry__name', 'text', 'embedding'))
+            index = RetrievalIndex([(name, text) for name, text, _ in rows])
+            if settings.KNOWLEDGE_BASE_EMBEDDINGS:
+                index.set_embeddings([embedding for _, _, embedding in rows])
+            _index, _index_version = index, version
+    return _index
+
+
+def search_knowledge_base(query, top_k=5):
+    """Top-k (entry name, chunk text) pairs for a query"""
+    index = get_index()
+    
+    query_embedding = None
+    if index.embeddings is not None and query.strip():
+        try:
+            query_embedding = embed_texts([query])[0]
+        except Exception as e:
+            logger.error(f"Embedding query failed, using BM25 only: {str(e)}")
+    
+    return [index.chunks[i] for i in index.search(query, top_k=top_k, query_embedding=query_embedding)]
+
+
+def rebuild_all():
+    """Re-chunk every knowledge base entry"""
+    entries = KnowledgeBase.objects.select_related('document')
+    for entry in entries.iterator(chunk_size=100):
+        index_entry(entry)
+    return entries.count()
@@ -0,0 +1,20 @@
+"""
+Full-text search over conversation messages.
+
+Same design as document search (see documents.search): a trigger-maintained
+tsvector column with a GIN index on PostgreSQL and an FTS5 table on SQLite,
+both created by migration 0006. Searches are restricted to the ids of a
+filtered message queryset, so the user, case, persona and date filters are
+applied by the ORM.
+"""
+
+from documents.search import FullTextSearch
+
+
+class MessageSearch(FullTextSearch):
+    """Ranked search over message content"""
+
+    table = 'ai_agent_message'
+    fts_table = 'ai_agent_message_fts'
+    text_fields = ['content']
+    bm25_weights = [1.0]
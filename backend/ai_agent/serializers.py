@@ -1,17 +1,44 @@
 from rest_framework import serializers
 from .models import Conversation, Message, Prompt, KnowledgeBase
+from documents.models import Document
 from documents.serializers import DocumentSerializer
 
 
+class MessageDocumentSerializer(serializers.ModelSerializer):
+    """Reference to the document attached to a message, without its text"""
+    
+    class Meta:
+        model = Document
+        fields = ['id', 'title', 'file_type', 'case']
+        read_only_fields = fields
+
+
 class MessageSerializer(serializers.ModelSerializer):
-    document = DocumentSerializer(read_only=True)
+    document = MessageDocumentSerializer(read_only=True)
     
     class Meta:
         model = Message
-        fields = ['id', 'conversation', 'role', 'content', 'document', 'tokens_used', 'created_at']
+        fields = ['id', 'conversation', 'role', 'content', 'document', 'persona', 'tokens_used', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """Search hit: where the message is, its rank and a highlighted snippet instead of the content"""
+    conversation_title = serializers.CharField(source='conversation.title', read_only=True)
+    case = serializers.IntegerField(source='conversation.case_id', read_only=True)
+    rank = serializers.FloatField(read_only=True)  # Set by ai_agent.search
+    snippet = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'conversation_title', 'case', 'role', 'persona', 'created_at', 'rank', 'snippet']
+        read_only_fields = fields
+    
+    def get_snippet(self, obj):
+        """Escaped text around the matches, with <mark> tags (see documents.search)"""
+        return self.context.get('snippets', {}).get(obj.id, '')
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     messages = MessageSerializer(many=True, read_only=True)
     message_count = serializers.IntegerField(source='messages.count', read_only=True)
@@ -22,6 +49,28 @@ class ConversationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
 
+class ConversationListSerializer(serializers.ModelSerializer):
+    """Sidebar representation: annotated message count and a last message preview"""
+    message_count = serializers.IntegerField(read_only=True)  # Annotated by ConversationViewSet
+    last_message = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Conversation
+        fields = ['id', 'user', 'case', 'title', 'language', 'message_count', 'last_message', 'created_at', 'updated_at']
+        read_only_fields = fields
+    
+    def get_last_message(self, obj):
+        # Prefetched into last_messages by ConversationViewSet
+        if not obj.last_messages:
+            return None
+        message = obj.last_messages[0]
+        return {
+            'role': message.role,
+            'preview': message.preview,
+            'created_at': serializers.DateTimeField().to_representation(message.created_at),
+        }
+
+
 class PromptSerializer(serializers.ModelSerializer):
     class Meta:
         model = Prompt
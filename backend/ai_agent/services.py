@@ -1,8 +1,18 @@
 import openai
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-from .models import Prompt, KnowledgeBase
+from .models import Prompt
+from .cache import get_analysis_cache
+from .prompting import PromptAssembler, PromptSection, context_chars
+from .retrieval import search_knowledge_base
 from documents.models import Document
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_TEXT_CHARS = 4000  # Leading characters of a document that are analyzed
 
 
 # Persona system prompts
@@ -121,43 +131,94 @@ Zawsze przypominaj użytkownikom o przeglądzie dokumentów z licencjonowanym pr
 }
 
 
+def get_active_prompt_record(prompt_name, language='pl'):
+    """Get the active Prompt row for a name, or None"""
+    try:
+        return Prompt.objects.filter(
+            name=prompt_name,
+            language=language,
+            is_active=True
+        ).latest('version')
+    except Prompt.DoesNotExist:
+        return None
+
+
+def analysis_cache_keys(document_texts, language, model):
+    """Analysis cache keys of several texts, looking the active prompt versions up once"""
+    versions = []
+    for prompt_name in ['document_analysis', 'system']:
+        prompt = get_active_prompt_record(prompt_name, language)
+        versions.append(f"{prompt.id}:{prompt.version}:{prompt.updated_at.timestamp()}" if prompt else 'default')
+    
+    keys = []
+    for document_text in document_texts:
+        text_hash = hashlib.sha256(document_text[:ANALYSIS_TEXT_CHARS].encode('utf-8')).hexdigest()
+        raw_key = '|'.join([text_hash, language, *versions, model])
+        keys.append(hashlib.sha256(raw_key.encode('utf-8')).hexdigest())
+    return keys
+
+
+def document_context_length():
+    """Characters of document text to load for chat; the assembler trims them to the exact cap"""
+    budget = getattr(settings, 'AI_PROMPT_BUDGET', {})
+    limit = (budget.get('SECTIONS') or {}).get('document') or budget.get('CONTEXT_WINDOW', 8192)
+    return context_chars(limit)
+
+
 class AIService:
     """Service for interacting with OpenAI GPT API"""
     
-    def __init__(self):
+    model = "gpt-4"
+    
+    def __init__(self, cache=None):
         api_key = getattr(settings, 'OPENAI_API_KEY', None)
         if not api_key:
             raise Exception("OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
         self.client = openai.OpenAI(api_key=api_key)
+        self.async_client = openai.AsyncOpenAI(api_key=api_key)
+        self.cache = cache if cache is not None else get_analysis_cache()
+    
+    def get_active_prompt_record(self, prompt_name, language='pl'):
+        """Get the active Prompt row for a name, or None"""
+        return get_active_prompt_record(prompt_name, language)
     
     def get_active_prompt(self, prompt_name, language='pl'):
         """Get the active version of a prompt"""
-        try:
-            prompt = Prompt.objects.filter(
-                name=prompt_name,
-                language=language,
-                is_active=True
-            ).latest('version')
-            return prompt.prompt_text
-        except Prompt.DoesNotExist:
-            return None
+        prompt = self.get_active_prompt_record(prompt_name, language)
+        return prompt.prompt_text if prompt else None
+    
+    def analysis_cache_key(self, document_text, language='pl'):
+        """Cache key for an analysis: text hash, language, active prompt versions and model"""
+        return analysis_cache_keys([document_text], language, self.model)[0]
     
     def get_persona_prompt(self, persona='commercial', language='pl'):
         """Get the system prompt for a specific persona"""
         persona_prompts = PERSONA_PROMPTS.get(persona, PERSONA_PROMPTS['commercial'])
         return persona_prompts.get(language, persona_prompts.get('en'))
     
-    def get_knowledge_base_context(self, max_documents=5):
-        """Get context from knowledge base"""
-        kb_entries = KnowledgeBase.objects.filter(is_active=True)[:max_documents]
-        context_parts = []
-        for entry in kb_entries:
-            if entry.document.content_text:
-                context_parts.append(f"Document: {entry.name}\n{entry.document.content_text[:1000]}")
-        return "\n\n".join(context_parts)
+    def get_knowledge_base_context(self, query, max_chunks=5):
+        """Get the knowledge base passages most relevant to the query"""
+        results = search_knowledge_base(query, top_k=max_chunks)
+        return "\n\n".join(f"Document: {name}\n{text}" for name, text in results)
     
-    def chat_completion(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None):
-        """Generate chat completion with GPT"""
+    def get_prompt_assembler(self):
+        """Prompt assembler configured from settings.AI_PROMPT_BUDGET"""
+        budget = getattr(settings, 'AI_PROMPT_BUDGET', {})
+        return PromptAssembler(
+            self.model,
+            context_window=budget.get('CONTEXT_WINDOW', 8192),
+            completion_reserve=budget.get('COMPLETION_RESERVE', 2048),
+            section_limits=budget.get('SECTIONS'),
+        )
+    
+    def assemble_messages(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Build the message list sent to GPT within the token budget.
+        
+        Returns (messages, report) where report is the token breakdown per
+        section. When the prompt does not fit, the oldest history is dropped
+        first, then the knowledge base, case, summary and document context are
+        trimmed.
+        """
         # Get persona-specific system prompt
         system_prompt = self.get_persona_prompt(persona, language)
         
@@ -167,27 +228,123 @@ class AIService:
             system_prompt = custom_prompt
         
         # Add knowledge base context if requested
+        kb_context = None
         if use_knowledge_base:
-            kb_context = self.get_knowledge_base_context()
-            if kb_context:
-                system_prompt += f"\n\n**Knowledge Base Reference:**\n{kb_context}"
+            query = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+            kb_context = self.get_knowledge_base_context(query)
         
-        # Add case context if provided
-        if case_context:
-            system_prompt += f"\n\n**Case Context:**\n{case_context}"
+        sections = [
+            PromptSection('summary', 'Earlier Conversation Summary', conversation_summary, priority=40),
+            PromptSection('knowledge_base', 'Knowledge Base Reference', kb_context, priority=20),
+            PromptSection('case', 'Case Context', case_context, priority=30),
+            PromptSection('document', 'Document Context', document_context, priority=50),
+        ]
+        formatted_messages, report = self.get_prompt_assembler().assemble(system_prompt, sections, messages)
+        logger.info(f"Prompt tokens: {report['total']}/{report['budget']} {report['sections']} trimmed={report['trimmed']}")
+        return formatted_messages, report
+    
+    def build_messages(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Build the message list sent to GPT, including the system prompt"""
+        formatted_messages, report = self.assemble_messages(
+            messages,
+            language=language,
+            persona=persona,
+            use_knowledge_base=use_knowledge_base,
+            document_context=document_context,
+            case_context=case_context,
+            conversation_summary=conversation_summary
+        )
+        return formatted_messages
+    
+    def chat_completion(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Generate chat completion with GPT"""
+        formatted_messages, prompt_report = self.assemble_messages(
+            messages,
+            language=language,
+            persona=persona,
+            use_knowledge_base=use_knowledge_base,
+            document_context=document_context,
+            case_context=case_context,
+            conversation_summary=conversation_summary
+        )
         
-        # Add document context if provided
-        if document_context:
-            system_prompt += f"\n\n**Document Context:**\n{document_context}"
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=formatted_messages,
+                temperature=0.7,
+            )
+            
+            return {
+                'content': response.choices[0].message.content,
+                'tokens_used': response.usage.total_tokens,
+                'prompt_tokens': prompt_report,
+            }
+        except Exception as e:
+            raise Exception(f"AI API Error: {str(e)}")
+    
+    def stream_chat_completion(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Stream a chat completion from GPT.
         
-        # Prepare messages
-        formatted_messages = [
-            {"role": "system", "content": system_prompt}
-        ] + messages
+        Yields {'type': 'delta', 'content': ...} for every content fragment and
+        a final {'type': 'done', 'content': ..., 'tokens_used': ...,
+        'prompt_tokens': ...} once the stream closes.
+        """
+        formatted_messages, prompt_report = self.assemble_messages(
+            messages,
+            language=language,
+            persona=persona,
+            use_knowledge_base=use_knowledge_base,
+            document_context=document_context,
+            case_context=case_context,
+            conversation_summary=conversation_summary
+        )
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=formatted_messages,
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            
+            content_parts = []
+            tokens_used = 0
+            for chunk in stream:
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    content_parts.append(delta)
+                    yield {'type': 'delta', 'content': delta}
+            
+            yield {
+                'type': 'done',
+                'content': ''.join(content_parts),
+                'tokens_used': tokens_used,
+                'prompt_tokens': prompt_report,
+            }
+        except Exception as e:
+            raise Exception(f"AI API Error: {str(e)}")
+    
+    async def achat_completion(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Async version of chat_completion using AsyncOpenAI"""
+        formatted_messages, prompt_report = await sync_to_async(self.assemble_messages)(
+            messages,
+            language=language,
+            persona=persona,
+            use_knowledge_base=use_knowledge_base,
+            document_context=document_context,
+            case_context=case_context,
+            conversation_summary=conversation_summary
+        )
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
                 messages=formatted_messages,
                 temperature=0.7,
             )
@@ -195,12 +352,91 @@ class AIService:
             return {
                 'content': response.choices[0].message.content,
                 'tokens_used': response.usage.total_tokens,
+                'prompt_tokens': prompt_report,
             }
         except Exception as e:
             raise Exception(f"AI API Error: {str(e)}")
     
-    def analyze_document(self, document_text, language='pl'):
-        """Analyze a document and provide insights"""
+    async def astream_chat_completion(self, messages, language='pl', persona='commercial', use_knowledge_base=False, document_context=None, case_context=None, conversation_summary=None):
+        """Async version of stream_chat_completion using AsyncOpenAI"""
+        formatted_messages, prompt_report = await sync_to_async(self.assemble_messages)(
+            messages,
+            language=language,
+            persona=persona,
+            use_knowledge_base=use_knowledge_base,
+            document_context=document_context,
+            case_context=case_context,
+            conversation_summary=conversation_summary
+        )
+        
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=formatted_messages,
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            
+            content_parts = []
+            tokens_used = 0
+            async for chunk in stream:
+                if chunk.usage:
+                    tokens_used = chunk.usage.total_tokens
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    content_parts.append(delta)
+                    yield {'type': 'delta', 'content': delta}
+            
+            yield {
+                'type': 'done',
+                'content': ''.join(content_parts),
+                'tokens_used': tokens_used,
+                'prompt_tokens': prompt_report,
+            }
+        except Exception as e:
+            raise Exception(f"AI API Error: {str(e)}")
+    
+    def summarize_conversation(self, previous_summary, messages, language='pl'):
+        """Fold messages into the running summary of a conversation"""
+        transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+        if language == 'pl':
+            prompt = f"""Zaktualizuj podsumowanie rozmowy prawnej o nowe wiadomości.
+Zachowaj fakty, strony, daty, kwoty, ustalenia i otwarte kwestie. Maksymalnie 300 słów.
+
+**Dotychczasowe podsumowanie:**
+{previous_summary or '(brak)'}
+
+**Nowe wiadomości:**
+{transcript}"""
+        else:
+            prompt = f"""Update the summary of this legal conversation with the new messages.
+Keep facts, parties, dates, amounts, decisions and open questions. At most 300 words.
+
+**Summary so far:**
+{previous_summary or '(none)'}
+
+**New messages:**
+{transcript}"""
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+            )
+            
+            return {
+                'content': response.choices[0].message.content,
+                'tokens_used': response.usage.total_tokens,
+            }
+        except Exception as e:
+            raise Exception(f"AI API Error: {str(e)}")
+    
+    def build_analysis_messages(self, document_text, language='pl'):
+        """Build the messages for a document analysis request"""
         prompt = self.get_active_prompt('document_analysis', language)
         
         if not prompt:
@@ -239,9 +475,34 @@ class AIService:
 **Document:**
 {document_text}"""
         
-        messages = [{"role": "user", "content": prompt.format(document_text=document_text[:4000])}]
+        return [{"role": "user", "content": prompt.format(document_text=document_text[:ANALYSIS_TEXT_CHARS])}]
+    
+    def analyze_document(self, document_text, language='pl'):
+        """Analyze a document and provide insights.
         
-        return self.chat_completion(messages, language=language)
+        Repeat analyses of the same text are served from the cache with tokens_used=0.
+        """
+        cache_key = self.analysis_cache_key(document_text, language)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return {'content': cached['content'], 'tokens_used': 0, 'cached': True}
+        
+        messages = self.build_analysis_messages(document_text, language=language)
+        result = self.chat_completion(messages, language=language)
+        self.cache.set(cache_key, result)
+        return result
+    
+    async def aanalyze_document(self, document_text, language='pl'):
+        """Async version of analyze_document"""
+        cache_key = await sync_to_async(self.analysis_cache_key)(document_text, language)
+        cached = await sync_to_async(self.cache.get)(cache_key)
+        if cached is not None:
+            return {'content': cached['content'], 'tokens_used': 0, 'cached': True}
+        
+        messages = await sync_to_async(self.build_analysis_messages)(document_text, language=language)
+        result = await self.achat_completion(messages, language=language)
+        await sync_to_async(self.cache.set)(cache_key, result)
+        return result
     
     def generate_document(self, document_type, context, language='pl'):
         """Generate a legal document draft"""
@@ -276,8 +537,8 @@ Please provide:
         
         return self.chat_completion(messages, language=language)
     
-    def regenerate_response(self, original_message, previous_response, additional_instructions, language='pl'):
-        """Regenerate a response with additional instructions"""
+    def build_regenerate_messages(self, original_message, previous_response, additional_instructions, language='pl'):
+        """Build the messages for a regeneration request"""
         if language == 'pl':
             prompt = f"""Poprzednia odpowiedź na pytanie "{original_message}" brzmiała:
 
@@ -293,6 +554,14 @@ Proszę o wygenerowanie nowej odpowiedzi uwzględniającej następujące dodatko
 Please regenerate the response taking into account these additional instructions:
 {additional_instructions}"""
         
-        messages = [{"role": "user", "content": prompt}]
-        
+        return [{"role": "user", "content": prompt}]
+    
+    def regenerate_response(self, original_message, previous_response, additional_instructions, language='pl'):
+        """Regenerate a response with additional instructions"""
+        messages = self.build_regenerate_messages(original_message, previous_response, additional_instructions, language)
         return self.chat_completion(messages, language=language)
+    
+    async def aregenerate_response(self, original_message, previous_response, additional_instructions, language='pl'):
+        """Async version of regenerate_response"""
+        messages = self.build_regenerate_messages(original_message, previous_response, additional_instructions, language)
+        return await self.achat_completion(messages, language=language)
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from documents.models import Document
+from .models import Prompt, KnowledgeBase
+from .cache import get_analysis_cache
+from .retrieval import index_entry
+
+# Prompts that shape document analysis output
+ANALYSIS_PROMPT_NAMES = ['document_analysis', 'system']
+
+
+@receiver(post_save, sender=Prompt)
+@receiver(post_delete, sender=Prompt)
+def invalidate_analysis_cache(sender, instance, **kwargs):
+    """Drop cached analyses when an analysis prompt is activated, edited or removed"""
+    if instance.name in ANALYSIS_PROMPT_NAMES:
+        get_analysis_cache().clear()
+
+
+@receiver(post_save, sender=KnowledgeBase)
+def index_knowledge_base_entry(sender, instance, **kwargs):
+    """Re-chunk a knowledge base entry when it is created or edited"""
+    index_entry(instance)
+
+
+@receiver(post_save, sender=Document)
+def reindex_knowledge_base_document(sender, instance, update_fields=None, **kwargs):
+    """Re-chunk knowledge base entries whose document text changed"""
+    if update_fields is not None and 'content_text' not in update_fields:
+        return
+    for entry in instance.knowledge_base_entries.all():
+        index_entry(entry)
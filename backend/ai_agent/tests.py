@@ -1,3 +1,187 @@
-from django.test import TestCase
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from documents.models import Document
+from .memory import summarize_conversation, unsummarized_messages
+from .models import Conversation, Message
 
-# Create your tests here.
+SYNCHRONOUS_EVENTS = {**settings.ANALYTICS_EVENTS, 'SYNCHRONOUS': True}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class ConversationQueryCountTests(TestCase):
+    """Query counts of the conversation and message endpoints must not grow with the data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+        cls.document = Document.objects.create(
+            user=cls.user,
+            title='Contract',
+            file_type='pdf',
+            content_text='x' * 10000
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_conversations(self, count, messages_per_conversation=4):
+        conversations = []
+        for i in range(count):
+            conversation = Conversation.objects.create(user=self.user, title=f'Conversation {i}')
+            for j in range(messages_per_conversation):
+                Message.objects.create(
+                    conversation=conversation,
+                    role='user' if j % 2 == 0 else 'assistant',
+                    content=f'Message {j} ' * 100,
+                    document=self.document
+                )
+            conversations.append(conversation)
+        return conversations
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response
+
+    def test_list_query_count_is_constant(self):
+        self.create_conversations(2)
+        few, _ = self.count_queries('/api/ai/conversations/')
+        self.create_conversations(10)
+        many, _ = self.count_queries('/api/ai/conversations/')
+        self.assertEqual(few, many)
+
+    def test_list_has_count_and_preview_without_messages(self):
+        conversation = self.create_conversations(1)[0]
+        Message.objects.create(conversation=conversation, role='assistant', content='Latest answer ' * 50)
+
+        _, response = self.count_queries('/api/ai/conversations/')
+        item = response.json()['results'][0]
+        self.assertEqual(item['message_count'], 5)
+        self.assertEqual(item['last_message']['role'], 'assistant')
+        self.assertTrue(item['last_message']['preview'].startswith('Latest answer'))
+        self.assertLessEqual(len(item['last_message']['preview']), 200)
+        self.assertNotIn('messages', item)
+
+    def test_list_without_messages(self):
+        Conversation.objects.create(user=self.user, title='Empty')
+        _, response = self.count_queries('/api/ai/conversations/')
+        item = response.json()['results'][0]
+        self.assertEqual(item['message_count'], 0)
+        self.assertIsNone(item['last_message'])
+
+    def test_retrieve_query_count_is_constant(self):
+        short, long = self.create_conversations(1, 2)[0], self.create_conversations(1, 20)[0]
+        few, _ = self.count_queries(f'/api/ai/conversations/{short.id}/')
+        many, response = self.count_queries(f'/api/ai/conversations/{long.id}/')
+        self.assertEqual(few, many)
+        self.assertEqual(response.json()['message_count'], 20)
+
+    def test_nested_documents_have_no_text(self):
+        conversation = self.create_conversations(1)[0]
+        _, response = self.count_queries(f'/api/ai/conversations/{conversation.id}/')
+        document = response.json()['messages'][0]['document']
+        self.assertEqual(document['title'], 'Contract')
+        self.assertNotIn('content_text', document)
+        self.assertNotIn('analysis', document)
+
+    def test_messages_action_query_count_is_constant(self):
+        short, long = self.create_conversations(1, 2)[0], self.create_conversations(1, 20)[0]
+        few, _ = self.count_queries(f'/api/ai/conversations/{short.id}/messages/')
+        many, _ = self.count_queries(f'/api/ai/conversations/{long.id}/messages/')
+        self.assertEqual(few, many)
+
+    def test_message_list_query_count_is_constant(self):
+        self.create_conversations(1, 2)
+        few, _ = self.count_queries('/api/ai/messages/')
+        self.create_conversations(3, 5)
+        many, _ = self.count_queries('/api/ai/messages/')
+        self.assertEqual(few, many)
+
+    def walk_cursor_pages(self, url):
+        """Ids of every page reached by following the next links, and the query count of each page"""
+        ids, query_counts = [], []
+        while url:
+            queries, response = self.count_queries(url)
+            data = response.json()
+            self.assertNotIn('count', data)
+            ids.extend(item['id'] for item in data['results'])
+            query_counts.append(queries)
+            url = data['next']
+        return ids, query_counts
+
+    def test_message_cursor_pages_include_every_message_once(self):
+        conversation = self.create_conversations(1, 10)[0]
+        # Same timestamp everywhere, so only the id orders the messages
+        Message.objects.filter(conversation=conversation).update(created_at=conversation.created_at)
+
+        ids, query_counts = self.walk_cursor_pages(f'/api/ai/messages/?conversation={conversation.id}&cursor=&page_size=3')
+        expected = list(Message.objects.filter(conversation=conversation).order_by('id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(query_counts), 4)
+        self.assertEqual(len(set(query_counts)), 1)
+
+    def test_conversation_cursor_pages_are_newest_first(self):
+        self.create_conversations(5, 1)
+        ids, _ = self.walk_cursor_pages('/api/ai/conversations/?cursor=&page_size=2')
+        self.assertEqual(ids, list(Conversation.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/ai/messages/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_rejects_non_integer_ids(self):
+        self.create_conversations(1)
+        for param in ['conversation', 'case']:
+            response = self.client.get(f'/api/ai/messages/search/?q=message&{param}=abc')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/ai/messages/search/?q=message&conversation=1')
+        self.assertEqual(response.status_code, 200)
+
+
+class FakeSummaryService:
+    """Records the messages each summary folds"""
+
+    def __init__(self):
+        self.folded = []
+
+    def summarize_conversation(self, summary, messages, language='pl'):
+        self.folded.extend(message['content'] for message in messages)
+        return {'content': f'Summary of {len(self.folded)} messages', 'tokens_used': 0}
+
+
+@override_settings(
+    ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS,
+    AI_CONVERSATION_MEMORY={'WINDOW': 2, 'SUMMARIZE_EVERY': 2},
+)
+class ConversationMemoryTests(TestCase):
+
+    def test_messages_sharing_the_watermark_timestamp_are_not_skipped(self):
+        user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+        conversation = Conversation.objects.create(user=user, title='Conversation')
+        for i in range(6):
+            Message.objects.create(conversation=conversation, role='user', content=f'Message {i}')
+        # Same timestamp everywhere, so only the id orders the messages
+        Message.objects.filter(conversation=conversation).update(created_at=conversation.created_at)
+
+        service = FakeSummaryService()
+        summarize_conversation(conversation, ai_service=service)
+        self.assertEqual(service.folded, [f'Message {i}' for i in range(4)])
+
+        for i in range(6, 8):
+            Message.objects.create(conversation=conversation, role='user', content=f'Message {i}')
+        Message.objects.filter(conversation=conversation).update(created_at=conversation.created_at)
+        conversation.refresh_from_db()
+        summarize_conversation(conversation, ai_service=service)
+
+        self.assertEqual(service.folded, [f'Message {i}' for i in range(6)])
+        conversation.refresh_from_db()
+        self.assertEqual(
+            list(unsummarized_messages(conversation).order_by('id').values_list('content', flat=True)),
+            ['Message 6', 'Message 7']
+        )
@@ -10,6 +10,7 @@ from .views import (
     GenerateDocumentView,
     AIHealthCheckView
 )
+from .async_views import AsyncChatView, AsyncRegenerateView, AsyncDocumentAnalyzeView
 
 router = DefaultRouter()
 router.register(r'conversations', ConversationViewSet, basename='conversation')
@@ -23,4 +24,9 @@ urlpatterns = [
     path('ai/regenerate/', RegenerateView.as_view(), name='regenerate'),
     path('ai/generate-document/', GenerateDocumentView.as_view(), name='generate-document'),
     path('ai/health/', AIHealthCheckView.as_view(), name='ai-health'),
+    
+    # Async (ASGI) versions of the LLM-bound endpoints
+    path('ai/async/chat/', AsyncChatView.as_view(), name='async-chat'),
+    path('ai/async/regenerate/', AsyncRegenerateView.as_view(), name='async-regenerate'),
+    path('ai/async/documents/<int:pk>/analyze/', AsyncDocumentAnalyzeView.as_view(), name='async-document-analyze'),
 ]
@@ -4,11 +4,23 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.utils import timezone
+from datetime import datetime, timedelta
+from django.utils.dateparse import parse_date
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Substr
+from django.http import StreamingHttpResponse
 from .models import Conversation, Message, Prompt, KnowledgeBase
-from .services import AIService
+from .services import AIService, PERSONA_PROMPTS, document_context_length
+from .memory import mark_for_summary, recent_messages
+from .search import MessageSearch
+from cases.context import get_case_context
 from documents.models import Document
+from documents.search import search_terms
 from analytics.models import UsageMetric
+from analytics.events import record
+from golexai.pagination import PageNumberOrKeysetPagination
 import json
 import sys
 import logging
@@ -16,14 +28,51 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def sse_event(event, data):
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def messages_with_documents(queryset):
+    """Join message documents without their large text columns"""
+    return queryset.select_related('document').defer(
+        'document__content_text', 'document__analysis', 'document__page_offsets'
+    )
+
+
 class ConversationViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination  # ?cursor= for keyset pages (see golexai.pagination)
+    
+    LAST_MESSAGE_PREVIEW_CHARS = 200
     
     def get_queryset(self):
-        return Conversation.objects.filter(user=self.request.user).order_by('-updated_at')
+        queryset = Conversation.objects.filter(user=self.request.user).order_by('-updated_at')
+        
+        if self.action == 'list':
+            # One query for the page plus one for all last messages, previews cut by the database.
+            # Messages are counted per row of the page, not joined and grouped, so the page
+            # is read straight from the (user, -updated_at) index.
+            last_messages = Message.objects.annotate(
+                preview=Substr('content', 1, self.LAST_MESSAGE_PREVIEW_CHARS)
+            ).defer('content').order_by('-created_at', '-id')[:1]
+            message_count = Message.objects.filter(conversation=OuterRef('pk')).order_by().values(
+                'conversation'
+            ).annotate(count=Count('id')).values('count')
+            return queryset.annotate(message_count=Coalesce(Subquery(message_count), 0)).prefetch_related(
+                Prefetch('messages', queryset=last_messages, to_attr='last_messages')
+            )
+        
+        if self.action == 'retrieve':
+            return queryset.prefetch_related(
+                Prefetch('messages', queryset=messages_with_documents(Message.objects.order_by('created_at')))
+            )
+        return queryset
     
     def get_serializer_class(self):
-        from .serializers import ConversationSerializer
+        from .serializers import ConversationSerializer, ConversationListSerializer
+        if self.action == 'list':
+            return ConversationListSerializer
         return ConversationSerializer
     
     def perform_create(self, serializer):
@@ -33,26 +82,83 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def messages(self, request, pk=None):
         """Get all messages for a conversation"""
         conversation = self.get_object()
-        messages = Message.objects.filter(conversation=conversation).order_by('created_at')
+        messages = messages_with_documents(Message.objects.filter(conversation=conversation).order_by('created_at'))
         from .serializers import MessageSerializer
         return Response(MessageSerializer(messages, many=True).data)
 
 
 class MessageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
     
     def get_queryset(self):
         conversation_id = self.request.query_params.get('conversation')
         if conversation_id:
-            return Message.objects.filter(
+            queryset = Message.objects.filter(
                 conversation_id=conversation_id,
                 conversation__user=self.request.user
             ).order_by('created_at')
-        return Message.objects.filter(conversation__user=self.request.user).order_by('-created_at')
+        else:
+            queryset = Message.objects.filter(conversation__user=self.request.user).order_by('-created_at')
+        return messages_with_documents(queryset)
     
     def get_serializer_class(self):
-        from .serializers import MessageSerializer
+        from .serializers import MessageSerializer, MessageSearchResultSerializer
+        if self.action == 'search':
+            return MessageSearchResultSerializer
         return MessageSerializer
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search over the user's messages: ?q=... filtered by
+        conversation, case, persona, role, date_from and date_to (YYYY-MM-DD)"""
+        query = request.query_params.get('q', '')
+        if not search_terms(query):
+            return Response(
+                {'error': 'Search query (q) is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = Message.objects.filter(conversation__user=request.user).select_related('conversation').only(
+            'conversation__title', 'conversation__case', 'role', 'persona', 'created_at'
+        )
+        for param, field in [('conversation', 'conversation_id'), ('case', 'conversation__case_id')]:
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                value = int(value)
+            except ValueError:
+                return Response(
+                    {'error': f'{param} must be an id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(**{field: value})
+        for param, field in [('persona', 'persona'), ('role', 'role')]:
+            value = request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        # Whole days in the current time zone, as plain datetime bounds on created_at
+        for param, lookup, days in [('date_from', 'created_at__gte', 0), ('date_to', 'created_at__lt', 1)]:
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                return Response(
+                    {'error': f'{param} must be a date (YYYY-MM-DD)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            start = timezone.make_aware(datetime.combine(date + timedelta(days=days), datetime.min.time()))
+            queryset = queryset.filter(**{lookup: start})
+        
+        page = self.paginate_queryset(MessageSearch(queryset, query))
+        snippets = MessageSearch.snippets([message.id for message in page], query)
+        serializer = self.get_serializer(page, many=True, context={**self.get_serializer_context(), 'snippets': snippets})
+        return self.get_paginated_response(serializer.data)
 
 
 class PromptViewSet(viewsets.ModelViewSet):
@@ -94,8 +200,11 @@ class ChatView(APIView):
         conversation_id = request.data.get('conversation_id')
         document_id = request.data.get('document_id')
         persona = request.data.get('persona', 'commercial')  # commercial or personal
+        if persona not in PERSONA_PROMPTS:
+            persona = 'commercial'  # What the prompt falls back to (see AIService.get_persona_prompt)
         use_knowledge_base = request.data.get('use_knowledge_base', False)
         case_id = request.data.get('case_id')  # Case to assign or update
+        stream = request.query_params.get('stream') in ('1', 'true')
         
         if not message_content:
             return Response({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -107,7 +216,7 @@ class ChatView(APIView):
                 # Update case if provided
                 if case_id:
                     conversation.case_id = case_id
-                    conversation.save()
+                    conversation.save(update_fields=['case', 'updated_at'])
             except Conversation.DoesNotExist:
                 return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
         else:
@@ -123,45 +232,29 @@ class ChatView(APIView):
         document = None
         if document_id:
             try:
-                document = Document.objects.get(id=document_id, user=user)
-                document_context = document.content_text[:2000] if document.content_text else None
+                document = Document.objects.defer('content_text').annotate(
+                    context_text=Substr('content_text', 1, document_context_length())
+                ).get(id=document_id, user=user)
+                document_context = document.context_text or None
             except Document.DoesNotExist:
                 pass
         
-        # Get case context if assigned to conversation
+        # Get case context if assigned to conversation (precomputed digest, see cases.context)
         case_context = None
         if conversation.case_id:
-            try:
-                from cases.models import Case
-                case = Case.objects.get(id=conversation.case_id, lawyer=user)
-                # Fetch all documents related to this case
-                case_documents = Document.objects.filter(case=case, user=user)
-                
-                context_parts = [f"Case Title: {case.title}", f"Case Description: {case.description}"]
-                for doc in case_documents:
-                    if doc.content_text:
-                        context_parts.append(f"Document: {doc.title}\n{doc.content_text[:800]}")
-                case_context = "\n\n".join(context_parts)
-            except:
-                pass
+            case_context = get_case_context(conversation.case_id, user)
         
         # Save user message
         user_message = Message.objects.create(
             conversation=conversation,
             role='user',
             content=message_content,
-            document=document
+            document=document,
+            persona=persona
         )
         
-        # Get conversation history
-        previous_messages = Message.objects.filter(
-            conversation=conversation
-        ).exclude(id=user_message.id).order_by('created_at')[:10]
-        
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in previous_messages
-        ]
+        # Recent messages verbatim; older ones are covered by the conversation summary
+        messages = recent_messages(conversation, exclude_id=user_message.id)
         messages.append({"role": "user", "content": message_content})
         
         # Get AI response
@@ -180,41 +273,31 @@ class ChatView(APIView):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
+        completion_kwargs = {
+            'messages': messages,
+            'language': user.language,
+            'persona': persona,
+            'use_knowledge_base': use_knowledge_base,
+            'document_context': document_context,
+            'case_context': case_context,
+            'conversation_summary': conversation.summary,
+        }
+        
+        if stream:
+            response = StreamingHttpResponse(
+                self.stream_events(ai_service, completion_kwargs, conversation, user_message, document, persona),
+                content_type='text/event-stream'
+            )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+            return response
+        
         try:
             logger.info(f"Attempting chat completion for user {user.email}, persona: {persona}")
-            response = ai_service.chat_completion(
-                messages=messages,
-                language=user.language,
-                persona=persona,
-                use_knowledge_base=use_knowledge_base,
-                document_context=document_context,
-                case_context=case_context
-            )
+            response = ai_service.chat_completion(**completion_kwargs)
             logger.info(f"Chat completion successful, tokens used: {response.get('tokens_used', 0)}")
             
-            # Save AI message
-            ai_message = Message.objects.create(
-                conversation=conversation,
-                role='assistant',
-                content=response['content'],
-                tokens_used=response['tokens_used'],
-                document=document
-            )
-            
-            # Update conversation
-            conversation.updated_at = timezone.now()
-            conversation.save()
-            
-            # Track usage
-            UsageMetric.objects.create(
-                user=user,
-                metric_type='ai_query',
-                value=response['tokens_used'],
-                metadata={
-                    'conversation_id': conversation.id,
-                    'persona': persona
-                }
-            )
+            ai_message = self.save_response(conversation, response, document, persona)
             
             from .serializers import MessageSerializer
             return Response({
@@ -239,6 +322,67 @@ class ChatView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def save_response(self, conversation, response, document, persona):
+        """Persist the assistant message and track usage"""
+        # Save AI message
+        ai_message = Message.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=response['content'],
+            tokens_used=response['tokens_used'],
+            document=document,
+            persona=persona
+        )
+        
+        # Update conversation (memory fields are owned by the summary worker)
+        conversation.updated_at = timezone.now()
+        conversation.save(update_fields=['updated_at'])
+        mark_for_summary(conversation)
+        
+        # Track usage
+        record(UsageMetric(
+            user=conversation.user,
+            metric_type='ai_query',
+            value=response['tokens_used'],
+            metadata={
+                'conversation_id': conversation.id,
+                'persona': persona,
+                'prompt_tokens': response.get('prompt_tokens', {}).get('sections'),
+            }
+        ))
+        return ai_message
+    
+    def stream_events(self, ai_service, completion_kwargs, conversation, user_message, document, persona):
+        """Forward completion deltas as server-sent events"""
+        from .serializers import MessageSerializer
+        
+        yield sse_event('start', {
+            'conversation_id': conversation.id,
+            'user_message': MessageSerializer(user_message).data,
+        })
+        
+        try:
+            for event in ai_service.stream_chat_completion(**completion_kwargs):
+                if event['type'] == 'delta':
+                    yield sse_event('delta', {'content': event['content']})
+                    continue
+                
+                logger.info(f"Chat stream finished, tokens used: {event['tokens_used']}")
+                ai_message = self.save_response(conversation, event, document, persona)
+                yield sse_event('done', {
+                    'conversation_id': conversation.id,
+                    'message': MessageSerializer(ai_message).data,
+                    'user_message': MessageSerializer(user_message).data,
+                })
+        except Exception as e:
+            import traceback
+            logger.error(f"AI Chat Stream Error: {str(e)}")
+            logger.error(f"Full Traceback: {traceback.format_exc()}")
+            yield sse_event('error', {
+                'error': str(e),
+                'error_type': type(e).__name__,
+            })
 
 
 class RegenerateView(APIView):
@@ -285,11 +429,12 @@ class RegenerateView(APIView):
                 role='assistant',
                 content=response['content'],
                 tokens_used=response['tokens_used'],
-                document=ai_message.document
+                document=ai_message.document,
+                persona=ai_message.persona
             )
             
             # Track usage
-            UsageMetric.objects.create(
+            record(UsageMetric(
                 user=request.user,
                 metric_type='ai_query',
                 value=response['tokens_used'],
@@ -297,7 +442,7 @@ class RegenerateView(APIView):
                     'conversation_id': ai_message.conversation.id,
                     'regeneration': True
                 }
-            )
+            ))
             
             from .serializers import MessageSerializer
             return Response({
@@ -410,12 +555,12 @@ class GenerateDocumentView(APIView):
             document.save()
             
             # Track usage
-            UsageMetric.objects.create(
+            record(UsageMetric(
                 user=request.user,
                 metric_type='document_created',
                 value=1,
                 metadata={'document_id': document.id, 'ai_generated': True}
-            )
+            ))
             
             from documents.serializers import DocumentSerializer
             return Response({
@@ -437,6 +582,8 @@ class AIHealthCheckView(APIView):
             'openai_key_set': False,
             'ai_service_init': False,
             'python_version': sys.version,
+            # The frontend sends chat and analysis to /api/ai/async/... under ASGI
+            'server_mode': 'asgi' if isinstance(request._request, ASGIRequest) else 'wsgi',
             'errors': []
         }
         
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UsageMetric, AuditLog
+from .models import UsageMetric, AuditLog, DailyUserStats
 
 
 @admin.register(UsageMetric)
@@ -17,3 +17,11 @@ class AuditLogAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
     search_fields = ['user__email', 'ip_address']
+
+
+@admin.register(DailyUserStats)
+class DailyUserStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'documents_total', 'ai_queries', 'ai_tokens', 'documents_analyzed']
+    list_filter = ['date']
+    date_hierarchy = 'date'
+    search_fields = ['user__email']
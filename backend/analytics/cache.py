@@ -0,0 +1,59 @@
+"""
+Per-user cache of analytics dashboard responses.
+
+Entries are keyed by user, range, day and a per-user version. Writes to the
+models the dashboard reads bump the version (see analytics.signals), which
+orphans every cached range of that user at once. Entries carry an ETag so
+unchanged dashboards can be answered with 304 Not Modified.
+"""
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+import hashlib
+import json
+import time
+
+
+def get_cache():
+    return caches['analytics']
+
+
+def version_key(user_id):
+    return f'analytics:version:{user_id}'
+
+
+def get_version(user_id):
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        cache.set(version_key(user_id), version, None)
+    return version
+
+
+def invalidate(user_id):
+    """Drop every cached dashboard of a user"""
+    get_cache().set(version_key(user_id), time.time_ns(), None)
+
+
+def dashboard_key(user_id, range_param):
+    # The date is part of the key because the daily timeline moves at midnight
+    return f'analytics:dashboard:{user_id}:{get_version(user_id)}:{range_param}:{timezone.localdate().isoformat()}'
+
+
+def compute_etag(data):
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')
+    return f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def get_dashboard(user_id, range_param, build):
+    """{'etag': ..., 'data': ...} for a dashboard, built with build() on a miss"""
+    cache = get_cache()
+    key = dashboard_key(user_id, range_param)
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        entry = {'etag': compute_etag(data), 'data': data}
+        cache.set(key, entry)
+    return entry
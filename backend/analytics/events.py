@@ -0,0 +1,221 @@
+"""
+Buffered writes of audit logs and usage metrics.
+
+Views record events with record() (arecord() in async views) instead of
+creating the rows themselves. Events are kept in a per-process buffer and
+written with one bulk_create per model:
+- when MAX_EVENTS are pending, by a background flusher thread;
+- at the end of a request once the oldest event has waited FLUSH_INTERVAL
+  seconds (under WSGI this runs after the response has been sent);
+- every FLUSH_INTERVAL seconds by the flusher thread while the process is idle;
+- at process exit, when the buffer is drained.
+Most requests therefore write nothing, and read endpoints such as preview and
+download no longer pay a database round-trip per hit.
+
+Rows are timestamped when they are written, at most FLUSH_INTERVAL after the
+event. bulk_create sends no post_save signals, so a flush drops the cached
+dashboards of the users whose usage metrics it wrote (see analytics.signals).
+Events still buffered are lost if the process is killed without a graceful
+shutdown. With SYNCHRONOUS set (the tests set it) each event is saved when it
+is recorded.
+
+Other processes may still hold events of a user when a GDPR deletion or export
+runs. A flush drops the events recorded before a deletion of their user, and
+exports wait settle_time() so that every process has written its events.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Max
+from django.dispatch import receiver
+from django.utils import timezone
+from accounts.models import DataDeletion
+from .cache import invalidate
+from .models import UsageMetric
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def get_event_settings():
+    config = settings.ANALYTICS_EVENTS
+    return config['SYNCHRONOUS'], config['MAX_EVENTS'], config['FLUSH_INTERVAL']
+
+
+def settle_time():
+    """How long until every process has written the events recorded so far"""
+    synchronous, _, flush_interval = get_event_settings()
+    # The flusher thread writes at least every FLUSH_INTERVAL; the rest is slack
+    return timedelta(0) if synchronous else timedelta(seconds=2 * flush_interval)
+
+
+def without_deleted_users(events):
+    """Drop the (recorded_at, instance) events recorded before a GDPR deletion of their user"""
+    user_ids = {instance.user_id for _, instance in events if instance.user_id}
+    if not user_ids:
+        return events
+    # The DataDeletion row is committed before the data is deleted, so every process sees it
+    deleted_at = dict(
+        DataDeletion.objects.filter(user_id__in=user_ids).exclude(status='failed')
+        .order_by().values('user_id').annotate(last=Max('created_at')).values_list('user_id', 'last')
+    )
+    kept = [
+        (recorded_at, instance) for recorded_at, instance in events
+        if instance.user_id not in deleted_at or recorded_at > deleted_at[instance.user_id]
+    ]
+    if len(kept) < len(events):
+        logger.info(f"Dropped {len(events) - len(kept)} events of users whose data was deleted")
+    return kept
+
+
+def write_events(model, instances):
+    """Insert events of one model, falling back to one row at a time if the batch fails"""
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(instances, batch_size=BATCH_SIZE)
+    except DatabaseError:
+        # One bad row, e.g. for an account deleted since, must not lose the whole batch
+        logger.exception(f"Batch of {len(instances)} {model.__name__} events failed; writing them one by one")
+        for instance in instances:
+            try:
+                with transaction.atomic():
+                    instance.save()
+            except DatabaseError as e:
+                logger.error(f"Dropped {model.__name__} event for user {instance.user_id}: {str(e)}")
+        return
+
+    if model is UsageMetric:
+        for user_id in {instance.user_id for instance in instances}:
+            invalidate(user_id)
+
+
+class EventBuffer:
+    """Per-process buffer of unsaved AuditLog and UsageMetric instances"""
+
+    def __init__(self):
+        self.events = []  # (recorded_at, instance)
+        self.oldest = None  # time.monotonic() of the first pending event
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # Keeps flushes, and so inserts, in order
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def add(self, instance):
+        _, max_events, _ = get_event_settings()
+        with self.lock:
+            if not self.events:
+                self.oldest = time.monotonic()
+            self.events.append((timezone.now(), instance))
+            full = len(self.events) >= max_events
+            self.start()
+        if full:
+            self.wake.set()
+
+    def is_due(self):
+        _, max_events, flush_interval = get_event_settings()
+        with self.lock:
+            return bool(self.events) and (
+                len(self.events) >= max_events or time.monotonic() - self.oldest >= flush_interval
+            )
+
+    def flush(self):
+        """Write every pending event. Returns the number written."""
+        with self.flush_lock:
+            with self.lock:
+                events, self.events, self.oldest = self.events, [], None
+            if not events:
+                return 0
+
+            events = without_deleted_users(events)
+            by_model = {}
+            for _, instance in events:
+                by_model.setdefault(type(instance), []).append(instance)
+            for model, instances in by_model.items():
+                write_events(model, instances)
+            return len(events)
+
+    def start(self):
+        """Start the flusher thread; called with the lock held"""
+        if self.stopping or (self.thread and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self.run, name='analytics-events', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopping:
+            _, _, flush_interval = get_event_settings()
+            self.wake.wait(flush_interval)
+            self.wake.clear()
+            if self.stopping:
+                return
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception("Flushing analytics events failed")
+            finally:
+                close_old_connections()
+
+    def drain(self):
+        """Stop the flusher thread and write what is left"""
+        with self.lock:
+            self.stopping = True
+            thread = self.thread
+        self.wake.set()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=10)
+        return self.flush()
+
+
+buffer = EventBuffer()
+
+
+def record(instance):
+    """Record an unsaved AuditLog or UsageMetric; it is written in the next batch"""
+    synchronous, _, _ = get_event_settings()
+    if synchronous:
+        instance.save()
+    else:
+        buffer.add(instance)
+
+
+async def arecord(instance):
+    """record() for async views"""
+    synchronous, _, _ = get_event_settings()
+    if synchronous:
+        await instance.asave()
+    else:
+        buffer.add(instance)
+
+
+def flush():
+    """Write every pending event now"""
+    return buffer.flush()
+
+
+def drain():
+    """Stop buffering and write every pending event, at shutdown"""
+    return buffer.drain()
+
+
+atexit.register(drain)
+
+
+@receiver(request_finished)
+def flush_due_events(sender, **kwargs):
+    """Write the buffer at the end of a request once it is full or old enough"""
+    if buffer.is_due():
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception("Flushing analytics events failed")
+        finally:
+            close_old_connections()
@@ -0,0 +1,182 @@
+"""
+Streaming analytics report export (CSV, NDJSON and JSON).
+
+Rows are read with .iterator(chunk_size=...) over values_list querysets and
+written out one by one, so memory stays flat however many documents and cases
+the report covers. Summary counts come from one conditional aggregate per
+model.
+
+Under ASGI, Django reads a sync streaming response to the end before sending
+any of it, so the view hands ASGI workers the same generators through
+aiterate(), which pulls batches of rows in a worker thread.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
+from itertools import islice
+from .metrics import usage_metrics
+from .rollup import stats_by_date
+from documents.models import Document
+from cases.models import Case
+import csv
+import json
+
+CHUNK_SIZE = 2000
+ASYNC_BATCH = 500  # Rows per thread hop when streaming from an ASGI worker
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming"""
+
+    def write(self, value):
+        return value
+
+
+def report_summary(user, date_from):
+    documents = Document.objects.filter(user=user, created_at__gte=date_from).aggregate(
+        total_documents=Count('id'),
+        ai_generated_documents=Count('id', filter=Q(is_ai_generated=True)),
+        uploaded_documents=Count('id', filter=Q(is_ai_generated=False)),
+    )
+    cases = Case.objects.filter(lawyer=user, created_at__gte=date_from).aggregate(
+        total_cases=Count('id'),
+        open_cases=Count('id', filter=Q(status='open')),
+        in_progress_cases=Count('id', filter=Q(status='in_progress')),
+        closed_cases=Count('id', filter=Q(status='closed')),
+    )
+    ai_queries = usage_metrics(stats_by_date(user, date_from.date()))['queries']
+    return {**documents, **cases, 'ai_queries': ai_queries}
+
+
+def document_rows(user, date_from):
+    """(title, is_ai_generated, status, priority, created_at) in creation order"""
+    return Document.objects.filter(
+        user=user,
+        created_at__gte=date_from
+    ).order_by('-created_at').values_list(
+        'title', 'is_ai_generated', 'status', 'priority', 'created_at'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def case_rows(user, date_from):
+    """(title, status, priority, created_at) in creation order"""
+    return Case.objects.filter(
+        lawyer=user,
+        created_at__gte=date_from
+    ).order_by('-created_at').values_list(
+        'title', 'status', 'priority', 'created_at'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def document_type(is_ai_generated):
+    return 'AI Generated' if is_ai_generated else 'Uploaded'
+
+
+def stream_csv(user, date_from, now, days):
+    writer = csv.writer(Echo())
+    summary = report_summary(user, date_from)
+
+    # Header
+    yield writer.writerow(['GOLEXAI Analytics Report'])
+    yield writer.writerow([f'Generated: {now.strftime("%Y-%m-%d %H:%M")}'])
+    yield writer.writerow([f'Period: Last {days} days'])
+    yield writer.writerow([])
+
+    # Summary
+    yield writer.writerow(['Summary'])
+    yield writer.writerow(['Metric', 'Value'])
+    yield writer.writerow(['Total Documents', summary['total_documents']])
+    yield writer.writerow(['AI Generated Documents', summary['ai_generated_documents']])
+    yield writer.writerow(['Uploaded Documents', summary['uploaded_documents']])
+    yield writer.writerow(['Total Cases', summary['total_cases']])
+    yield writer.writerow(['Open Cases', summary['open_cases']])
+    yield writer.writerow(['In Progress Cases', summary['in_progress_cases']])
+    yield writer.writerow(['Closed Cases', summary['closed_cases']])
+    yield writer.writerow(['AI Queries', summary['ai_queries']])
+    yield writer.writerow([])
+
+    # Documents
+    yield writer.writerow(['Documents'])
+    yield writer.writerow(['Title', 'Type', 'Status', 'Priority', 'Created At'])
+    for title, is_ai_generated, doc_status, priority, created_at in document_rows(user, date_from):
+        yield writer.writerow([
+            title,
+            document_type(is_ai_generated),
+            doc_status,
+            priority,
+            created_at.strftime('%Y-%m-%d %H:%M')
+        ])
+    yield writer.writerow([])
+
+    # Cases
+    yield writer.writerow(['Cases'])
+    yield writer.writerow(['Title', 'Status', 'Priority', 'Created At'])
+    for title, case_status, priority, created_at in case_rows(user, date_from):
+        yield writer.writerow([title, case_status, priority, created_at.strftime('%Y-%m-%d %H:%M')])
+
+
+def document_record(row):
+    title, is_ai_generated, doc_status, priority, created_at = row
+    return {
+        'title': title,
+        'type': document_type(is_ai_generated),
+        'created_at': created_at.isoformat(),
+        'status': doc_status,
+        'priority': priority,
+    }
+
+
+def case_record(row):
+    title, case_status, priority, created_at = row
+    return {
+        'title': title,
+        'status': case_status,
+        'priority': priority,
+        'created_at': created_at.isoformat(),
+    }
+
+
+def stream_ndjson(user, date_from, now, days):
+    """One JSON object per line: the report header, then every document and case"""
+    yield json.dumps({
+        'type': 'report',
+        'report_date': now.isoformat(),
+        'range': f'{days} days',
+        'summary': report_summary(user, date_from),
+    }) + '\n'
+    for row in document_rows(user, date_from):
+        yield json.dumps({'type': 'document', **document_record(row)}) + '\n'
+    for row in case_rows(user, date_from):
+        yield json.dumps({'type': 'case', **case_record(row)}) + '\n'
+
+
+def stream_json(user, date_from, now, days):
+    """The report as a single JSON document, written incrementally"""
+    header = json.dumps({
+        'report_date': now.isoformat(),
+        'range': f'{days} days',
+        'summary': report_summary(user, date_from),
+    })
+    yield header[:-1] + ', "documents": ['
+    for index, row in enumerate(document_rows(user, date_from)):
+        yield (', ' if index else '') + json.dumps(document_record(row))
+    yield '], "cases": ['
+    for index, row in enumerate(case_rows(user, date_from)):
+        yield (', ' if index else '') + json.dumps(case_record(row))
+    yield ']}'
+
+
+async def aiterate(rows):
+    """Async iterator over a sync report generator, joined ASYNC_BATCH rows at a time"""
+    # Thread-sensitive, so every batch runs on the thread holding the query cursor
+    next_batch = sync_to_async(lambda: list(islice(rows, ASYNC_BATCH)))
+    while batch := await next_batch():
+        yield ''.join(batch)
+
+
+# format -> (generator, content type, file extension)
+FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+    'json': (stream_json, 'application/json', 'json'),
+}
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from accounts.models import User
+from analytics.metrics import build_dashboard
+from analytics.models import UsageMetric
+from cases.models import Case
+from documents.models import Document
+import random
+import time
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure dashboard query count and latency for a synthetic heavy user (all data is rolled back)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50000)
+        parser.add_argument('--metrics', type=int, default=50000)
+        parser.add_argument('--cases', type=int, default=500)
+        parser.add_argument('--runs', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options)
+                for range_param in ['7d', '30d', '90d']:
+                    self.measure(user, range_param, options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+    
+    def seed(self, options):
+        random.seed(0)
+        now = timezone.now()
+        user = User.objects.create_user(
+            username='benchmark-analytics',
+            email='benchmark-analytics@example.com',
+            password=None
+        )
+        
+        def created_at():
+            return now - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86399))
+        
+        self.stdout.write(f"Seeding {options['cases']} cases, {options['documents']} documents, {options['metrics']} metrics...")
+        Case.objects.bulk_create([
+            Case(
+                title=f'Case {i}',
+                lawyer=user,
+                status=random.choice(['open', 'in_progress', 'closed']),
+                priority=random.choice(['low', 'medium', 'high', 'urgent'])
+            )
+            for i in range(options['cases'])
+        ], batch_size=1000)
+        # created_at is auto_now_add, so backdate after inserting
+        documents = Document.objects.bulk_create([
+            Document(
+                user=user,
+                title=f'Document {i}',
+                original_filename=random.choice(['brief.pdf', 'contract.docx', 'notes.txt']),
+                is_ai_generated=random.random() < 0.2
+            )
+            for i in range(options['documents'])
+        ], batch_size=1000)
+        for document in documents:
+            document.created_at = created_at()
+        Document.objects.bulk_update(documents, ['created_at'], batch_size=1000)
+        
+        metrics = UsageMetric.objects.bulk_create([
+            UsageMetric(
+                user=user,
+                metric_type=random.choice(['ai_query', 'document_analyzed', 'document_uploaded']),
+                value=random.randint(1, 2000)
+            )
+            for _ in range(options['metrics'])
+        ], batch_size=1000)
+        for metric in metrics:
+            metric.created_at = created_at()
+        UsageMetric.objects.bulk_update(metrics, ['created_at'], batch_size=1000)
+        return user
+    
+    def measure(self, user, range_param, runs):
+        timings = []
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                build_dashboard(user, range_param)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'range={range_param}: {len(context)} queries, '
+            f'median {timings[len(timings) // 2]:.1f} ms, best {timings[0]:.1f} ms'
+        )
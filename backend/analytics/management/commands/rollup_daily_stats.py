@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from analytics.rollup import rebuild, rollup_pending
+
+
+class Command(BaseCommand):
+    help = 'Fold documents and usage metrics written since the last run into the daily stats rollup'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Discard the rollup and recompute it from all rows')
+    
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt daily stats from {total} rows'))
+            return
+        
+        batches = 0
+        while rollup_pending():
+            batches += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {batches} batch(es)'))
@@ -0,0 +1,174 @@
+"""
+Dashboard aggregation engine.
+
+Totals are computed with conditional aggregates (Count with filter=Q(...)),
+one query per model. Per-day charts and usage totals come from the
+DailyUserStats rollup (see analytics.rollup), so their cost does not grow
+with history. Recent activity lists and storage usage take one query each.
+"""
+
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import timedelta
+from .rollup import stats_by_date
+from documents.models import Document, StorageUsage
+from cases.models import Case
+from ai_agent.models import Conversation
+
+RANGE_DAYS = {'7d': 7, '30d': 30, '90d': 90}
+
+
+def parse_range(range_param):
+    """Number of days for a range query parameter (7d, 30d or 90d; default 30d)"""
+    return RANGE_DAYS.get(range_param, 30)
+
+
+def count_by(field, values, **extra):
+    """Conditional counts for each value of a choice field"""
+    return {value: Count('id', filter=Q(**{field: value}, **extra)) for value in values}
+
+
+def document_metrics(user, date_from):
+    return Document.objects.filter(user=user).aggregate(
+        total=Count('id'),
+        in_range=Count('id', filter=Q(created_at__gte=date_from)),
+        ai_generated=Count('id', filter=Q(is_ai_generated=True)),
+        pdf_count=Count('id', filter=Q(original_filename__iendswith='.pdf')),
+        docx_count=Count('id', filter=Q(original_filename__iendswith='.docx')),
+    )
+
+
+def case_metrics(user):
+    statuses = [value for value, _ in Case.STATUS_CHOICES]
+    priorities = [value for value, _ in Case.PRIORITY_CHOICES]
+    counts = Case.objects.filter(lawyer=user).aggregate(
+        total=Count('id'),
+        **{f'status_{key}': value for key, value in count_by('status', statuses).items()},
+        **{f'priority_{key}': value for key, value in count_by('priority', priorities).items()},
+    )
+    return {
+        'total': counts['total'],
+        'by_status': {status: counts[f'status_{status}'] for status in statuses},
+        'by_priority': {priority: counts[f'priority_{priority}'] for priority in priorities},
+    }
+
+
+def usage_metrics(stats):
+    return {
+        'queries': sum(day['ai_queries'] for day in stats.values()),
+        'tokens': sum(day['ai_tokens'] for day in stats.values()),
+        'documents_analyzed': sum(day['documents_analyzed'] for day in stats.values()),
+        'documents_generated': sum(day['documents_created'] for day in stats.values()),
+    }
+
+
+def conversation_metrics(user, date_from):
+    return Conversation.objects.filter(user=user).aggregate(
+        total=Count('id'),
+        in_range=Count('id', filter=Q(created_at__gte=date_from)),
+    )
+
+
+def storage_metrics(user):
+    """Disk usage from the last media scan (see documents.storage)"""
+    usage = StorageUsage.objects.filter(user=user).values('bytes_used', 'files', 'scanned_at').first()
+    return usage or {'bytes_used': 0, 'files': 0, 'scanned_at': None}
+
+
+def daily_series(rows, date_from, end_date, empty):
+    """Fill a {date: values} mapping into one entry per day"""
+    series = []
+    current_date = date_from.date()
+    while current_date <= end_date:
+        series.append({'date': current_date.isoformat(), **rows.get(current_date, empty)})
+        current_date += timedelta(days=1)
+    return series
+
+
+def documents_by_day(stats, date_from, end_date):
+    by_date = {
+        date: {
+            'total': day['documents_total'],
+            'uploaded': day['documents_uploaded'],
+            'generated': day['documents_generated'],
+        }
+        for date, day in stats.items()
+    }
+    return daily_series(by_date, date_from, end_date, {'total': 0, 'uploaded': 0, 'generated': 0})
+
+
+def ai_queries_by_day(stats, date_from, end_date):
+    by_date = {date: {'count': day['ai_queries']} for date, day in stats.items()}
+    return daily_series(by_date, date_from, end_date, {'count': 0})
+
+
+def recent_activity(user, limit=10):
+    activity = [
+        {
+            'type': 'document',
+            'action': 'AI Generated' if is_ai_generated else 'Uploaded',
+            'title': title,
+            'time': created_at.isoformat()
+        }
+        for title, is_ai_generated, created_at in Document.objects.filter(
+            user=user
+        ).order_by('-created_at').values_list('title', 'is_ai_generated', 'created_at')[:5]
+    ]
+    activity += [
+        {
+            'type': 'case',
+            'action': 'Created',
+            'title': title,
+            'time': created_at.isoformat()
+        }
+        for title, created_at in Case.objects.filter(
+            lawyer=user
+        ).order_by('-created_at').values_list('title', 'created_at')[:5]
+    ]
+    activity.sort(key=lambda x: x['time'], reverse=True)
+    return activity[:limit]
+
+
+def build_dashboard(user, range_param='30d', now=None):
+    """All dashboard metrics for a user and range"""
+    now = now or timezone.now()
+    days = parse_range(range_param)
+    date_from = now - timedelta(days=days)
+
+    stats = stats_by_date(user, date_from.date())
+    documents = document_metrics(user, date_from)
+    cases = case_metrics(user)
+    ai_usage = usage_metrics(stats)
+    conversations = conversation_metrics(user, date_from)
+
+    # Estimate: 1 AI query = 15 min, 1 doc analysis = 30 min, 1 generated doc = 45 min
+    time_saved_minutes = (
+        ai_usage['queries'] * 15
+        + ai_usage['documents_analyzed'] * 30
+        + ai_usage['documents_generated'] * 45
+    )
+
+    return {
+        'range': range_param,
+        'documents': {
+            **documents,
+            'uploaded': documents['total'] - documents['ai_generated'],
+            'other_count': documents['total'] - documents['pdf_count'] - documents['docx_count'],
+        },
+        'documents_by_day': documents_by_day(stats, date_from, now.date()),
+        'ai_queries_by_day': ai_queries_by_day(stats, date_from, now.date()),
+        'cases': {
+            'total': cases['total'],
+            'active': cases['by_status']['open'] + cases['by_status']['in_progress'],
+            'by_status': cases['by_status'],
+            'by_priority': cases['by_priority'],
+        },
+        'ai_usage': ai_usage,
+        'conversations': conversations,
+        'storage': storage_metrics(user),
+        'time_saved': {
+            'hours': round(time_saved_minutes / 60, 1),
+            'minutes': time_saved_minutes,
+        },
+        'recent_activity': recent_activity(user),
+    }
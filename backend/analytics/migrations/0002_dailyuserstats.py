@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyUserStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("documents_total", models.PositiveIntegerField(default=0)),
+                ("documents_uploaded", models.PositiveIntegerField(default=0)),
+                ("documents_generated", models.PositiveIntegerField(default=0)),
+                ("ai_queries", models.PositiveIntegerField(default=0)),
+                ("ai_tokens", models.FloatField(default=0)),
+                ("documents_analyzed", models.PositiveIntegerField(default=0)),
+                ("documents_created", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "daily user stats",
+                "verbose_name_plural": "daily user stats",
+                "ordering": ["-date"],
+                "unique_together": {("user", "date")},
+            },
+        ),
+    ]
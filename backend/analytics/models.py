@@ -59,6 +59,7 @@ class AuditLog(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'action', 'created_at']),
+            models.Index(fields=['user', '-created_at'], name='auditlog_user_created_idx'),
             models.Index(fields=['created_at']),
         ]
         verbose_name = _('audit log')
@@ -66,3 +67,37 @@ class AuditLog(models.Model):
     
     def __str__(self):
         return f"{self.get_action_display()} - {self.user.email if self.user else 'System'}"
+
+
+class DailyUserStats(models.Model):
+    """Per-user, per-day rollup of documents and usage metrics (see analytics.rollup)"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    documents_total = models.PositiveIntegerField(default=0)
+    documents_uploaded = models.PositiveIntegerField(default=0)
+    documents_generated = models.PositiveIntegerField(default=0)
+    ai_queries = models.PositiveIntegerField(default=0)
+    ai_tokens = models.FloatField(default=0)
+    documents_analyzed = models.PositiveIntegerField(default=0)
+    documents_created = models.PositiveIntegerField(default=0)  # 'document_created' metrics
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['user', 'date']
+        verbose_name = _('daily user stats')
+        verbose_name_plural = _('daily user stats')
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into DailyUserStats"""
+    
+    name = models.CharField(max_length=50, unique=True)  # Source table, e.g. 'documents'
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
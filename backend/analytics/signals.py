@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from documents.models import Document, StorageUsage
+from cases.models import Case
+from ai_agent.models import Conversation
+from .models import UsageMetric
+from .cache import invalidate
+from .rollup import remove_document
+
+
+@receiver(post_delete, sender=Document)
+def remove_deleted_document_from_rollup(sender, instance, **kwargs):
+    """Keep the daily document counts in line with deletions"""
+    remove_document(instance)
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+@receiver(post_save, sender=Conversation)
+@receiver(post_delete, sender=Conversation)
+@receiver(post_save, sender=UsageMetric)
+@receiver(post_delete, sender=UsageMetric)
+@receiver(post_save, sender=StorageUsage)
+def invalidate_user_analytics(sender, instance, **kwargs):
+    """Any write the dashboard reads drops the owner's cached dashboards"""
+    invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Case)
+@receiver(post_delete, sender=Case)
+def invalidate_lawyer_analytics(sender, instance, **kwargs):
+    invalidate(instance.lawyer_id)
@@ -1,3 +1,177 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import DataDeletion, User
+from documents.models import Document
+from .cache import get_cache
+from .events import flush, record, without_deleted_users
+from .models import AuditLog, DailyUserStats, UsageMetric
+from .rollup import ROLLUP_LAG, STAT_FIELDS, document_deltas, rollup_pending, stats_by_date, usage_deltas
 
-# Create your tests here.
+SYNCHRONOUS_EVENTS = {**settings.ANALYTICS_EVENTS, 'SYNCHRONOUS': True}
+
+
+class BufferedEventTests(TestCase):
+    """Events buffered in any process must not outlive a GDPR deletion of their user"""
+
+    def test_events_recorded_before_a_deletion_are_dropped(self):
+        deleted = User.objects.create_user(username='deleted', email='deleted@example.com', password='secret')
+        other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+        deletion = DataDeletion.objects.create(user=deleted, status='done')
+        before = deletion.created_at - timedelta(seconds=1)
+        after = timezone.now() + timedelta(seconds=1)
+        failed = DataDeletion.objects.create(user=other, status='failed')
+
+        events = [
+            (before, AuditLog(user=deleted, action='document_access')),
+            (after, AuditLog(user=deleted, action='data_delete')),
+            (before, AuditLog(user=other, action='document_access')),
+            (failed.created_at - timedelta(seconds=1), AuditLog(user=other, action='login')),
+            (before, AuditLog(action='login')),
+        ]
+        kept = [instance.action for _, instance in without_deleted_users(events)]
+
+        self.assertEqual(kept, ['data_delete', 'document_access', 'login', 'login'])
+
+
+@override_settings(ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class RollupTests(TestCase):
+    """The incremental rollup must always equal an aggregate of the source rows from scratch"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret')
+
+    def add_rows(self, days_ago):
+        """Documents and metrics of both users, old enough to be rolled up"""
+        documents, metrics = [], []
+        for user in [self.user, self.other]:
+            for is_ai_generated in [False, False, True]:
+                documents.append(Document.objects.create(user=user, title='Document', is_ai_generated=is_ai_generated))
+            for metric_type, value in [('ai_query', 120), ('ai_query', 80), ('document_analyzed', 300), ('document_created', 1)]:
+                metrics.append(UsageMetric.objects.create(user=user, metric_type=metric_type, value=value))
+        created_at = timezone.now() - timedelta(days=days_ago) - ROLLUP_LAG * 2
+        documents = Document.objects.filter(pk__in=[document.pk for document in documents]).order_by('pk')
+        documents.update(created_at=created_at)
+        UsageMetric.objects.filter(pk__in=[metric.pk for metric in metrics]).update(created_at=created_at)
+        return list(documents)
+
+    def from_scratch(self, documents=None):
+        """{(user_id, date): {field: value}} aggregated over every source row"""
+        stats = {}
+        for deltas in [document_deltas(documents or Document.objects.all()), usage_deltas(UsageMetric.objects.all())]:
+            for key, values in deltas.items():
+                row = stats.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+                for field, value in values.items():
+                    row[field] += value
+        return {key: row for key, row in stats.items() if any(row.values())}
+
+    def rolled_up(self):
+        rows = DailyUserStats.objects.values('user_id', 'date', *STAT_FIELDS)
+        stats = {(row.pop('user_id'), row.pop('date')): row for row in rows}
+        return {key: row for key, row in stats.items() if any(row.values())}
+
+    def run_rollup(self):
+        while rollup_pending():
+            pass
+
+    def test_reruns_fold_only_new_rows(self):
+        self.add_rows(days_ago=3)
+        self.run_rollup()
+        self.assertEqual(self.rolled_up(), self.from_scratch())
+
+        self.add_rows(days_ago=3)
+        self.add_rows(days_ago=1)
+        self.run_rollup()
+        self.assertEqual(self.rolled_up(), self.from_scratch())
+
+        self.run_rollup()
+        self.assertEqual(self.rolled_up(), self.from_scratch())
+
+    def test_recent_rows_are_left_for_the_next_run_but_counted_live(self):
+        self.add_rows(days_ago=2)
+        self.run_rollup()
+        recent = Document.objects.create(user=self.user, title='Just uploaded')
+        UsageMetric.objects.create(user=self.user, metric_type='ai_query', value=50)
+        self.run_rollup()
+
+        self.assertEqual(self.rolled_up(), {
+            key: row for key, row in self.from_scratch(Document.objects.exclude(pk=recent.pk)).items()
+            if key[1] < timezone.localdate()
+        })
+        date_from = timezone.localdate() - timedelta(days=7)
+        live = {(self.user.id, date): row for date, row in stats_by_date(self.user, date_from).items()}
+        self.assertEqual(live, {key: row for key, row in self.from_scratch().items() if key[0] == self.user.id})
+
+    def test_deleted_documents_leave_the_rollup(self):
+        uploaded, _, generated, *_ = self.add_rows(days_ago=2)
+        self.run_rollup()
+        unfolded = self.add_rows(days_ago=2)[0]
+
+        # Folded documents are subtracted, one past the watermark is simply never folded
+        for document in [uploaded, generated, unfolded]:
+            document.delete()
+        self.run_rollup()
+
+        self.assertEqual(self.rolled_up(), self.from_scratch())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class DashboardCacheTests(TestCase):
+    """Cached dashboards revalidate with ETags and drop on any write they read"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/api/analytics/', headers=headers)
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'])
+
+        second = self.get(first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertFalse(second.content)
+
+        self.assertEqual(self.get('"stale"').status_code, 200)
+
+    def assertInvalidatedBy(self, write):
+        etag = self.get()['ETag']
+        write()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response.json()
+
+    def test_usage_metric_invalidates_the_dashboard(self):
+        data = self.assertInvalidatedBy(
+            lambda: record(UsageMetric(user=self.user, metric_type='ai_query', value=100))
+        )
+        self.assertEqual(data['ai_usage']['queries'], 1)
+
+    @override_settings(ANALYTICS_EVENTS={'SYNCHRONOUS': False, 'MAX_EVENTS': 1000, 'FLUSH_INTERVAL': 3600})
+    def test_buffered_usage_metric_invalidates_the_dashboard_when_flushed(self):
+        def write():
+            record(UsageMetric(user=self.user, metric_type='ai_query', value=100))
+            self.assertEqual(self.get(self.get()['ETag']).status_code, 304)
+            flush()
+
+        data = self.assertInvalidatedBy(write)
+        self.assertEqual(data['ai_usage']['queries'], 1)
+
+    def test_document_invalidates_the_dashboard(self):
+        data = self.assertInvalidatedBy(lambda: Document.objects.create(user=self.user, title='Contract'))
+        self.assertEqual(data['documents']['total'], 1)
@@ -5,3 +5,6 @@ class CasesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cases'
     verbose_name = 'Cases'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
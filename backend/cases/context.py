@@ -0,0 +1,45 @@
+"""
+Case context digest used as chat context.
+
+The digest (case title, description and an excerpt of each case document) is
+stored on the Case and rebuilt only when the case or its documents change, so
+a chat turn reads one column instead of every document's full text.
+"""
+
+from django.db.models.functions import Substr
+from .models import Case
+
+DOCUMENT_EXCERPT_CHARS = 800
+
+
+def build_case_digest(case):
+    """Build the digest text for a case; excerpts are cut by the database"""
+    from documents.models import Document
+
+    context_parts = [f"Case Title: {case.title}", f"Case Description: {case.description}"]
+    documents = Document.objects.filter(
+        case=case,
+        user_id=case.lawyer_id
+    ).exclude(content_text='').annotate(
+        excerpt=Substr('content_text', 1, DOCUMENT_EXCERPT_CHARS)
+    ).values_list('title', 'excerpt')
+    for title, excerpt in documents:
+        context_parts.append(f"Document: {title}\n{excerpt}")
+    return "\n\n".join(context_parts)
+
+
+def rebuild_case_digest(case_id):
+    """Recompute and store the digest of one case"""
+    case = Case.objects.filter(pk=case_id).only('title', 'description', 'lawyer_id').first()
+    if case is None:
+        return
+    # update() so Case.updated_at and post_save receivers are not triggered
+    Case.objects.filter(pk=case_id).update(context_digest=build_case_digest(case))
+
+
+def get_case_context(case_id, user):
+    """The stored digest of a user's case, or None"""
+    return Case.objects.filter(
+        pk=case_id,
+        lawyer=user
+    ).values_list('context_digest', flat=True).first() or None
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from cases.context import rebuild_case_digest
+from cases.models import Case
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the chat context digest of every case (normally kept up to date by signals)'
+    
+    def handle(self, *args, **options):
+        case_ids = list(Case.objects.values_list('id', flat=True))
+        for case_id in case_ids:
+            rebuild_case_digest(case_id)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(case_ids)} case digests'))
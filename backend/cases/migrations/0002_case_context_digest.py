@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:16
+
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def build_existing_digests(apps, schema_editor):
+    from cases.context import DOCUMENT_EXCERPT_CHARS
+
+    Case = apps.get_model("cases", "Case")
+    Document = apps.get_model("documents", "Document")
+    for case in Case.objects.iterator():
+        context_parts = [
+            f"Case Title: {case.title}",
+            f"Case Description: {case.description}",
+        ]
+        documents = (
+            Document.objects.filter(case=case, user_id=case.lawyer_id)
+            .exclude(content_text="")
+            .order_by("-created_at")
+            .annotate(excerpt=Substr("content_text", 1, DOCUMENT_EXCERPT_CHARS))
+            .values_list("title", "excerpt")
+        )
+        for title, excerpt in documents:
+            context_parts.append(f"Document: {title}\n{excerpt}")
+        Case.objects.filter(pk=case.pk).update(
+            context_digest="\n\n".join(context_parts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0001_initial"),
+        ("documents", "0006_document_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="case",
+            name="context_digest",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(build_existing_digests, migrations.RunPython.noop),
+    ]
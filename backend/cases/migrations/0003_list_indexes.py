@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0002_case_context_digest"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(
+                fields=["lawyer", "-created_at"], name="case_lawyer_created_idx"
+            ),
+        ),
+        # The composite indexes lead with these foreign keys, so their own indexes are
+        # dropped. Not AlterField: SQLite would rebuild the tables and lose the search triggers.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "DROP INDEX cases_case_lawyer_id_ba531ec8",
+                    'CREATE INDEX cases_case_lawyer_id_ba531ec8 ON cases_case ("lawyer_id")',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="case",
+                    name="lawyer",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cases",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
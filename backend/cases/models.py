@@ -23,12 +23,16 @@ class Case(models.Model):
     description = models.TextField(blank=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
-    lawyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cases')
+    lawyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cases', db_index=False)  # Leads the Meta indexes
+    context_digest = models.TextField(blank=True, editable=False)  # Chat context, see cases.context
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['lawyer', '-created_at'], name='case_lawyer_created_idx'),
+        ]
         verbose_name = _('case')
         verbose_name_plural = _('cases')
     
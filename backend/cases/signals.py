@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from documents.models import Document
+from .models import Case
+from .context import rebuild_case_digest
+
+# Document fields that appear in the case digest
+DIGEST_DOCUMENT_FIELDS = {'title', 'content_text', 'case'}
+
+
+def schedule_rebuild(case_id):
+    if case_id:
+        transaction.on_commit(lambda: rebuild_case_digest(case_id))
+
+
+@receiver(post_save, sender=Case)
+def rebuild_digest_on_case_change(sender, instance, update_fields=None, **kwargs):
+    """Rebuild the digest when the case title or description changes"""
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    schedule_rebuild(instance.pk)
+
+
+@receiver(pre_save, sender=Document)
+def remember_previous_case(sender, instance, update_fields=None, **kwargs):
+    """Note the case a document is moved out of"""
+    if instance.pk and (update_fields is None or 'case' in update_fields):
+        instance._previous_case_id = Document.objects.filter(pk=instance.pk).values_list('case_id', flat=True).first()
+
+
+@receiver(post_save, sender=Document)
+def rebuild_digest_on_document_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """Rebuild the digest of every case the document entered, left or changed in"""
+    if update_fields is not None and not DIGEST_DOCUMENT_FIELDS & set(update_fields):
+        return
+    previous_case_id = getattr(instance, '_previous_case_id', None)
+    if previous_case_id != instance.case_id:
+        schedule_rebuild(previous_case_id)
+    schedule_rebuild(instance.case_id)
+
+
+@receiver(post_delete, sender=Document)
+def rebuild_digest_on_document_delete(sender, instance, **kwargs):
+    schedule_rebuild(instance.case_id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Document
+from .models import Document, AnalysisJob, StorageUsage, StorageScan
 
 
 @admin.register(Document)
@@ -8,3 +8,21 @@ class DocumentAdmin(admin.ModelAdmin):
     list_filter = ['file_type', 'is_encrypted', 'created_at']
     search_fields = ['title', 'original_filename']
     readonly_fields = ['created_at', 'updated_at', 'file_size']
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'document', 'user', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(StorageUsage)
+class StorageUsageAdmin(admin.ModelAdmin):
+    list_display = ['user', 'bytes_used', 'files', 'orphan_bytes', 'orphan_files', 'scanned_at']
+    search_fields = ['user__email']
+
+
+@admin.register(StorageScan)
+class StorageScanAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'finished_at', 'files', 'bytes_total', 'orphan_files', 'orphan_bytes', 'orphans_queued']
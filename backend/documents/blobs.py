@@ -0,0 +1,58 @@
+"""
+Content addressing for uploaded files.
+
+Uploads are hashed with SHA-256 while streaming and stored as
+documents/<user_id>/<sha256><ext>. A re-upload of the same bytes by the same
+user points the new Document at the existing blob and reuses its extracted
+text (and analysis), instead of storing, extracting and analyzing it again.
+Blobs are never shared between users.
+"""
+
+from django.conf import settings
+from .models import Document
+import hashlib
+import os
+
+
+def hash_upload(file):
+    """SHA-256 hex digest of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def blob_filename(digest, original_filename):
+    """Storage file name for a blob, keeping the original extension"""
+    _, ext = os.path.splitext(original_filename)
+    return f"{digest}{ext.lower()}"
+
+
+def find_duplicate(user, digest):
+    """Most recent document of this user with the same content and a stored file"""
+    return Document.objects.filter(
+        user=user,
+        content_hash=digest
+    ).exclude(file='').order_by('-created_at').first()
+
+
+def duplicate_fields(existing):
+    """Fields to copy from an existing document onto a re-upload of the same content"""
+    fields = {
+        'file': existing.file.name,
+        'file_size': existing.file_size,
+    }
+    if existing.extraction_status == 'done':
+        fields.update(
+            content_text=existing.content_text,
+            page_offsets=existing.page_offsets,
+            extraction_status='done',
+        )
+    else:
+        fields['extraction_status'] = 'pending'
+    
+    if settings.DOCUMENT_DEDUP_REUSE_ANALYSIS and existing.analysis:
+        fields['analysis'] = existing.analysis
+    return fields
+
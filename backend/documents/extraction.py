@@ -0,0 +1,104 @@
+"""
+Text extraction for uploaded documents.
+
+Uploads are stored with extraction_status='pending' and the run_worker
+command fills in content_text afterwards, so the upload request never waits
+on PDF/DOCX parsing.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from docx import Document as DocxDocument
+from .models import Document
+from .pdf_engine import extract_pages, join_pages
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=30)  # Large PDFs take a while
+
+
+def extract_text(file, filename):
+    """Extract plain text from a PDF or DOCX file object.
+    
+    Returns (text, page_offsets); page_offsets holds the start of each PDF page
+    in text and is empty for other formats.
+    """
+    name = filename.lower()
+    if name.endswith('.pdf'):
+        pages = extract_pages(
+            file.read(),
+            max_workers=settings.PDF_EXTRACTION_WORKERS,
+            parallel_min_pages=settings.PDF_PARALLEL_MIN_PAGES
+        )
+        return join_pages(pages)
+    if name.endswith('.docx'):
+        doc = DocxDocument(file)
+        return '\n'.join(para.text for para in doc.paragraphs if para.text.strip()), []
+    return '', []
+
+
+def extract_document(document):
+    """Extract and store the text of a document's file"""
+    try:
+        with document.file.open('rb') as f:
+            document.content_text, document.page_offsets = extract_text(
+                f, document.original_filename or document.file.name
+            )
+        document.extraction_status = 'done'
+    except Exception as e:
+        logger.error(f"Text extraction failed for document {document.id}: {str(e)}")
+        document.extraction_status = 'failed'
+    
+    document.save(update_fields=['content_text', 'page_offsets', 'extraction_status', 'updated_at'])
+    return document
+
+
+def claim_next_extraction():
+    """Atomically move the oldest pending document to running and return it"""
+    while True:
+        document = Document.objects.filter(extraction_status='pending').order_by('created_at').first()
+        if document is None:
+            return None
+        
+        claimed = Document.objects.filter(pk=document.pk, extraction_status='pending').update(
+            extraction_status='running',
+            extraction_attempts=F('extraction_attempts') + 1,
+            updated_at=timezone.now()
+        )
+        if claimed:
+            document.extraction_status = 'running'
+            document.extraction_attempts += 1
+            return document
+        # Another worker took it first; try the next one
+
+
+def requeue_stale_extractions():
+    """Requeue extractions whose worker died (e.g. out of memory), or fail them after MAX_ATTEMPTS"""
+    stale = Document.objects.filter(
+        extraction_status='running',
+        updated_at__lt=timezone.now() - STALE_AFTER
+    )
+    failed = stale.filter(extraction_attempts__gte=MAX_ATTEMPTS).update(
+        extraction_status='failed',
+        updated_at=timezone.now()
+    )
+    requeued = stale.update(extraction_status='pending')
+    return requeued + failed
+
+
+def process_next_extraction():
+    """Claim and extract one pending document. Returns True if one was processed."""
+    document = claim_next_extraction()
+    if document is None:
+        return False
+    
+    if document.file:
+        extract_document(document)
+    else:
+        document.extraction_status = 'done'
+        document.save(update_fields=['extraction_status', 'updated_at'])
+    return True
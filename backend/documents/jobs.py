@@ -0,0 +1,109 @@
+"""
+Database-backed background jobs.
+
+Jobs are rows in the regular database; the run_worker management command
+claims them with a conditional UPDATE, so several workers can run side by side
+without a message broker.
+"""
+
+from datetime import timedelta
+from django.utils import timezone
+from .models import AnalysisJob
+from analytics.models import UsageMetric
+from analytics.events import record
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=15)
+
+
+def enqueue_analysis(document, language='pl'):
+    """Queue an analysis job for a document, reusing one that is still pending"""
+    job = AnalysisJob.objects.filter(
+        document=document,
+        status__in=['queued', 'running']
+    ).first()
+    if job:
+        return job
+    return AnalysisJob.objects.create(document=document, user=document.user, language=language)
+
+
+def claim_next_analysis_job():
+    """Atomically move the oldest queued job to running and return it"""
+    while True:
+        job = AnalysisJob.objects.filter(status='queued').order_by('created_at').first()
+        if job is None:
+            return None
+        
+        now = timezone.now()
+        claimed = AnalysisJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running',
+            started_at=now,
+            attempts=job.attempts + 1
+        )
+        if claimed:
+            job.status = 'running'
+            job.started_at = now
+            job.attempts += 1
+            return job
+        # Another worker took it first; try the next one
+
+
+def run_analysis_job(job):
+    """Run the AI analysis for a claimed job and store the result"""
+    from ai_agent.services import AIService
+    
+    document = job.document
+    try:
+        if not document.content_text:
+            raise ValueError('Document has no extractable text')
+        
+        result = AIService().analyze_document(document.content_text, language=job.language)
+        
+        document.analysis = result['content']
+        document.save(update_fields=['analysis', 'updated_at'])
+        
+        record(UsageMetric(
+            user_id=job.user_id,
+            metric_type='document_analyzed',
+            value=result['tokens_used'],
+            metadata={'document_id': document.id, 'job_id': job.id, 'cached': result.get('cached', False)}
+        ))
+        
+        job.status = 'done'
+        job.result = result['content']
+        job.tokens_used = result['tokens_used']
+    except Exception as e:
+        logger.error(f"Analysis job {job.id} failed: {str(e)}")
+        job.status = 'failed'
+        job.error = str(e)
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'tokens_used', 'finished_at'])
+    return job
+
+
+def process_next_analysis_job():
+    """Claim and run one analysis job. Returns True if a job was processed."""
+    job = claim_next_analysis_job()
+    if job is None:
+        return False
+    run_analysis_job(job)
+    return True
+
+
+def requeue_stale_jobs():
+    """Requeue running jobs whose worker died, or fail them after MAX_ATTEMPTS"""
+    stale = AnalysisJob.objects.filter(
+        status='running',
+        started_at__lt=timezone.now() - STALE_AFTER
+    )
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed',
+        error='Worker stopped while running the job',
+        finished_at=timezone.now()
+    )
+    requeued = stale.update(status='queued')
+    return requeued + failed
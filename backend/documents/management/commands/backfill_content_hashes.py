@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from documents.models import Document
+import hashlib
+
+
+class Command(BaseCommand):
+    help = 'Compute content_hash for stored documents uploaded before content addressing'
+    
+    def handle(self, *args, **options):
+        documents = Document.objects.filter(content_hash='').exclude(file='').exclude(file__isnull=True)
+        
+        hashed = missing = 0
+        for document in documents.only('id', 'file').iterator(chunk_size=100):
+            digest = hashlib.sha256()
+            try:
+                with document.file.open('rb') as f:
+                    for chunk in f.chunks():
+                        digest.update(chunk)
+            except FileNotFoundError:
+                missing += 1
+                continue
+            Document.objects.filter(pk=document.pk).update(content_hash=digest.hexdigest())
+            hashed += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} document(s), {missing} file(s) missing'))
@@ -0,0 +1,197 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.request import Request
+from accounts.models import User
+from ai_agent.memory import claim_next_summary, recent_messages
+from ai_agent.models import Conversation, Message
+from ai_agent.views import ConversationViewSet, messages_with_documents
+from cases.models import Case
+from cases.views import CaseViewSet
+from documents.blobs import find_duplicate
+from documents.extraction import claim_next_extraction, requeue_stale_extractions
+from documents.models import Document
+from documents.views import DocumentViewSet
+import random
+import time
+
+PAGE_SIZE = 20
+
+
+class Rollback(Exception):
+    pass
+
+
+def view_queryset(viewset_class, user, action, params=None):
+    """The queryset a viewset builds for a GET request with these query parameters"""
+    request = Request(RequestFactory().get('/', params or {}))
+    request.user = user
+    view = viewset_class(request=request, action=action, format_kwarg=None, kwargs={})
+    return view.get_queryset()
+
+
+def list_page(queryset):
+    """What a paginated list endpoint runs: the count and the first page"""
+    return queryset.count(), list(queryset[:PAGE_SIZE])
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a heavy user among other accounts, check that the list and chat queries '
+        'use their indexes and time them (all data is rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=20000)
+        parser.add_argument('--cases', type=int, default=500)
+        parser.add_argument('--conversations', type=int, default=500)
+        parser.add_argument('--messages', type=int, default=20, help='Messages per conversation')
+        parser.add_argument('--accounts', type=int, default=20, help='Other accounts, each with a tenth of the data')
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        failures = []
+        try:
+            with transaction.atomic():
+                for i in range(options['accounts']):
+                    self.seed(f'benchmark-indexes-{i}', options, scale=0.1)
+                user = self.seed('benchmark-indexes', options)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')  # Planner statistics for the seeded volumes
+
+                for name, indexes, run in self.checks(user):
+                    if not self.measure(name, indexes, run, options['runs']):
+                        failures.append(name)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Queries not using their indexes: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All queries use their indexes'))
+
+    def seed(self, username, options, scale=1.0):
+        now = timezone.now()
+        user = User.objects.create_user(username=username, email=f'{username}@example.com', password=None)
+
+        def count(option):
+            return max(1, int(options[option] * scale))
+
+        def created_at():
+            return now - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86399))
+
+        if scale == 1.0:
+            self.stdout.write(
+                f"Seeding {options['cases']} cases, {options['documents']} documents and "
+                f"{options['conversations']} conversations of {options['messages']} messages, "
+                f"plus {options['accounts']} accounts with a tenth of that..."
+            )
+        cases = Case.objects.bulk_create([
+            Case(
+                title=f'Case {i}',
+                lawyer=user,
+                status=random.choice(['open', 'in_progress', 'closed']),
+                priority=random.choice(['low', 'medium', 'high', 'urgent'])
+            )
+            for i in range(count('cases'))
+        ], batch_size=1000)
+        # created_at is auto_now_add, so backdate after inserting
+        documents = Document.objects.bulk_create([
+            Document(
+                user=user,
+                title=f'Document {i}',
+                case=random.choice(cases),
+                file_type=random.choice(['pleading', 'opinion', 'contract', 'other']),
+                priority=random.choice(['low', 'medium', 'urgent']),
+                status=random.choice(['started', 'in-progress', 'done']),
+                is_ai_generated=random.random() < 0.1,
+                file=f'documents/{i}.pdf',
+                content_hash=f'{random.getrandbits(256):064x}'
+            )
+            for i in range(count('documents'))
+        ], batch_size=1000)
+        for document in documents:
+            document.created_at = created_at()
+        Document.objects.bulk_update(documents, ['created_at'], batch_size=1000)
+
+        conversations = Conversation.objects.bulk_create([
+            Conversation(
+                user=user,
+                title=f'Conversation {i}',
+                case=random.choice(cases) if random.random() < 0.5 else None,
+                summary_pending=random.random() < 0.02
+            )
+            for i in range(count('conversations'))
+        ], batch_size=1000)
+        for conversation in conversations:
+            conversation.updated_at = created_at()
+        Conversation.objects.bulk_update(conversations, ['updated_at'], batch_size=1000)
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                role='user' if i % 2 == 0 else 'assistant',
+                content=f'Message {i} of conversation {conversation.id}'
+            )
+            for conversation in conversations
+            for i in range(options['messages'])
+        ], batch_size=1000)
+        return user
+
+    def checks(self, user):
+        """(name, indexes its queries must use, callable running the queries)"""
+        conversation = Conversation.objects.filter(user=user).order_by('?').first()
+        return [
+            ('documents list', ['document_user_created_idx'],
+             lambda: list_page(view_queryset(DocumentViewSet, user, 'list'))),
+            ('documents by status', ['document_user_status_idx'],
+             lambda: list_page(view_queryset(DocumentViewSet, user, 'list', {'status': 'done'}))),
+            ('documents by priority', ['document_user_priority_idx'],
+             lambda: list_page(view_queryset(DocumentViewSet, user, 'list', {'priority': 'urgent'}))),
+            ('documents by type', ['document_user_type_idx'],
+             lambda: list_page(view_queryset(DocumentViewSet, user, 'list', {'file_type': 'contract'}))),
+            ('AI-generated documents', ['document_user_ai_idx'],
+             lambda: list_page(view_queryset(DocumentViewSet, user, 'list', {'ai_generated': 'true'}))),
+            ('cases list', ['case_lawyer_created_idx'],
+             lambda: list_page(view_queryset(CaseViewSet, user, 'list'))),
+            ('conversations list', ['conversation_user_updated_idx', 'message_conv_created_idx'],
+             lambda: list_page(view_queryset(ConversationViewSet, user, 'list'))),
+            ('conversation messages', ['message_conv_created_idx'],
+             lambda: list(messages_with_documents(Message.objects.filter(conversation=conversation).order_by('created_at')))),
+            ('chat memory window', ['message_conv_created_idx'],
+             lambda: recent_messages(conversation)),
+            ('summary queue', ['conversation_summary_idx'], claim_next_summary),
+            ('upload dedup', ['document_user_hash_idx'],
+             lambda: find_duplicate(user, f'{random.getrandbits(256):064x}')),
+            ('extraction queue', ['document_extraction_idx', 'document_extracting_idx'],
+             lambda: (claim_next_extraction(), requeue_stale_extractions())),
+        ]
+
+    def measure(self, name, indexes, run, runs):
+        """Time a check and report whether its queries use the indexes. Returns True if they all do."""
+        timings = []
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {query['sql']}")
+                plans.append('\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall()))
+        missing = [index for index in indexes if not any(index in plan for plan in plans)]
+
+        summary = f'{name}: {len(context)} queries, median {timings[len(timings) // 2]:.1f} ms, best {timings[0]:.1f} ms'
+        if not missing:
+            self.stdout.write(f"{summary}; uses {', '.join(indexes)}")
+            return True
+        self.stdout.write(self.style.ERROR(f"{summary}; NOT using {', '.join(missing)}"))
+        for query, plan in zip(context.captured_queries, plans):
+            self.stdout.write(f"  {query['sql']}\n    {plan.replace(chr(10), chr(10) + '    ')}")
+        return False
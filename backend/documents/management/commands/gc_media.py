@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from documents.storage import scan_media, sweep_deleted_files
+
+
+class Command(BaseCommand):
+    help = 'Walk the uploaded documents, refresh per-user storage usage and report (or delete) orphaned files'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Remove orphaned files instead of only reporting them')
+        parser.add_argument('--verbose-orphans', action='store_true', help='List every orphaned file')
+    
+    def handle(self, *args, **options):
+        def progress(directory, usage, orphans):
+            self.stdout.write(
+                f"  {directory}: {usage['files']} files, {usage['bytes_used']} bytes; "
+                f"{usage['orphan_files']} orphaned ({usage['orphan_bytes']} bytes)"
+            )
+            if options['verbose_orphans']:
+                for name in orphans:
+                    self.stdout.write(f'    {name}')
+        
+        scan = scan_media(delete_orphans=options['delete'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scan.files} files ({scan.bytes_total} bytes); '
+            f'{scan.orphan_files} orphaned ({scan.orphan_bytes} bytes)'
+        ))
+        
+        if options['delete']:
+            while sweep_deleted_files():
+                pass
+            self.stdout.write(self.style.SUCCESS(f'Removed {scan.orphans_queued} orphaned file(s)'))
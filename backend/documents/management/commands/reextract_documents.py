@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from documents.extraction import extract_document
+from documents.models import Document
+
+
+class Command(BaseCommand):
+    help = 'Queue (or run) text extraction again for documents already stored'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-extract every document with a file, not only failed/stuck ones')
+        parser.add_argument('--user', type=int, help='Only documents of this user id')
+        parser.add_argument('--sync', action='store_true', help='Extract in this process instead of queueing for run_worker')
+    
+    def handle(self, *args, **options):
+        documents = Document.objects.exclude(file='').exclude(file__isnull=True)
+        if not options['all']:
+            documents = documents.filter(extraction_status__in=['failed', 'running'])
+        if options['user']:
+            documents = documents.filter(user_id=options['user'])
+        
+        if not options['sync']:
+            queued = documents.update(extraction_status='pending', updated_at=timezone.now())
+            self.stdout.write(self.style.SUCCESS(f'Queued {queued} document(s) for extraction'))
+            return
+        
+        done = failed = 0
+        for document in documents.iterator(chunk_size=100):
+            extract_document(document)
+            if document.extraction_status == 'done':
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'Extracted {done} document(s), {failed} failed'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from accounts.exports import delete_expired_exports, process_next_export
+from ai_agent.memory import process_next_summary
+from ai_agent.retrieval import embed_pending_chunks
+from analytics.rollup import rollup_pending
+from documents.extraction import process_next_extraction, requeue_stale_extractions
+from documents.jobs import process_next_analysis_job, requeue_stale_jobs
+from documents.storage import scan_media_if_due, sweep_deleted_files
+import time
+
+
+class Command(BaseCommand):
+    help = 'Process background jobs (text extraction, document analysis, knowledge base embeddings, conversation summaries, analytics rollup, GDPR data exports, deleted file cleanup, media scan) stored in the database'
+    
+    # Each task processes one unit of work and returns True if it found any
+    TASKS = [
+        process_next_extraction,
+        process_next_analysis_job,
+        embed_pending_chunks,
+        process_next_summary,
+        rollup_pending,
+        process_next_export,
+        delete_expired_exports,
+        sweep_deleted_files,
+        scan_media_if_due,
+    ]
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+    
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs() + requeue_stale_extractions()
+        if requeued:
+            self.stdout.write(f'Recovered {requeued} stale job(s)')
+        
+        self.stdout.write('Worker started')
+        try:
+            while True:
+                did_work = False
+                for task in self.TASKS:
+                    did_work = task() or did_work
+                
+                if not did_work:
+                    if options['once']:
+                        break
+                    requeue_stale_jobs()
+                    requeue_stale_extractions()
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Worker stopped')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0003_analysisjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="extraction_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("running", "Running"),
+                    ("done", "Done"),
+                    ("failed", "Failed"),
+                ],
+                default="done",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0004_document_extraction_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="page_offsets",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
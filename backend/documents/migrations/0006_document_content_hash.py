@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0001_initial"),
+        ("documents", "0005_document_page_offsets"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "content_hash"], name="documents_d_user_id_79b163_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_datadeletion"),
+        ("documents", "0006_document_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "deletion",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="file_deletions",
+                        to="accounts.datadeletion",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "file deletion",
+                "verbose_name_plural": "file deletions",
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0007_filedeletion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StorageScan",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("files", models.PositiveIntegerField(default=0)),
+                ("bytes_total", models.PositiveBigIntegerField(default=0)),
+                ("orphan_files", models.PositiveIntegerField(default=0)),
+                ("orphan_bytes", models.PositiveBigIntegerField(default=0)),
+                ("orphans_queued", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "storage scan",
+                "verbose_name_plural": "storage scans",
+                "ordering": ["-started_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="StorageUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bytes_used", models.PositiveBigIntegerField(default=0)),
+                ("files", models.PositiveIntegerField(default=0)),
+                ("orphan_bytes", models.PositiveBigIntegerField(default=0)),
+                ("orphan_files", models.PositiveIntegerField(default=0)),
+                ("scanned_at", models.DateTimeField()),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="storage_usage",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "storage usage",
+                "verbose_name_plural": "storage usage",
+            },
+        ),
+    ]
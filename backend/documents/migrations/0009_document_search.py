@@ -0,0 +1,97 @@
+from django.db import migrations
+
+# Kept in sync with documents.search; the body is capped because a tsvector cannot exceed 1MB
+POSTGRES_VECTOR = """
+    setweight(to_tsvector('simple'::regconfig, coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('simple'::regconfig, left(coalesce({row}content_text, ''), 500000)), 'B')
+"""
+POSTGRES_FORWARD = [
+    "ALTER TABLE documents_document ADD COLUMN search_vector tsvector",
+    f"""
+    CREATE FUNCTION documents_document_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRES_VECTOR.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER documents_document_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, content_text ON documents_document
+    FOR EACH ROW EXECUTE PROCEDURE documents_document_search_vector()
+    """,
+    f"UPDATE documents_document SET search_vector = {POSTGRES_VECTOR.format(row='')}",
+    "CREATE INDEX documents_document_search_idx ON documents_document USING gin (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS documents_document_search_idx",
+    "DROP TRIGGER IF EXISTS documents_document_search_vector_update ON documents_document",
+    "DROP FUNCTION IF EXISTS documents_document_search_vector()",
+    "ALTER TABLE documents_document DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE documents_document_fts USING fts5(
+        title, content_text,
+        content='documents_document', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER documents_document_fts_insert AFTER INSERT ON documents_document BEGIN
+        INSERT INTO documents_document_fts(rowid, title, content_text)
+        VALUES (new.id, new.title, new.content_text);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_document_fts_delete AFTER DELETE ON documents_document BEGIN
+        INSERT INTO documents_document_fts(documents_document_fts, rowid, title, content_text)
+        VALUES ('delete', old.id, old.title, old.content_text);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_document_fts_update AFTER UPDATE OF title, content_text ON documents_document BEGIN
+        INSERT INTO documents_document_fts(documents_document_fts, rowid, title, content_text)
+        VALUES ('delete', old.id, old.title, old.content_text);
+        INSERT INTO documents_document_fts(rowid, title, content_text)
+        VALUES (new.id, new.title, new.content_text);
+    END
+    """,
+    "INSERT INTO documents_document_fts(documents_document_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS documents_document_fts_insert",
+    "DROP TRIGGER IF EXISTS documents_document_fts_delete",
+    "DROP TRIGGER IF EXISTS documents_document_fts_update",
+    "DROP TABLE IF EXISTS documents_document_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    "sqlite": (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def create_search_index(apps, schema_editor):
+    forward, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in forward:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    _, backward = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in backward:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0008_storageusage"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
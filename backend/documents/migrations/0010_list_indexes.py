@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0003_list_indexes"),
+        ("documents", "0009_document_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "-created_at"], name="document_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "status", "-created_at"],
+                name="document_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "priority", "-created_at"],
+                name="document_user_priority_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["user", "file_type", "-created_at"],
+                name="document_user_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                condition=models.Q(("is_ai_generated", True)),
+                fields=["user", "-created_at"],
+                name="document_user_ai_idx",
+            ),
+        ),
+        # The composite indexes lead with these foreign keys, so their own indexes are
+        # dropped. Not AlterField: SQLite would rebuild the tables and lose the search triggers.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "DROP INDEX documents_document_user_id_e543d099",
+                    'CREATE INDEX documents_document_user_id_e543d099 ON documents_document ("user_id")',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="document",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="documents",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
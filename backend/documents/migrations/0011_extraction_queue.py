@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0003_list_indexes"),
+        ("documents", "0010_list_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Not AddField: SQLite would rebuild the table and lose the search triggers
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE documents_document ADD COLUMN extraction_attempts smallint "
+                    "DEFAULT 0 NOT NULL CHECK (extraction_attempts >= 0)",
+                    "ALTER TABLE documents_document DROP COLUMN extraction_attempts",
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name="document",
+                    name="extraction_attempts",
+                    field=models.PositiveSmallIntegerField(default=0),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                condition=models.Q(("extraction_status", "pending")),
+                fields=["created_at"],
+                name="document_extraction_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                condition=models.Q(("extraction_status", "running")),
+                fields=["updated_at"],
+                name="document_extracting_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# Folds diacritics on PostgreSQL, as the SQLite FTS5 tokenizer (remove_diacritics 2) does.
+# Kept in sync with documents.search.SEARCH_CONFIG; unaccent is a trusted extension from PostgreSQL 13.
+SEARCH_CONFIG = "golexai_search"
+
+VECTOR = """
+    setweight(to_tsvector('{config}'::regconfig, coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('{config}'::regconfig, left(coalesce({row}content_text, ''), 500000)), 'B')
+"""
+FUNCTION = """
+    CREATE OR REPLACE FUNCTION documents_document_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {vector};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+
+def reindex(config):
+    return [
+        FUNCTION.format(vector=VECTOR.format(config=config, row="NEW.")),
+        f"UPDATE documents_document SET search_vector = {VECTOR.format(config=config, row='')}",
+    ]
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = simple)",
+    f"ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple",
+    *reindex(SEARCH_CONFIG),
+]
+POSTGRES_BACKWARD = [
+    *reindex("simple"),
+    f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {SEARCH_CONFIG}",
+]
+
+
+def fold_diacritics(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def keep_diacritics(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0011_extraction_queue"),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_diacritics, keep_diacritics),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0012_search_unaccent"),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name="document",
+            new_name="document_user_hash_idx",
+            old_name="documents_d_user_id_79b163_idx",
+        ),
+    ]
@@ -33,6 +33,13 @@ class Document(models.Model):
         ('done', _('Done')),
     ]
     
+    EXTRACTION_STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+    
     title = models.CharField(max_length=255)
     file = models.FileField(upload_to=document_upload_path, blank=True, null=True)
     file_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES, default='other')
@@ -40,8 +47,12 @@ class Document(models.Model):
     mime_type = models.CharField(max_length=100, blank=True)
     file_size = models.PositiveIntegerField(default=0)  # in bytes
     case = models.ForeignKey(Case, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='documents')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='documents', db_index=False)  # Leads the Meta indexes
     content_text = models.TextField(blank=True)  # Extracted text content
+    extraction_status = models.CharField(max_length=10, choices=EXTRACTION_STATUS_CHOICES, default='done')
+    extraction_attempts = models.PositiveSmallIntegerField(default=0)
+    page_offsets = models.JSONField(default=list, blank=True)  # Start of each PDF page in content_text
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the uploaded file
     analysis = models.TextField(blank=True)  # AI analysis result
     is_encrypted = models.BooleanField(default=False)
     is_ai_generated = models.BooleanField(default=False)
@@ -56,6 +67,31 @@ class Document(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Named so benchmark_indexes can check the query plans that use them
+        indexes = [
+            models.Index(fields=['user', 'content_hash'], name='document_user_hash_idx'),
+            models.Index(fields=['user', '-created_at'], name='document_user_created_idx'),
+            models.Index(fields=['user', 'status', '-created_at'], name='document_user_status_idx'),
+            models.Index(fields=['user', 'priority', '-created_at'], name='document_user_priority_idx'),
+            models.Index(fields=['user', 'file_type', '-created_at'], name='document_user_type_idx'),
+            # AI-generated documents are a small share, so only they are indexed for that filter
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_ai_generated=True),
+                name='document_user_ai_idx'
+            ),
+            # Extraction queue: the worker polls these even when idle
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(extraction_status='pending'),
+                name='document_extraction_idx'
+            ),
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(extraction_status='running'),
+                name='document_extracting_idx'
+            ),
+        ]
         verbose_name = _('document')
         verbose_name_plural = _('documents')
     
@@ -67,12 +103,118 @@ class Document(models.Model):
         """Get the case title if assigned"""
         return self.case.title if self.case else None
     
+    @property
+    def page_count(self):
+        """Number of pages with known offsets (PDFs only)"""
+        return len(self.page_offsets)
+    
+    def get_page_text(self, page_number):
+        """Get the text of a 1-based PDF page"""
+        if not 1 <= page_number <= len(self.page_offsets):
+            return None
+        start = self.page_offsets[page_number - 1]
+        if page_number < len(self.page_offsets):
+            end = self.page_offsets[page_number] - 1  # Drop the joining newline
+        else:
+            end = len(self.content_text)
+        return self.content_text[start:end]
+    
     def delete(self, *args, **kwargs):
-        """Delete file when document is deleted"""
-        if self.file:
+        """Delete file when document is deleted, unless another document shares it"""
+        if self.file and not Document.objects.filter(file=self.file.name).exclude(pk=self.pk).exists():
             try:
                 if os.path.isfile(self.file.path):
                     os.remove(self.file.path)
             except (ValueError, FileNotFoundError):
                 pass
         super().delete(*args, **kwargs)
+
+
+class AnalysisJob(models.Model):
+    """Background AI analysis of a document, processed by the run_worker command"""
+    
+    STATUS_CHOICES = [
+        ('queued', _('Queued')),
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+    
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='analysis_jobs')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_jobs')
+    language = models.CharField(max_length=2, choices=[('en', 'English'), ('pl', 'Polish')], default='pl')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    tokens_used = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = _('analysis job')
+        verbose_name_plural = _('analysis jobs')
+    
+    def __str__(self):
+        return f"Analysis of {self.document_id} ({self.status})"
+
+
+class FileDeletion(models.Model):
+    """Stored file queued for removal by the run_worker command (see documents.storage)"""
+    
+    name = models.CharField(max_length=255)  # Storage name, as stored in a FileField
+    deletion = models.ForeignKey(
+        'accounts.DataDeletion', on_delete=models.SET_NULL, null=True, blank=True, related_name='file_deletions'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('file deletion')
+        verbose_name_plural = _('file deletions')
+    
+    def __str__(self):
+        return self.name
+
+
+class StorageUsage(models.Model):
+    """Bytes a user's uploads take on disk, refreshed by the media scan (see documents.storage)"""
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='storage_usage')
+    bytes_used = models.PositiveBigIntegerField(default=0)  # Files referenced by a document
+    files = models.PositiveIntegerField(default=0)
+    orphan_bytes = models.PositiveBigIntegerField(default=0)  # Files no document references
+    orphan_files = models.PositiveIntegerField(default=0)
+    scanned_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = _('storage usage')
+        verbose_name_plural = _('storage usage')
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.bytes_used} bytes"
+
+
+class StorageScan(models.Model):
+    """One walk of the media tree: totals and the orphaned files found"""
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    files = models.PositiveIntegerField(default=0)
+    bytes_total = models.PositiveBigIntegerField(default=0)
+    orphan_files = models.PositiveIntegerField(default=0)
+    orphan_bytes = models.PositiveBigIntegerField(default=0)
+    orphans_queued = models.PositiveIntegerField(default=0)  # Queued for removal (see FileDeletion)
+    
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = _('storage scan')
+        verbose_name_plural = _('storage scans')
+    
+    def __str__(self):
+        return f"Storage scan {self.started_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,58 @@
+"""
+PDF text extraction engine.
+
+Every page is extracted exactly once. Large files are split into page ranges
+that are extracted in parallel by a process pool. This module does not import
+Django, so pool workers stay cheap to start.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PyPDF2 import PdfReader
+import io
+import math
+import os
+
+
+def _extract_range(data, start, stop):
+    """Extract pages [start, stop) of a PDF given as bytes (runs in a worker process)"""
+    reader = PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+def extract_pages(data, max_workers=None, parallel_min_pages=40):
+    """Return the text of every page of a PDF, in page order"""
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    workers = min(max_workers or os.cpu_count() or 1, page_count)
+    
+    if page_count < parallel_min_pages or workers < 2:
+        return [page.extract_text() or '' for page in reader.pages]
+    
+    # Two ranges per worker evens out pages that are slower to decode
+    chunk_size = math.ceil(page_count / (workers * 2))
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_range, data, start, stop) for start, stop in ranges]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+            return pages
+    except (OSError, BrokenProcessPool):
+        # No process support in this environment; fall back to a single core
+        return [page.extract_text() or '' for page in reader.pages]
+
+
+def join_pages(pages):
+    """Join page texts with newlines.
+    
+    Returns (text, offsets) where offsets[i] is the index in text at which page i starts.
+    """
+    offsets = []
+    position = 0
+    for page_text in pages:
+        offsets.append(position)
+        position += len(page_text) + 1
+    return '\n'.join(pages), offsets
@@ -0,0 +1,216 @@
+"""
+Full-text search over document titles and extracted text.
+
+PostgreSQL keeps a tsvector column (title weighted above the body) with a GIN
+index; SQLite keeps an external-content FTS5 table. On both, triggers update
+the index when a title or text is written. Both are created by migration
+0009. Queries are reduced to word tokens, all required and the last matched
+as a prefix of at least two characters. Other backends fall back to an
+unranked, diacritic-sensitive icontains scan.
+
+Both fold diacritics, in the text and in the query: PostgreSQL through the
+unaccent dictionary of the golexai_search configuration (migration 0012), SQLite
+through the FTS5 tokenizer, so "sad" finds "sąd". SQLite only folds letters
+with a Unicode decomposition and keeps "ł": "zrodlo" finds "źródło" on
+PostgreSQL, while on SQLite it takes "zrodło".
+
+The full-text index always drives the search, so its cost follows the number
+of matches rather than the size of the account. Snippets are computed in a
+second query for the results of the current page only. FullTextSearch is
+shared with message search (see ai_agent.search).
+"""
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+import re
+
+SEARCH_CONFIG = 'golexai_search'  # PostgreSQL text search configuration; matches the migrations
+TITLE_WEIGHT = 10.0  # SQLite bm25 weight of the title column relative to the body
+SNIPPET_WORDS = 24
+SNIPPET_MAX_CHARS = 200000  # ts_headline parses the whole text it is given
+MAX_TERMS = 16
+MIN_PREFIX_CHARS = 2  # SQLite keeps prefix indexes for 2 and 3 characters (see the migrations)
+
+# Control characters mark the highlighted terms until the text is escaped
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Word tokens of a user query"""
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def is_prefix(terms, index):
+    """The last term is matched as a prefix, as the user may still be typing it"""
+    return index == len(terms) - 1 and len(terms[index]) >= MIN_PREFIX_CHARS
+
+
+def tsquery(terms):
+    """PostgreSQL to_tsquery string: every term required, the last as a prefix"""
+    return ' & '.join(f'{term}:*' if is_prefix(terms, i) else term for i, term in enumerate(terms))
+
+
+def fts_query(terms):
+    """FTS5 MATCH string: every term quoted and required, the last as a prefix"""
+    return ' '.join(f'"{term}"*' if is_prefix(terms, i) else f'"{term}"' for i, term in enumerate(terms))
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the highlight markers into <mark> tags"""
+    return escape(snippet or '').replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+class FullTextSearch:
+    """
+    Ranked search results over a queryset, best first.
+
+    Supports count() and slicing, so it can be paginated like a queryset.
+    Slices are lists of model instances with a `rank` attribute. Subclasses
+    name the model table, its search index and the indexed text columns.
+    """
+
+    table = None  # Model table, with a search_vector column on PostgreSQL
+    fts_table = None  # SQLite FTS5 table over the model table
+    text_fields = []  # Indexed columns, in FTS column order
+    bm25_weights = []  # SQLite bm25 weight of each indexed column
+    snippet_column = 0  # Index in text_fields of the column snippets are taken from
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.terms = search_terms(query)
+
+    @classmethod
+    def filter(cls, queryset, query):
+        """Filter a queryset to the rows matching a query, keeping its ordering"""
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+
+        if connection.vendor == 'postgresql':
+            return queryset.extra(
+                where=[f'{cls.table}.search_vector @@ to_tsquery(%s::regconfig, %s)'],
+                params=[SEARCH_CONFIG, tsquery(terms)],
+            )
+        if connection.vendor == 'sqlite':
+            return queryset.filter(
+                id__in=RawSQL(f'SELECT rowid FROM {cls.fts_table} WHERE {cls.fts_table} MATCH %s', [fts_query(terms)])
+            )
+
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in cls.text_fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        return queryset.filter(condition)
+
+    @classmethod
+    def snippets(cls, ids, query):
+        """{id: highlighted snippet of the best matching passage}"""
+        terms = search_terms(query)
+        if not terms or not ids:
+            return {}
+
+        placeholders = ', '.join(['%s'] * len(ids))
+        if connection.vendor == 'postgresql':
+            text_field = cls.text_fields[cls.snippet_column]
+            options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=2'
+            sql = (
+                f"SELECT id, ts_headline(%s::regconfig, left({text_field}, {SNIPPET_MAX_CHARS}), to_tsquery(%s::regconfig, %s), %s) "
+                f"FROM {cls.table} WHERE id IN ({placeholders})"
+            )
+            params = [SEARCH_CONFIG, SEARCH_CONFIG, tsquery(terms), options, *ids]
+        elif connection.vendor == 'sqlite':
+            sql = (
+                f"SELECT rowid, snippet({cls.fts_table}, {cls.snippet_column}, %s, %s, '…', {SNIPPET_WORDS}) "
+                f"FROM {cls.fts_table} WHERE {cls.fts_table} MATCH %s AND rowid IN ({placeholders})"
+            )
+            params = [HIGHLIGHT_START, HIGHLIGHT_END, fts_query(terms), *ids]
+        else:
+            return {}
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {row_id: highlight(snippet) for row_id, snippet in cursor.fetchall()}
+
+    def postgres_queryset(self):
+        condition = 'to_tsquery(%s::regconfig, %s)'
+        params = [SEARCH_CONFIG, tsquery(self.terms)]
+        return self.queryset.extra(
+            select={'rank': f'ts_rank_cd({self.table}.search_vector, {condition})'},
+            select_params=params,
+            where=[f'{self.table}.search_vector @@ {condition}'],
+            params=params,
+        ).order_by('-rank', '-created_at')
+
+    def sqlite_query(self, select, suffix='', suffix_params=()):
+        """
+        Run a query driven by the FTS table, restricted to the queryset's rows.
+
+        Each match is checked against the queryset by primary key, so the cost
+        follows the number of matches. Joining the queryset to the FTS table
+        instead lets SQLite scan the account and probe the FTS index per row.
+        """
+        candidate = self.queryset.extra(where=[f'{self.table}.id = {self.fts_table}.rowid'])
+        candidates, params = candidate.order_by().values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {select} FROM {self.fts_table} WHERE {self.fts_table} MATCH %s AND EXISTS ({candidates}) {suffix}',
+                [fts_query(self.terms), *params, *suffix_params]
+            )
+            return cursor.fetchall()
+
+    def count(self):
+        if not self.terms:
+            return 0
+        if connection.vendor == 'postgresql':
+            return self.postgres_queryset().count()
+        if connection.vendor == 'sqlite':
+            return self.sqlite_query('COUNT(*)')[0][0]
+        return self.filter(self.queryset, ' '.join(self.terms)).count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice):
+            raise TypeError(f'{type(self).__name__} only supports slicing')
+        if not self.terms:
+            return []
+        if connection.vendor == 'postgresql':
+            return list(self.postgres_queryset()[page])
+        if connection.vendor != 'sqlite':
+            rows = list(self.filter(self.queryset, ' '.join(self.terms))[page])
+            for row in rows:
+                row.rank = 0.0
+            return rows
+
+        start = page.start or 0
+        weights = ', '.join(str(weight) for weight in self.bm25_weights)
+        ranked = self.sqlite_query(
+            f'rowid, -bm25({self.fts_table}, {weights}) AS rank',
+            'ORDER BY rank DESC, rowid DESC LIMIT %s OFFSET %s',
+            [page.stop - start, start]
+        )
+        rows = self.queryset.in_bulk([row_id for row_id, _ in ranked])
+        results = []
+        for row_id, rank in ranked:
+            row = rows[row_id]
+            row.rank = rank
+            results.append(row)
+        return results
+
+
+class DocumentSearch(FullTextSearch):
+    """Ranked search over document titles and extracted text"""
+
+    table = 'documents_document'
+    fts_table = 'documents_document_fts'
+    text_fields = ['title', 'content_text']
+    bm25_weights = [TITLE_WEIGHT, 1.0]
+    snippet_column = 1
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Document
+from .models import Document, AnalysisJob
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -10,20 +10,65 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'file', 'file_type', 'original_filename',
             'mime_type', 'file_size', 'case', 'case_title', 'user', 
-            'content_text', 'analysis', 'is_encrypted', 'is_ai_generated',
+            'content_text', 'extraction_status', 'analysis', 'is_encrypted', 'is_ai_generated',
             'priority', 'status', 'tags',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'file_size', 'case_title', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'file_size', 'case_title', 'extraction_status', 'created_at', 'updated_at']
+
+
+class DocumentListSerializer(serializers.ModelSerializer):
+    """Document grid representation without the large text columns.
+    
+    Full text and analysis are served by the detail and preview endpoints.
+    """
+    case_title = serializers.CharField(read_only=True)
+    analysis_excerpt = serializers.CharField(read_only=True)  # Annotated by DocumentViewSet
+    
+    class Meta:
+        model = Document
+        fields = [
+            'id', 'title', 'file', 'file_type', 'original_filename',
+            'mime_type', 'file_size', 'case', 'case_title', 'user',
+            'extraction_status', 'analysis_excerpt', 'is_encrypted', 'is_ai_generated',
+            'priority', 'status', 'tags',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DocumentSearchResultSerializer(DocumentListSerializer):
+    """Search hit: the list representation plus its rank and a highlighted snippet"""
+    rank = serializers.FloatField(read_only=True)  # Annotated by documents.search
+    snippet = serializers.SerializerMethodField()
+    
+    class Meta(DocumentListSerializer.Meta):
+        fields = DocumentListSerializer.Meta.fields + ['rank', 'snippet']
+        read_only_fields = fields
+    
+    def get_snippet(self, obj):
+        """Escaped text around the matches, with <mark> tags (see documents.search)"""
+        return self.context.get('snippets', {}).get(obj.id, '')
 
 
 class DocumentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
-        fields = ['title', 'file', 'file_type', 'case', 'priority', 'status', 'tags']
+        fields = ['title', 'file', 'file_type', 'case', 'priority', 'status', 'tags', 'extraction_status']
+        read_only_fields = ['extraction_status']
 
 
 class DocumentUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = ['title', 'file_type', 'case', 'priority', 'status', 'tags']
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            'id', 'document', 'status', 'result', 'error', 'tokens_used',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
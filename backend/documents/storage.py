@@ -0,0 +1,151 @@
+"""
+Stored file cleanup and storage usage.
+
+Bulk deletions remove rows with set-based statements, which skip
+Document.delete and its file cleanup. They queue the stored file names as
+FileDeletion rows instead, and the run_worker command removes the files in
+batches. A file that a document still references is only dropped from the
+queue, never removed.
+
+The media scan walks MEDIA_ROOT/documents once, one user directory at a time,
+and compares the files on disk with the Document.file names under that
+directory. It refreshes each user's StorageUsage counter and reports (and
+optionally queues for removal) the files no document references.
+"""
+
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+from accounts.models import User
+from .models import Document, FileDeletion, StorageScan, StorageUsage
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+QUEUE_BATCH_SIZE = 1000
+SWEEP_BATCH_SIZE = 200
+MAX_ATTEMPTS = 3
+
+DOCUMENTS_DIR = 'documents'
+
+
+def queue_file_deletions(names, deletion=None):
+    """Queue storage names for removal. Returns the number queued."""
+    queued = 0
+    batch = []
+    for name in names:
+        if not name:
+            continue
+        batch.append(FileDeletion(name=name, deletion=deletion))
+        if len(batch) >= QUEUE_BATCH_SIZE:
+            FileDeletion.objects.bulk_create(batch)
+            queued += len(batch)
+            batch = []
+    if batch:
+        FileDeletion.objects.bulk_create(batch)
+        queued += len(batch)
+    return queued
+
+
+def sweep_deleted_files():
+    """Worker task: remove one batch of queued files. Returns True if any were processed."""
+    batch = list(FileDeletion.objects.filter(attempts__lt=MAX_ATTEMPTS).order_by('id')[:SWEEP_BATCH_SIZE])
+    if not batch:
+        return False
+
+    in_use = set(Document.objects.filter(file__in={item.name for item in batch}).values_list('file', flat=True))
+    swept = []
+    for item in batch:
+        if item.name not in in_use:
+            try:
+                default_storage.delete(item.name)
+            except OSError as e:
+                logger.warning(f"Could not remove file {item.name}: {str(e)}")
+                FileDeletion.objects.filter(pk=item.pk).update(attempts=F('attempts') + 1)
+                continue
+        swept.append(item.pk)
+
+    FileDeletion.objects.filter(pk__in=swept).delete()
+    return True
+
+
+def scan_directory(media_root, path, grace_cutoff):
+    """Usage counters and orphaned storage names for one directory under media_root"""
+    prefix = Path(path).relative_to(media_root).as_posix() + '/'
+    referenced = set(Document.objects.filter(file__startswith=prefix).values_list('file', flat=True).iterator())
+    usage = {'bytes_used': 0, 'files': 0, 'orphan_bytes': 0, 'orphan_files': 0}
+    orphans = []
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            full_path = os.path.join(root, filename)
+            try:
+                stat = os.stat(full_path)
+            except FileNotFoundError:
+                continue
+            name = Path(full_path).relative_to(media_root).as_posix()
+            # Fresh files may belong to an upload whose document row is not committed yet
+            if name in referenced or stat.st_mtime >= grace_cutoff:
+                usage['bytes_used'] += stat.st_size
+                usage['files'] += 1
+            else:
+                usage['orphan_bytes'] += stat.st_size
+                usage['orphan_files'] += 1
+                orphans.append(name)
+    return usage, orphans
+
+
+def scan_media(delete_orphans=False, progress=None):
+    """Walk the uploaded documents, refresh StorageUsage and find orphans. Returns the StorageScan.
+
+    progress, if given, is called with (directory name, usage, orphan names) for each user directory.
+    """
+    scan = StorageScan.objects.create()
+    media_root = Path(settings.MEDIA_ROOT)
+    documents_root = media_root / DOCUMENTS_DIR
+    grace_cutoff = time.time() - settings.MEDIA_GC['GRACE_MINUTES'] * 60
+    user_ids = set(User.objects.values_list('id', flat=True))
+    now = timezone.now()
+
+    directories = [entry for entry in os.scandir(documents_root) if entry.is_dir()] if documents_root.is_dir() else []
+    for entry in directories:
+        usage, orphans = scan_directory(media_root, entry.path, grace_cutoff)
+        scan.files += usage['files'] + usage['orphan_files']
+        scan.bytes_total += usage['bytes_used'] + usage['orphan_bytes']
+        scan.orphan_files += usage['orphan_files']
+        scan.orphan_bytes += usage['orphan_bytes']
+
+        if entry.name.isdigit() and int(entry.name) in user_ids:
+            StorageUsage.objects.update_or_create(user_id=int(entry.name), defaults={**usage, 'scanned_at': now})
+        if delete_orphans:
+            for start in range(0, len(orphans), QUEUE_BATCH_SIZE):
+                batch = orphans[start:start + QUEUE_BATCH_SIZE]
+                queued = set(FileDeletion.objects.filter(name__in=batch).values_list('name', flat=True))
+                scan.orphans_queued += queue_file_deletions(name for name in batch if name not in queued)
+        if progress:
+            progress(entry.name, usage, orphans)
+
+    # Users without a directory have nothing on disk
+    StorageUsage.objects.filter(scanned_at__lt=now).update(
+        bytes_used=0, files=0, orphan_bytes=0, orphan_files=0, scanned_at=now
+    )
+    scan.finished_at = timezone.now()
+    scan.save()
+    return scan
+
+
+def scan_media_if_due():
+    """Worker task: run the media scan every SCAN_INTERVAL_HOURS. Returns True if it ran."""
+    config = settings.MEDIA_GC
+    if StorageScan.objects.filter(started_at__gte=timezone.now() - timedelta(hours=config['SCAN_INTERVAL_HOURS'])).exists():
+        return False
+    scan = scan_media(delete_orphans=config['DELETE_ORPHANS'])
+    logger.info(
+        f"Media scan: {scan.files} files, {scan.bytes_total} bytes, "
+        f"{scan.orphan_files} orphaned ({scan.orphan_bytes} bytes), {scan.orphans_queued} queued for removal"
+    )
+    return True
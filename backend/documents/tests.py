@@ -1,3 +1,107 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import User
+from .models import AnalysisJob, Document
+import hashlib
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+SYNCHRONOUS_EVENTS = {**settings.ANALYTICS_EVENTS, 'SYNCHRONOUS': True}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class AnalysisJobTests(TestCase):
+    """Listing of queued document analyses"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+        cls.document = Document.objects.create(user=cls.user, title='Contract', content_text='Umowa')
+        cls.job = AnalysisJob.objects.create(document=cls.document, user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_filter_by_document(self):
+        other = Document.objects.create(user=self.user, title='Other', content_text='Umowa')
+        AnalysisJob.objects.create(document=other, user=self.user)
+
+        response = self.client.get(f'/api/analysis-jobs/?document={self.document.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.json()['results']], [self.job.id])
+
+    def test_filter_rejects_non_integer_ids(self):
+        response = self.client.get('/api/analysis-jobs/?document=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'document must be an id'})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ANALYTICS_EVENTS=SYNCHRONOUS_EVENTS)
+class DocumentDedupTests(TestCase):
+    """Uploads of the same bytes share one stored blob"""
+
+    CONTENT = b'%PDF-1.4 umowa sprzedazy'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lawyer', email='lawyer@example.com', password='secret')
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name='contract.pdf', content=CONTENT):
+        response = self.client.post('/api/documents/', {
+            'title': name,
+            'file': SimpleUploadedFile(name, content, content_type='application/pdf'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Document.objects.latest('id')
+
+    def stored_files(self):
+        return [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        ]
+
+    def test_same_bytes_uploaded_twice_share_one_blob(self):
+        first = self.upload('contract.pdf')
+        Document.objects.filter(pk=first.pk).update(
+            content_text='Umowa sprzedazy', extraction_status='done', analysis='Analysis'
+        )
+        second = self.upload('copy of contract.pdf')
+
+        digest = hashlib.sha256(self.CONTENT).hexdigest()
+        self.assertEqual(first.file.name, f'documents/{self.user.id}/{digest}.pdf')
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(second.content_hash, digest)
+        self.assertEqual(second.original_filename, 'copy of contract.pdf')
+        # The extracted text and analysis are reused instead of being computed again
+        self.assertEqual(second.extraction_status, 'done')
+        self.assertEqual(second.content_text, 'Umowa sprzedazy')
+        self.assertEqual(second.analysis, 'Analysis')
+        self.assertEqual(len(self.stored_files()), 1)
+
+        self.assertNotEqual(self.upload('other.pdf', b'%PDF-1.4 inna umowa').file.name, first.file.name)
+        self.assertEqual(len(self.stored_files()), 2)
+
+    def test_deleting_one_of_two_documents_keeps_the_shared_file(self):
+        first = self.upload()
+        second = self.upload()
+        path = first.file.path
+
+        self.assertEqual(self.client.delete(f'/api/documents/{first.id}/').status_code, 204)
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(self.client.get(f'/api/documents/{second.id}/download/').status_code, 200)
+
+        self.assertEqual(self.client.delete(f'/api/documents/{second.id}/').status_code, 204)
+        self.assertFalse(os.path.isfile(path))
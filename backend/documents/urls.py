@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet
+from .views import DocumentViewSet, AnalysisJobViewSet
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet, basename='document')
+router.register(r'analysis-jobs', AnalysisJobViewSet, basename='analysis-job')
 
 urlpatterns = [
     path('', include(router.urls)),
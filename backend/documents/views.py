@@ -1,27 +1,48 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db.models.functions import Substr
 from django.http import HttpResponse
 from django.utils import timezone
 from datetime import timedelta
-from .models import Document
-from .serializers import DocumentSerializer, DocumentCreateSerializer, DocumentUpdateSerializer
+from .models import Document, AnalysisJob
+from .serializers import (
+    DocumentSerializer, DocumentListSerializer, DocumentCreateSerializer,
+    DocumentUpdateSerializer, AnalysisJobSerializer, DocumentSearchResultSerializer
+)
+from .jobs import enqueue_analysis
+from .blobs import hash_upload, blob_filename, find_duplicate, duplicate_fields
+from .search import DocumentSearch, search_terms
 from analytics.models import AuditLog, UsageMetric
+from analytics.events import record
+from golexai.pagination import PageNumberOrKeysetPagination
 import os
-from docx import Document as DocxDocument
-from PyPDF2 import PdfReader
 import io
 import re
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination  # ?cursor= for keyset pages (see golexai.pagination)
+    
+    # Columns the list view never reads; the text can run to megabytes per row
+    LIST_DEFERRED_FIELDS = [
+        'content_text', 'analysis', 'page_offsets',
+        'case__description', 'case__context_digest',
+    ]
+    ANALYSIS_EXCERPT_CHARS = 200
     
     def get_queryset(self):
         queryset = Document.objects.filter(user=self.request.user)
         
+        if self.action in ['list', 'search']:
+            queryset = queryset.select_related('case').defer(*self.LIST_DEFERRED_FIELDS).annotate(
+                analysis_excerpt=Substr('analysis', 1, self.ANALYSIS_EXCERPT_CHARS)
+            )
+        
         # Filter by priority
         priority = self.request.query_params.get('priority')
         if priority:
@@ -42,10 +63,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if ai_generated is not None:
             queryset = queryset.filter(is_ai_generated=ai_generated == 'true')
         
-        # Search by title
+        # Full-text search over title and text (see documents.search)
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(title__icontains=search)
+            queryset = DocumentSearch.filter(queryset, search)
         
         return queryset
     
@@ -54,35 +75,55 @@ class DocumentViewSet(viewsets.ModelViewSet):
             return DocumentCreateSerializer
         if self.action in ['update', 'partial_update']:
             return DocumentUpdateSerializer
+        if self.action == 'list':
+            return DocumentListSerializer
+        if self.action == 'search':
+            return DocumentSearchResultSerializer
         return DocumentSerializer
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search with highlighted snippets: ?q=... plus the list filters"""
+        query = request.query_params.get('q', '')
+        if not search_terms(query):
+            return Response(
+                {'error': 'Search query (q) is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        page = self.paginate_queryset(DocumentSearch(self.get_queryset(), query))
+        snippets = DocumentSearch.snippets([document.id for document in page], query)
+        serializer = self.get_serializer(page, many=True, context={**self.get_serializer_context(), 'snippets': snippets})
+        return self.get_paginated_response(serializer.data)
+    
     def perform_create(self, serializer):
         file = serializer.validated_data.get('file')
         
         if file:
-            document = serializer.save(
-                user=self.request.user,
-                original_filename=file.name,
-                mime_type=file.content_type,
-                file_size=file.size
-            )
-            
-            # Extract text content
-            try:
-                file.seek(0)  # Reset file pointer
-                if file.name.endswith('.pdf'):
-                    reader = PdfReader(file)
-                    text = '\n'.join([page.extract_text() for page in reader.pages if page.extract_text()])
-                    document.content_text = text
-                elif file.name.endswith('.docx'):
-                    doc = DocxDocument(file)
-                    text = '\n'.join([para.text for para in doc.paragraphs if para.text.strip()])
-                    document.content_text = text
-                file.seek(0)  # Reset again for storage
-            except Exception as e:
-                pass  # Handle errors silently for MVP
+            original_filename = file.name
+            digest = hash_upload(file)
+            duplicate = find_duplicate(self.request.user, digest)
             
-            document.save()
+            if duplicate:
+                # Same bytes already stored: reuse the blob, text and analysis
+                document = serializer.save(
+                    user=self.request.user,
+                    original_filename=original_filename,
+                    mime_type=file.content_type,
+                    content_hash=digest,
+                    **duplicate_fields(duplicate)
+                )
+            else:
+                # Text is extracted later by the background worker (see documents.extraction)
+                file.name = blob_filename(digest, original_filename)
+                document = serializer.save(
+                    user=self.request.user,
+                    original_filename=original_filename,
+                    mime_type=file.content_type,
+                    file_size=file.size,
+                    content_hash=digest,
+                    extraction_status='pending'
+                )
         else:
             # For AI-generated documents without file
             document = serializer.save(
@@ -91,60 +132,43 @@ class DocumentViewSet(viewsets.ModelViewSet):
             )
         
         # Track usage
-        UsageMetric.objects.create(
+        record(UsageMetric(
             user=self.request.user,
             metric_type='document_uploaded',
             value=1,
             metadata={'document_id': document.id}
-        )
+        ))
         
         # Audit log
-        AuditLog.objects.create(
+        record(AuditLog(
             user=self.request.user,
             action='document_access',
             resource_type='document',
             resource_id=document.id
-        )
+        ))
     
     @action(detail=True, methods=['post'])
     def analyze(self, request, pk=None):
-        """Analyze document with AI"""
+        """Queue AI analysis of the document; poll /analysis-jobs/{id}/ for the result"""
         document = self.get_object()
+        if document.extraction_status in ['pending', 'running']:
+            return Response(
+                {'error': 'Text extraction is still in progress'},
+                status=status.HTTP_409_CONFLICT
+            )
         if not document.content_text:
             return Response(
                 {'error': 'Document has no extractable text'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        from ai_agent.services import AIService
-        ai_service = AIService()
+        job = enqueue_analysis(document, language=request.user.language)
         
-        try:
-            result = ai_service.analyze_document(
-                document.content_text,
-                language=request.user.language
-            )
-            
-            # Save analysis to document
-            document.analysis = result['content']
-            document.save()
-            
-            UsageMetric.objects.create(
-                user=request.user,
-                metric_type='document_analyzed',
-                value=result['tokens_used'],
-                metadata={'document_id': document.id}
-            )
-            
-            return Response({
-                'analysis': result['content'],
-                'document_id': document.id
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'document_id': document.id
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
@@ -181,13 +205,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
                     doc.save(buffer)
                     buffer.seek(0)
                     
-                    AuditLog.objects.create(
+                    record(AuditLog(
                         user=request.user,
                         action='document_access',
                         resource_type='document',
                         resource_id=document.id,
                         metadata={'action': 'download_generated'}
-                    )
+                    ))
                     
                     response = HttpResponse(
                         buffer.getvalue(),
@@ -206,13 +230,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        AuditLog.objects.create(
+        record(AuditLog(
             user=request.user,
             action='document_access',
             resource_type='document',
             resource_id=document.id,
             metadata={'action': 'download'}
-        )
+        ))
         
         # Read file properly
         try:
@@ -260,13 +284,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
             doc.save(buffer)
             buffer.seek(0)
             
-            AuditLog.objects.create(
+            record(AuditLog(
                 user=request.user,
                 action='document_access',
                 resource_type='document',
                 resource_id=document.id,
                 metadata={'action': 'export_docx'}
-            )
+            ))
             
             response = HttpResponse(buffer.read(), content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
             response['Content-Disposition'] = f'attachment; filename="{document.title}.docx"'
@@ -332,12 +356,12 @@ class DocumentViewSet(viewsets.ModelViewSet):
         document = self.get_object()
         
         # Audit log
-        AuditLog.objects.create(
+        record(AuditLog(
             user=request.user,
             action='document_delete',
             resource_type='document',
             resource_id=document.id
-        )
+        ))
         
         return super().destroy(request, *args, **kwargs)
     
@@ -346,18 +370,20 @@ class DocumentViewSet(viewsets.ModelViewSet):
         """Get document content for preview"""
         document = self.get_object()
         
-        AuditLog.objects.create(
+        record(AuditLog(
             user=request.user,
             action='document_access',
             resource_type='document',
             resource_id=document.id,
             metadata={'action': 'preview'}
-        )
+        ))
         
         return Response({
             'id': document.id,
             'title': document.title,
             'content': document.content_text or '',
+            'extraction_status': document.extraction_status,
+            'page_offsets': document.page_offsets,
             'analysis': document.analysis or '',
             'is_ai_generated': document.is_ai_generated,
             'file_type': document.file_type,
@@ -443,13 +469,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
             doc.build(story)
             buffer.seek(0)
             
-            AuditLog.objects.create(
+            record(AuditLog(
                 user=request.user,
                 action='document_access',
                 resource_type='document',
                 resource_id=document.id,
                 metadata={'action': 'export_pdf'}
-            )
+            ))
             
             safe_title = re.sub(r'[^\w\s-]', '', document.title).strip().replace(' ', '_')[:50]
             response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
@@ -461,3 +487,22 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 {'error': f'PDF export failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class AnalysisJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of queued document analyses"""
+    serializer_class = AnalysisJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = AnalysisJob.objects.filter(user=self.request.user)
+        
+        document_id = self.request.query_params.get('document')
+        if document_id:
+            try:
+                document_id = int(document_id)
+            except ValueError:
+                raise ValidationError({'error': 'document must be an id'})
+            queryset = queryset.filter(document_id=document_id)
+        
+        return queryset
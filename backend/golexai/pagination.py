@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Page numbers need a COUNT(*) and an OFFSET scan, both of which grow with the
+depth of the page. A cursor instead carries the (created_at, id) of the last
+row sent, and the next page is read from an index on created_at after that
+position, at the same cost at any depth. There is no total count.
+
+Cursor pagination is opted into per request with ?cursor= (empty for the
+first page); responses are {"next": url or null, "results": [...]}. Pages are
+in the list's own direction: ascending if it is ordered by created_at,
+otherwise newest first.
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on (created_at, id)"""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500  # Bulk sync reads large pages
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, row):
+        position = f'{row.created_at.isoformat()}|{row.pk}'
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (Base64Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def is_ascending(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return bool(ordering) and ordering[0] == 'created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ascending = self.is_ascending(queryset)
+        direction = '' if ascending else '-'
+        queryset = queryset.order_by(f'{direction}created_at', f'{direction}pk')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            after = 'gt' if ascending else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{after}': created_at}) | Q(created_at=created_at, **{f'pk__{after}': pk})
+            )
+
+        # One extra row tells whether there is a next page, without counting
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """Page numbers by default; keyset pagination when the request passes ?cursor="""
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Ranked search results are not querysets and only have page numbers
+        if isinstance(queryset, QuerySet) and self.keyset_class.is_requested(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -243,6 +243,74 @@ SOCIALACCOUNT_PROVIDERS = {
 # OpenAI Settings
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
+# Knowledge base retrieval: BM25 always, fused with OpenAI embeddings when enabled
+KNOWLEDGE_BASE_EMBEDDINGS = os.getenv("KNOWLEDGE_BASE_EMBEDDINGS", "False") == "True"
+
+# Cache for AI document analyses (see ai_agent.cache)
+AI_ANALYSIS_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("AI_ANALYSIS_CACHE_MAX_ENTRIES", "256")),
+    "TTL": int(os.getenv("AI_ANALYSIS_CACHE_TTL", str(7 * 24 * 3600))),  # seconds
+    "DATABASE": os.getenv("AI_ANALYSIS_CACHE_DATABASE", "True") == "True",
+}
+
+# Token budget for chat prompts (see ai_agent.prompting)
+AI_PROMPT_BUDGET = {
+    "CONTEXT_WINDOW": int(os.getenv("AI_PROMPT_CONTEXT_WINDOW", "8192")),  # gpt-4
+    "COMPLETION_RESERVE": int(os.getenv("AI_PROMPT_COMPLETION_RESERVE", "2048")),
+    # Per-section caps in tokens; None means limited only by the overall budget
+    "SECTIONS": {
+        "summary": 600,
+        "knowledge_base": 1200,
+        "case": 1200,
+        "document": 1500,
+        "history": None,
+    },
+}
+
+# Caches. Analytics responses use a local-memory cache by default, which is per
+# process. Any deployment with several gunicorn workers or with the run_worker
+# process (which writes usage metrics and extracted text) needs "file" or
+# "database" (run `python manage.py createcachetable`) so invalidation reaches
+# every process; "file" only if they share a disk.
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "locmem")
+ANALYTICS_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "golexai-analytics",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("ANALYTICS_CACHE_LOCATION", "/tmp/golexai-analytics-cache"),
+    },
+    "database": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": os.getenv("ANALYTICS_CACHE_LOCATION", "golexai_cache"),
+    },
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "analytics": {
+        **ANALYTICS_CACHE_BACKENDS[ANALYTICS_CACHE_BACKEND],
+        "TIMEOUT": int(os.getenv("ANALYTICS_CACHE_TIMEOUT", "300")),  # seconds
+    },
+}
+
+# Conversation memory: running summary plus a window of recent messages (see ai_agent.memory)
+AI_CONVERSATION_MEMORY = {
+    "WINDOW": int(os.getenv("AI_CONVERSATION_WINDOW", "6")),  # messages sent verbatim
+    "SUMMARIZE_EVERY": int(os.getenv("AI_CONVERSATION_SUMMARIZE_EVERY", "6")),  # messages folded per summary
+}
+
+# Audit logs and usage metrics are buffered per process and written in batches
+# (see analytics.events). SYNCHRONOUS saves each event as it is recorded.
+ANALYTICS_EVENTS = {
+    "SYNCHRONOUS": os.getenv("ANALYTICS_EVENTS_SYNCHRONOUS", "False") == "True",
+    "MAX_EVENTS": int(os.getenv("ANALYTICS_EVENTS_MAX_EVENTS", "200")),
+    "FLUSH_INTERVAL": float(os.getenv("ANALYTICS_EVENTS_FLUSH_INTERVAL", "5")),  # seconds
+}
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -305,7 +373,27 @@ if RAILWAY_DOMAIN:
 # GDPR Settings
 DATA_RETENTION_DAYS = 90
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "")
+DATA_EXPORT_RETENTION_HOURS = int(os.getenv("DATA_EXPORT_RETENTION_HOURS", "72"))  # Export archives are deleted afterwards
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Re-uploads of identical files reuse the stored blob and extracted text;
+# set to False to also require a fresh AI analysis for each copy
+DOCUMENT_DEDUP_REUSE_ANALYSIS = os.getenv("DOCUMENT_DEDUP_REUSE_ANALYSIS", "True") == "True"
+
+# PDF text extraction: files with at least PDF_PARALLEL_MIN_PAGES pages are
+# split across PDF_EXTRACTION_WORKERS processes (defaults to the CPU count)
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "0")) or os.cpu_count()
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+# Media garbage collection (see documents.storage): the worker walks
+# MEDIA_ROOT/documents every SCAN_INTERVAL_HOURS, refreshes per-user storage
+# usage and, if DELETE_ORPHANS is set, removes files no document references.
+# Files younger than GRACE_MINUTES are never treated as orphans.
+MEDIA_GC = {
+    "SCAN_INTERVAL_HOURS": int(os.getenv("MEDIA_GC_SCAN_INTERVAL_HOURS", "24")),
+    "GRACE_MINUTES": int(os.getenv("MEDIA_GC_GRACE_MINUTES", "60")),
+    "DELETE_ORPHANS": os.getenv("MEDIA_GC_DELETE_ORPHANS", "False") == "True",
+}
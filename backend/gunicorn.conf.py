@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration for golexai.
+
+SERVER_MODE selects how the app is served:
+- wsgi (default): sync workers running golexai.wsgi
+- asgi: uvicorn workers running golexai.asgi, so the async AI endpoints
+  (/api/ai/async/...) can hold many in-flight completions per process. The
+  frontend reads the mode from /api/ai/health/ and sends chat and document
+  analysis there; the sync views would share one thread per worker and have
+  their streamed responses buffered whole.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'golexai.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'golexai.wsgi:application'
@@ -16,6 +16,18 @@ class API {
         localStorage.removeItem('authToken');
     }
     
+    // Under SERVER_MODE=asgi the AI endpoints are served by their async versions (/ai/async/...);
+    // the sync views would each hold a thread and have their streams buffered whole
+    static async aiEndpoint(syncPath, asyncPath) {
+        if (!this.serverMode) {
+            this.serverMode = fetch(`${API_BASE_URL}/ai/health/`)
+                .then(response => response.json())
+                .then(data => data.server_mode || 'wsgi')
+                .catch(() => 'wsgi');
+        }
+        return (await this.serverMode) === 'asgi' ? asyncPath : syncPath;
+    }
+    
     static async request(endpoint, options = {}, skipAuthRedirect = false) {
         const url = `${API_BASE_URL}${endpoint}`;
         const headers = {
@@ -97,6 +109,10 @@ class API {
         return this.request('/documents/');
     }
     
+    static async searchDocuments(query, page = 1) {
+        return this.request(`/documents/search/?q=${encodeURIComponent(query)}&page=${page}`);
+    }
+    
     static async getDocument(id) {
         return this.request(`/documents/${id}/`);
     }
@@ -130,10 +146,29 @@ class API {
         });
     }
     
-    static async analyzeDocument(documentId) {
-        return this.request(`/documents/${documentId}/analyze/`, {
+    // Queues the analysis and polls the job until the worker finishes it
+    static async analyzeDocument(documentId, pollInterval = 2000) {
+        const endpoint = await this.aiEndpoint(
+            `/documents/${documentId}/analyze/`,
+            `/ai/async/documents/${documentId}/analyze/`
+        );
+        let job = await this.request(endpoint, {
             method: 'POST',
         });
+
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            job = await this.getAnalysisJob(job.job_id || job.id);
+        }
+
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Analysis failed');
+        }
+        return { analysis: job.result, document_id: job.document };
+    }
+
+    static async getAnalysisJob(jobId) {
+        return this.request(`/analysis-jobs/${jobId}/`);
     }
     
     // Cases
@@ -167,7 +202,8 @@ class API {
     
     // AI Chat
     static async sendChatMessage(message, conversationId, documentId, persona = 'commercial', caseId = null) {
-        return this.request('/ai/chat/', {
+        const endpoint = await this.aiEndpoint('/ai/chat/', '/ai/async/chat/');
+        return this.request(endpoint, {
             method: 'POST',
             body: JSON.stringify({
                 message,
@@ -179,6 +215,72 @@ class API {
         });
     }
     
+    // Streams the assistant reply via server-sent events; onDelta receives the text so far
+    static async streamChatMessage(message, conversationId, documentId, persona = 'commercial', caseId = null, onDelta = null) {
+        const endpoint = await this.aiEndpoint('/ai/chat/', '/ai/async/chat/');
+        const response = await fetch(`${API_BASE_URL}${endpoint}?stream=1`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${authToken}`,
+            },
+            body: JSON.stringify({
+                message,
+                conversation_id: conversationId,
+                document_id: documentId,
+                persona,
+                case_id: caseId,
+            }),
+        });
+
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!response.ok || !contentType.startsWith('text/event-stream')) {
+            const text = await response.text();
+            const data = text ? JSON.parse(text) : {};
+            throw new Error(data.error || data.detail || 'API Error');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let content = '';
+        let result = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                raw.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                const payload = data ? JSON.parse(data) : {};
+
+                if (event === 'delta') {
+                    content += payload.content;
+                    if (onDelta) onDelta(content);
+                } else if (event === 'done') {
+                    result = payload;
+                } else if (event === 'error') {
+                    throw new Error(payload.error || 'API Error');
+                }
+            }
+        }
+
+        if (!result) {
+            throw new Error('Stream closed before the response completed');
+        }
+        return result;
+    }
+
     static async getConversations() {
         return this.request('/ai/conversations/');
     }
@@ -191,6 +293,11 @@ class API {
         return this.request(`/ai/conversations/${id}/messages/`);
     }
     
+    static async searchMessages(query, filters = {}, page = 1) {
+        const params = new URLSearchParams({ q: query, page, ...filters });
+        return this.request(`/ai/messages/search/?${params}`);
+    }
+    
     static async deleteConversation(id) {
         return this.request(`/ai/conversations/${id}/`, {
             method: 'DELETE',
@@ -264,10 +371,41 @@ class API {
     }
     
     // GDPR
-    static async exportUserData() {
-        return this.request('/auth/users/export_data/', {
+    // Queues the export and polls the job until the worker has built the archive
+    static async exportUserData(pollInterval = 3000) {
+        let job = await this.request('/auth/users/export_data/', {
             method: 'POST',
         });
+
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            job = await this.request(`/auth/data-exports/${job.id}/`);
+        }
+
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Export failed');
+        }
+        return job;
+    }
+    
+    static async downloadUserDataExport(job) {
+        const response = await fetch(job.download_url, {
+            headers: {
+                'Authorization': `Bearer ${authToken}`,
+            },
+        });
+        
+        if (!response.ok) {
+            throw new Error('Export download failed');
+        }
+        
+        const blob = await response.blob();
+        const downloadUrl = window.URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = downloadUrl;
+        a.download = `golexai-data-export-${new Date().toISOString()}.zip`;
+        a.click();
+        window.URL.revokeObjectURL(downloadUrl);
     }
     
     static async deleteUserData(confirmation) {
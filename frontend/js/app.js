@@ -301,20 +301,23 @@ function setupEventListeners() {
     
     document.getElementById('priority-filter')?.addEventListener('change', filterDocuments);
     document.getElementById('status-filter')?.addEventListener('change', filterDocuments);
-    document.getElementById('document-search')?.addEventListener('input', filterDocuments);
+    let conversationSearchTimer;
+    document.getElementById('conversation-search')?.addEventListener('input', (e) => {
+        clearTimeout(conversationSearchTimer);
+        conversationSearchTimer = setTimeout(() => searchConversations(e.target.value.trim()), 300);
+    });
+    let documentSearchTimer;
+    document.getElementById('document-search')?.addEventListener('input', (e) => {
+        clearTimeout(documentSearchTimer);
+        documentSearchTimer = setTimeout(() => searchDocuments(e.target.value.trim()), 300);
+    });
     
     // Settings - GDPR
     document.getElementById('export-data-btn')?.addEventListener('click', async () => {
         if (confirm(t('settings.confirm_export'))) {
             try {
-                const data = await API.exportUserData();
-                const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
-                const url = URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = `golexai-data-export-${new Date().toISOString()}.json`;
-                a.click();
-                URL.revokeObjectURL(url);
+                const job = await API.exportUserData();
+                await API.downloadUserDataExport(job);
                 showToast('success', t('common.success'), t('settings.export_success'));
             } catch (error) {
                 showToast('error', t('common.error'), t('settings.export_error'));
@@ -1070,6 +1073,31 @@ async function loadDocuments() {
     }
 }
 
+// Full-text search over titles and document text; an empty query restores the normal list
+async function searchDocuments(query) {
+    if (query.length < 2) {
+        await loadDocuments();
+        filterDocuments();
+        return;
+    }
+    
+    try {
+        const results = await API.searchDocuments(query);
+        const container = document.getElementById('documents-list');
+        
+        if (!results.results || results.results.length === 0) {
+            container.innerHTML = `<p class="text-muted">${t('documents.no_documents')}</p>`;
+            return;
+        }
+        
+        container.innerHTML = results.results.map(doc => createDocumentCard(doc)).join('');
+        setupDocumentCardEvents();
+        filterDocuments();
+    } catch (error) {
+        console.error('Error searching documents:', error);
+    }
+}
+
 function createCaseCard(caseItem) {
     const priorityClass = caseItem.priority || 'medium';
     const statusBadge = caseItem.status === 'open' ? 'Open' : 
@@ -1126,6 +1154,7 @@ function createDocumentCard(doc) {
                             <span class="badge badge-${status.replace('-', '')}">${t(`documents.${status.replace('-', '_')}`)}</span>
                             ${tags.map(tag => `<span class="tag">${tag}</span>`).join('')}
                         </div>
+                        ${doc.snippet ? `<p class="document-snippet">${doc.snippet}</p>` : ''}
                     </div>
                 </div>
                 <div class="document-actions">
@@ -1172,10 +1201,10 @@ function createDocumentCard(doc) {
                         <label>${t('documents.case')}</label>
                         <span>${doc.case_title || 'Not assigned'}</span>
                     </div>
-                    ${doc.analysis ? `
+                    ${doc.analysis_excerpt ? `
                     <div class="detail-item" style="grid-column: span 3;">
                         <label>${t('documents.analysis_result')}</label>
-                        <span>${doc.analysis.substring(0, 200)}...</span>
+                        <span>${doc.analysis_excerpt}...</span>
                     </div>
                     ` : ''}
                 </div>
@@ -1283,16 +1312,14 @@ function filterDocuments() {
     const typeFilter = document.querySelector('.filter-btn.active')?.dataset.filter || 'all';
     const priorityFilter = document.getElementById('priority-filter')?.value || '';
     const statusFilter = document.getElementById('status-filter')?.value || '';
-    const searchTerm = document.getElementById('document-search')?.value.toLowerCase() || '';
     
     document.querySelectorAll('.document-card').forEach(card => {
         const matchesType = typeFilter === 'all' || card.dataset.type === typeFilter || 
             (typeFilter === 'ai-generated' && card.querySelector('.badge-ai'));
         const matchesPriority = !priorityFilter || card.dataset.priority === priorityFilter;
         const matchesStatus = !statusFilter || card.dataset.status === statusFilter;
-        const matchesSearch = !searchTerm || card.querySelector('.document-title').textContent.toLowerCase().includes(searchTerm);
         
-        card.style.display = matchesType && matchesPriority && matchesStatus && matchesSearch ? 'block' : 'none';
+        card.style.display = matchesType && matchesPriority && matchesStatus ? 'block' : 'none';
     });
 }
 
@@ -1374,7 +1401,14 @@ async function sendMessage() {
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
     
     try {
-        const response = await API.sendChatMessage(message, currentConversationId, null, currentPersona, currentConversationCaseId);
+        const response = await API.streamChatMessage(message, currentConversationId, null, currentPersona, currentConversationCaseId, (partial) => {
+            // Replace the typing indicator with the text streamed so far
+            const typingContent = document.querySelector(`#${typingId} .message-content`);
+            if (typingContent) {
+                typingContent.innerHTML = `<strong>GOLEXAI</strong><div class="formatted-text">${formatAIResponse(partial)}</div>`;
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            }
+        });
         currentConversationId = response.conversation_id;
         
         // Remove typing indicator
@@ -1910,6 +1944,42 @@ async function loadConversations() {
     }
 }
 
+// Full-text search over past messages; an empty query restores the conversation list
+async function searchConversations(query) {
+    if (query.length < 2) {
+        await loadConversations();
+        return;
+    }
+    
+    try {
+        const results = await API.searchMessages(query);
+        const container = document.getElementById('conversations-list');
+        if (!container) return;
+        
+        if (!results.results || results.results.length === 0) {
+            container.innerHTML = `<p class="empty-state"><i class="fas fa-search"></i> ${t('chatbot.no_messages_found')}</p>`;
+            return;
+        }
+        
+        // Snippets are escaped by the server, only <mark> tags are HTML
+        container.innerHTML = results.results.map(hit => `
+            <div class="conversation-item ${hit.conversation === currentConversationId ? 'active' : ''}" data-id="${hit.conversation}">
+                <div class="conversation-content">
+                    <h4>${escapeHtml(hit.conversation_title || 'Conversation')}</h4>
+                    <p class="message-snippet">${hit.snippet}</p>
+                    <p>${formatDate(hit.created_at)}</p>
+                </div>
+            </div>
+        `).join('');
+        
+        container.querySelectorAll('.conversation-item').forEach(item => {
+            item.addEventListener('click', () => loadConversation(item.dataset.id));
+        });
+    } catch (error) {
+        console.error('Error searching messages:', error);
+    }
+}
+
 async function deleteConversation(id) {
     try {
         await API.deleteConversation(id);
@@ -42,6 +42,8 @@ const translations = {
             commercial_law: "Commercial Law",
             personal_law: "Personal Law",
             new_chat: "New Chat",
+            search_messages: "Search messages...",
+            no_messages_found: "No matching messages",
             attach: "Attach Document",
             welcome: "Hello! I'm your AI legal assistant. How can I help you today? I can analyze documents, draft legal texts, answer questions about commercial or personal law, and much more.",
             you: "You",
@@ -129,7 +131,7 @@ const translations = {
             default_persona_desc: "Choose which legal specialty to use by default",
             data_export: "Data Export",
             export_data: "Export My Data",
-            export_data_desc: "Download all your data in JSON format",
+            export_data_desc: "Download all your data and files as a ZIP archive",
             export: "Export",
             data_deletion: "Data Deletion",
             delete_data: "Delete My Data",
@@ -206,6 +208,8 @@ const translations = {
             commercial_law: "Prawo handlowe",
             personal_law: "Prawo osobowe",
             new_chat: "Nowy czat",
+            search_messages: "Szukaj w wiadomościach...",
+            no_messages_found: "Brak pasujących wiadomości",
             attach: "Dołącz dokument",
             welcome: "Cześć! Jestem Twoim asystentem prawnym AI. Jak mogę Ci dzisiaj pomóc? Mogę analizować dokumenty, przygotowywać teksty prawne, odpowiadać na pytania dotyczące prawa handlowego lub osobowego i wiele więcej.",
             you: "Ty",
@@ -293,7 +297,7 @@ const translations = {
             default_persona_desc: "Wybierz domyślną specjalizację prawną",
             data_export: "Eksport danych",
             export_data: "Eksportuj moje dane",
-            export_data_desc: "Pobierz wszystkie dane w formacie JSON",
+            export_data_desc: "Pobierz wszystkie dane i pliki jako archiwum ZIP",
             export: "Eksportuj",
             data_deletion: "Usuwanie danych",
             delete_data: "Usuń moje dane",